@@ -2,4 +2,10 @@ import os
 os.environ['ETS_TOOLKIT'] = 'qt4'
 
 from arrview._version import __version__
-from arrview.main import view
+
+
+def view(*args, **kwargs):
+    '''Open an array in the viewer, see arrview.main.view.
+    The GUI modules are imported on first use to keep `import arrview` fast.'''
+    from arrview.main import view
+    return view(*args, **kwargs)
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+import itertools
+import os
+import weakref
+
+from arrview.util import rep
+
+
+# Orders accesses across all caches, for evicting against a shared budget
+_ticks = itertools.count()
+
+
+class CacheBudget(object):
+    '''A byte budget shared by several LRUCaches.
+
+    Once the caches together hold more than max_bytes, the least recently
+    used items across all of them are evicted, whichever cache they are in.
+    '''
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._caches = weakref.WeakSet()
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self._caches)
+
+    def caches(self):
+        return list(self._caches)
+
+    def register(self, cache):
+        self._caches.add(cache)
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.enforce()
+
+    def enforce(self):
+        '''Evict least recently used items until the caches fit the budget'''
+        nbytes = self.nbytes
+        while nbytes > self.max_bytes:
+            caches = [c for c in self._caches if len(c)]
+            if not caches:
+                break
+            nbytes -= min(caches, key=LRUCache.oldest_tick).evict_oldest()
+
+    def __repr__(self):
+        return rep(self, ['max_bytes', 'nbytes'])
+
+
+# Budget shared by the caches of all viewers, ARRVIEW_CACHE_BUDGET_MB sets it
+global_budget = CacheBudget(int(os.environ.get('ARRVIEW_CACHE_BUDGET_MB', 1024)) * 2**20)
+
+
+class LRUCache(object):
+    '''A dictionary-like cache bounded by the total number of bytes held.
+
+    Items are evicted in least-recently-used order once the sum of the
+    sizes of the cached values exceeds max_bytes. Values larger than
+    max_bytes are never cached. A cache given a CacheBudget also evicts
+    its items when all caches of the budget together exceed it.
+    '''
+    def __init__(self, max_bytes, budget=None, name=''):
+        self.max_bytes = max_bytes
+        self.name = name
+        self._items = OrderedDict()
+        self._nbytes = 0
+        self._budget = budget
+        if budget is not None:
+            budget.register(self)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key, default=None):
+        try:
+            value, nbytes, _ = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = (value, nbytes, next(_ticks))
+        return value
+
+    def put(self, key, value, nbytes=None):
+        '''Add value to the cache under key.
+        Args:
+        key    -- any hashable object
+        value  -- the object to cache
+        nbytes -- (default: value.nbytes) size of value in bytes
+        '''
+        if nbytes is None:
+            nbytes = getattr(value, 'nbytes', 0)
+        self.pop(key)
+        if nbytes > self.max_bytes:
+            return
+        self._items[key] = (value, nbytes, next(_ticks))
+        self._nbytes += nbytes
+        self._evict()
+        if self._budget is not None:
+            self._budget.enforce()
+
+    def pop(self, key, default=None):
+        try:
+            value, nbytes, _ = self._items.pop(key)
+        except KeyError:
+            return default
+        self._nbytes -= nbytes
+        return value
+
+    def keys(self):
+        return list(self._items.keys())
+
+    def clear(self):
+        self._items.clear()
+        self._nbytes = 0
+
+    def oldest_tick(self):
+        '''Access tick of the least recently used item'''
+        return next(self._items.itervalues())[2]
+
+    def evict_oldest(self):
+        '''Evict the least recently used item, returns its size'''
+        _, (_, nbytes, _) = self._items.popitem(last=False)
+        self._nbytes -= nbytes
+        return nbytes
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes and self._items:
+            self.evict_oldest()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return rep(self, ['name', 'max_bytes', 'nbytes'])
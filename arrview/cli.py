@@ -0,0 +1,149 @@
+'''Command line launcher for arrview.
+
+Usage:
+    arrview data.npy
+    arrview data.npz:name --roi rois.h5
+    arrview data.h5:/group/dataset --view-dims 2 1
+    arrview data.npy --record session.jsonl
+    arrview data.npy --replay session.jsonl
+'''
+import argparse
+import json
+import logging
+import os
+import re
+
+
+log = logging.getLogger(__name__)
+
+_path_re = re.compile(r'^(?P<filename>.*?\.(?P<ext>npy|npz|h5|hdf5|hdf))(?::(?P<key>.*))?$',
+                      re.IGNORECASE)
+
+
+def parse_path(path):
+    '''Split path into (filename, extension, key).
+    key is the part after the colon in `file.npz:name` or `file.h5:/dataset`,
+    otherwise None.'''
+    m = _path_re.match(path)
+    if m is None:
+        raise ValueError('unsupported file type: %r' % path)
+    return m.group('filename'), m.group('ext').lower(), m.group('key') or None
+
+
+def _load_npz(filename, key):
+    import numpy as np
+    npz = np.load(filename)
+    if key is None:
+        if len(npz.files) != 1:
+            raise ValueError('%r holds %d arrays, select one with %s:NAME'
+                             % (filename, len(npz.files), filename))
+        key = npz.files[0]
+    return npz[key]
+
+
+def _load_h5(filename, key):
+    import h5py
+    f = h5py.File(filename, 'r')
+    if key is None:
+        datasets = [k for k, v in f.items() if isinstance(v, h5py.Dataset)]
+        if len(datasets) != 1:
+            raise ValueError('%r holds %d top level datasets, select one with %s:/DATASET'
+                             % (filename, len(datasets), filename))
+        key = datasets[0]
+    dataset = f[key]
+    if not isinstance(dataset, h5py.Dataset):
+        raise ValueError('%r in %r is not a dataset' % (key, filename))
+    return dataset
+
+
+def load_array(path):
+    '''Load the array referenced by path without reading it into memory
+    where the format allows it.
+
+    Parameters
+    ----------
+    path : str
+        file.npy           -- memory-mapped read only
+        file.npz[:name]    -- the named array, may be omitted if there is only one
+        file.h5:/dataset   -- an h5py Dataset, read lazily (also .hdf5, .hdf)
+
+    Returns
+    -------
+    ndarray, memmap or h5py Dataset
+    '''
+    filename, ext, key = parse_path(path)
+    if not os.path.isfile(filename):
+        raise IOError('no such file: %r' % filename)
+    if ext == 'npy':
+        import numpy as np
+        return np.load(filename, mmap_mode='r')
+    if ext == 'npz':
+        return _load_npz(filename, key)
+    return _load_h5(filename, key)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='arrview',
+                                     description='An N-dimensional array viewer')
+    parser.add_argument('path',
+                        help='file.npy, file.npz[:name] or file.h5:/dataset')
+    parser.add_argument('--roi', dest='roi_filename', default=None,
+                        help='ROI file to load from and save to')
+    parser.add_argument('--view-dims', nargs=2, type=int, metavar=('XDIM', 'YDIM'),
+                        default=(1, 0), help='initial view dimensions (default: 1 0)')
+    parser.add_argument('--reorder-budget', type=int, default=0, metavar='MB',
+                        help='memory allowed for a reordered copy of the array, '
+                             'see Slicer (default: 0, disabled)')
+    parser.add_argument('--record', metavar='FILE', default=None,
+                        help='record the interaction to FILE, see arrview.replay')
+    parser.add_argument('--replay', metavar='FILE', default=None,
+                        help='replay a recorded interaction and print the '
+                             'latency per event kind as JSON')
+    parser.add_argument('--debug', action='store_true',
+                        help='enable debug logging')
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    logging.basicConfig()
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+        log.debug('debugging enabled')
+
+    arr = load_array(args.path)
+    xdim, ydim = args.view_dims
+
+    if args.record or args.replay:
+        return _record_or_replay(arr, args)
+
+    from arrview.main import view
+    view(arr,
+         roi_filename=args.roi_filename,
+         title=args.path,
+         reorder_budget=args.reorder_budget * 2**20,
+         xdim=xdim,
+         ydim=ydim)
+
+
+def _record_or_replay(arr, args):
+    from arrview.main import ArrayViewer
+    from arrview.replay import Recorder, replay, summarize
+    from arrview.slicer import Slicer
+    xdim, ydim = args.view_dims
+    viewer = ArrayViewer(Slicer(arr, xdim=xdim, ydim=ydim,
+                                reorder_budget=args.reorder_budget * 2**20),
+                         roi_filename=args.roi_filename,
+                         title=args.path)
+    if args.replay:
+        print(json.dumps(summarize(replay(viewer, args.replay)), indent=2, sort_keys=True))
+        return
+    recorder = Recorder(viewer, args.record).start()
+    try:
+        viewer.configure_traits()
+    finally:
+        recorder.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,4 @@
 import numpy as np
-from matplotlib import cm
 from collections import namedtuple
 
 from PySide.QtGui import QPixmap, QImage
@@ -9,18 +8,18 @@ from traits.api import (HasTraits, HasPrivateTraits, Any, Instance,
         Button, Bool)
 from traitsui.api import View, HGroup, Item, EnumEditor, RangeEditor, Group
 
+from .cache import LRUCache
+from .render import colorize, normalize, rgba_to_argb32, scale_stats
 from .slicer import Slicer
+from . import timing
 
 def ndarray_to_pixdata(array, cmap, norm):
-    '''Convert an array to a QPixmap using the given color map
-    and scaling. Returns an array and the pixmap, the array must
-    be held onto as long as the pixmap is around.
+    '''Convert an array to QImage.Format_RGB32 pixel data using the given
+    color map and scaling, see arrview.render.colorize. The returned
+    array must be held onto as long as an image made from it is around.
     '''
     assert array.ndim == 2, 'Only 2D arrays are allowed'
-    h,w = array.shape
-    array = (255*cmap(norm(array).astype('float'))).astype('uint32')
-    array = (255 << 24 | array[:,:,0] << 16 | array[:,:,1] << 8 | array[:,:,2]).flatten()
-    return array
+    return rgba_to_argb32(colorize(array, cmap, norm)).flatten()
 
 def pixdata_to_ndarray(pixmap,h,w):
     assert pixmap.ndim == 1
@@ -39,13 +38,39 @@ class ArrayPixmap(QPixmap):
         super(ArrayPixmap, self).__init__(qpixmap)
         self._array = array
 
+    @property
+    def nbytes(self):
+        '''Approximate memory held by the pixmap and its array'''
+        return self._array.nbytes + 4 * self.width() * self.height()
+
 
 def ndarray_to_arraypixmap(array, cmap, norm=lambda a: Normalize()(a)):
-    data = ndarray_to_pixdata(array, cmap, norm)
-    h,w = array.shape
-    img = QImage(data, w, h, QImage.Format_RGB32)
-    pixmap = QPixmap.fromImage(img)
-    return ArrayPixmap(data, pixmap)
+    with timing.stage('colormap'):
+        data = ndarray_to_pixdata(array, cmap, norm)
+    with timing.stage('pixmap'):
+        h,w = array.shape
+        img = QImage(data, w, h, QImage.Format_RGB32)
+        pixmap = QPixmap.fromImage(img)
+        return ArrayPixmap(data, pixmap)
+
+
+class StatsIndex(object):
+    '''Caches scale_stats results by key so that viewers showing the same
+    array or slice compute its histogram only once'''
+    def __init__(self, max_entries=4096):
+        # Each entry is counted as one byte, bounding the number of entries
+        self._cache = LRUCache(max_entries)
+
+    def stats(self, key, ndarray):
+        '''Returns scale_stats(ndarray), computing it only if key is not cached'''
+        stats = self._cache.get(key)
+        if stats is None:
+            stats = scale_stats(ndarray)
+            self._cache.put(key, stats, nbytes=1)
+        return stats
+
+    def clear(self):
+        self._cache.clear()
 
 
 class Norm(HasTraits):
@@ -74,54 +99,66 @@ class Norm(HasTraits):
         self._scaled = False
 
     def set_scale(self, ndarray):
-        arr = ndarray[np.isfinite(ndarray)]
-        pdf,bins = np.histogram(arr, bins=50)
-        cdf = pdf.cumsum() / float(arr.size)
-        self.vmin = bins[np.argmax(cdf > 0.05)]
-        self.vmax = bins[np.argmin(cdf < 0.95)]
-        self.low,self.high = float(arr.min()), float(arr.max())
-        if self.vmin == self.vmax:
-            self.vmin = self.low
-            self.vmax = self.high
+        with timing.stage('scale'):
+            self.set_stats(scale_stats(ndarray))
+
+    def set_stats(self, stats):
+        '''Set the scale from a (vmin, vmax, low, high) tuple, see scale_stats'''
+        self.vmin, self.vmax, self.low, self.high = stats
         self._scaled = True
 
     def normalize(self, ndarray):
         if not self._scaled:
             self.set_scale(ndarray)
-        
-        vmin, vmax = self.vmin, self.vmax
-        if vmin == vmax:
-            return np.zeros_like(ndarray)
-        else:
-            return np.clip((ndarray - vmin) / (vmax - vmin), 0, 1)
+        return normalize(ndarray, self.vmin, self.vmax)
 
     def __repr__(self):
         return 'Norm(name=%s, vmin=%f, vmax=%f)' % (self.name, self.vmin, self.vmax)
 
 
-_cmaps = [cm.gray,
-          cm.viridis,
-          cm.jet,
-          cm.spectral]
+_cmap_names = ['gray',
+               'viridis',
+               'jet',
+               'spectral']
+
+def _cmaps():
+    '''Colormaps offered by ColorMapper, matplotlib is imported on first use'''
+    from matplotlib import cm
+    return [getattr(cm, name) for name in _cmap_names]
+
 
 class ColorMapper(HasPrivateTraits):
-    cmap = Any(_cmaps[0])
+    cmap = Any
     norm = Instance(Norm, Norm)
     slicer = Instance(Slicer)
     rescale = Button
     autoscale = Bool(True)
+    # Optional StatsIndex, shared between viewers of a Session
+    stats_index = Instance(StatsIndex)
 
-    view = View(
+    def _cmap_default(self):
+        return _cmaps()[0]
+
+    def default_traits_view(self):
+        return View(
             HGroup(
                 Item('cmap', show_label=False,
-                    editor=EnumEditor(values={c:c.name for c in _cmaps})),
+                    editor=EnumEditor(values={c:c.name for c in _cmaps()})),
                 Item('rescale', show_label=False),
                 Item('autoscale')))
 
-    def array_to_pixmap(self, array):
-        if self.autoscale:
+    def scale_to(self, array, key=None):
+        '''Scale the norm to array. If key is given and there is a stats_index,
+        the statistics of array are looked up by key instead of recomputed'''
+        if key is None or self.stats_index is None:
             self.norm.set_scale(array)
+        else:
+            self.norm.set_stats(self.stats_index.stats(key, array))
+
+    def array_to_pixmap(self, array, key=None):
+        if self.autoscale:
+            self.scale_to(array, key)
         return ndarray_to_arraypixmap(array, self.cmap, self.norm.normalize)
 
     def _rescale_fired(self):
-        self.norm.set_scale(self.slicer.arr)
+        self.scale_to(self.slicer.arr, self.slicer.data_key())
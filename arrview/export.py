@@ -0,0 +1,143 @@
+'''Export slices of an array to PNG images without Qt.
+
+Images are rendered with arrview.render, so they match the viewer's
+pixels for the same colormap and window. Slices are read, rendered and
+written in batches on a thread pool; NumPy and zlib release the GIL for
+the heavy lifting, so batches run in parallel without copying the array
+to other processes. Only a few batches are in flight at once, which
+bounds memory for arrays of any size.
+
+Example, every time point of slice 10 of a 4D series:
+>>> vmin, vmax, _, _ = scale_stats(arr[:, :, 10])
+>>> export_slices(arr, dim=3, pattern='qa/frame_{index:03d}.png',
+...               cmap=cm.gray, vmin=vmin, vmax=vmax, point=(0, 0, 10, 0))
+'''
+from collections import deque
+from multiprocessing.pool import ThreadPool
+import logging
+import multiprocessing
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from arrview.render import linear_norm, render
+
+
+log = logging.getLogger(__name__)
+
+# zlib level used for PNG files, low levels are much faster for little size
+_png_level = 3
+
+# Upper bound on the slab of slices rendered by one task
+_default_batch_bytes = 16 * 2**20
+
+
+def _png_chunk(tag, data):
+    crc = zlib.crc32(tag + data) & 0xffffffff
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', crc)
+
+
+def encode_png(rgba, level=_png_level):
+    '''Encode an RGBA uint8 image of shape (h, w, 4) as PNG bytes'''
+    assert rgba.ndim == 3 and rgba.shape[2] == 4, 'rgba must have shape (h, w, 4)'
+    h, w = rgba.shape[:2]
+    # Each row is prefixed with filter type 0 (none)
+    raw = np.zeros((h, 1 + 4 * w), dtype='uint8')
+    raw[:, 1:] = rgba.reshape(h, 4 * w)
+    header = struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), level))
+            + _png_chunk(b'IEND', b''))
+
+
+def write_png(filename, rgba, level=_png_level):
+    with open(filename, 'wb') as f:
+        f.write(encode_png(rgba, level))
+
+
+def slab_index(shape, dim, start, stop, xdim=1, ydim=0, point=None):
+    '''Returns the index of slices [start, stop) along dim and the axis
+    order that puts the result in (slice, y, x) order.
+    Args:
+    dim        -- dimension the slices are taken along
+    xdim, ydim -- view dimensions
+    point      -- (default: all zeros) position in the remaining dimensions
+    '''
+    assert len({dim, xdim, ydim}) == 3, 'dim, xdim and ydim must differ'
+    point = (0,) * len(shape) if point is None else point
+    index = [slice(None) if d in (xdim, ydim) else int(point[d]) for d in range(len(shape))]
+    index[dim] = slice(start, stop)
+    kept = sorted((dim, xdim, ydim))
+    return tuple(index), (kept.index(dim), kept.index(ydim), kept.index(xdim))
+
+
+def _export_batch(arr, dim, start, stop, xdim, ydim, point, cmap, norm, overlays, names):
+    index, axes = slab_index(arr.shape, dim, start, stop, xdim, ydim, point)
+    slab = np.asarray(arr[index]).transpose(axes)
+    masks = [(np.asarray(mask[index]).transpose(axes), color) for mask, color in overlays]
+    images = render(slab, cmap, norm, masks)
+    for name, rgba in zip(names, images):
+        write_png(name, rgba)
+    return len(names)
+
+
+def export_slices(arr, dim, pattern, cmap, vmin, vmax, start=0, stop=None,
+                  xdim=1, ydim=0, point=None, overlays=(), workers=None,
+                  batch_bytes=_default_batch_bytes, progress=None):
+    '''Write the slices [start, stop) of arr along dim to PNG files.
+    Args:
+    arr        -- ndarray, memmap or h5py Dataset with at least 3 dimensions
+    dim        -- dimension to export the slices of, e.g. z or time for a cine
+    pattern    -- file name pattern formatted with the slice index, e.g.
+                  'out/slice_{index:04d}.png'
+    cmap       -- colormap, see arrview.render.colorize
+    vmin, vmax -- display window, as in the viewer's colormap settings
+    start, stop-- (default: all slices) range of slices along dim
+    xdim, ydim -- (default: 1, 0) view dimensions
+    point      -- (default: all zeros) position in the other dimensions
+    overlays   -- (default: ()) sequence of (mask, color) pairs, masks with
+                  the shape of arr and RGBA colors, e.g. ROIs
+    workers    -- (default: number of CPUs) threads rendering and writing
+    batch_bytes-- (default: 16 MB) upper bound on the slab read per task
+    progress   -- (default: None) called as progress(done, total) on the
+                  calling thread as slices are written
+    Returns:
+    list of the file names written
+    '''
+    stop = arr.shape[dim] if stop is None else min(stop, arr.shape[dim])
+    total = max(0, stop - start)
+    names = [pattern.format(index=i) for i in range(start, stop)]
+    dirname = os.path.dirname(pattern)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    workers = workers or multiprocessing.cpu_count()
+    plane_bytes = arr.shape[xdim] * arr.shape[ydim] * (np.dtype(arr.dtype).itemsize + 4)
+    batch = max(1, batch_bytes // plane_bytes)
+    norm = linear_norm(vmin, vmax)
+    log.debug('exporting %d slices in batches of %d on %d threads', total, batch, workers)
+
+    pool = ThreadPool(workers)
+    pending = deque()
+    done = 0
+    try:
+        for lo in range(start, stop, batch):
+            hi = min(stop, lo + batch)
+            args = (arr, dim, lo, hi, xdim, ydim, point, cmap, norm, overlays,
+                    names[lo - start:hi - start])
+            pending.append(pool.apply_async(_export_batch, args))
+            # Bound memory by waiting for the oldest batch once enough are queued
+            while len(pending) >= 2 * workers:
+                done += pending.popleft().get()
+                if progress is not None:
+                    progress(done, total)
+        while pending:
+            done += pending.popleft().get()
+            if progress is not None:
+                progress(done, total)
+    finally:
+        pool.close()
+        pool.join()
+    return names
@@ -0,0 +1,227 @@
+'''ROIs stored as the labels of one shared integer volume.
+
+Segmentations come as label volumes, where voxel value k belongs to region
+k and 0 to none. Importing one creates a LabelROI per label, all of them
+views into a single uint16 LabelVolume instead of a full size bool mask
+each. Statistics of all labels are computed in one bincount pass and
+exporting ROIs to a label volume is a lookup table applied to each volume.
+
+Example:
+>>> rois = import_labels(segmentation, names={1: 'liver', 2: 'spleen'})
+>>> viewer.roi_manager.add_rois(rois)
+>>> np.save('labels.npy', export_labels(viewer.roi_manager.rois, arr.shape))
+'''
+import logging
+
+import numpy as np
+
+from traits.api import Any, Int, Property
+
+from arrview.morphology import bounding_box
+from arrview.roi import ROI
+from arrview.util import grow_array, rep
+
+
+log = logging.getLogger(__name__)
+
+# Labels stored in a uint16 volume, 0 is background
+max_label = 2**16 - 1
+
+
+def label_stats(labels, arr, minlength=0):
+    '''Returns (count, mean, std) arrays of arr indexed by label, computed
+    in one pass over the volume. Labels without voxels have nan statistics.'''
+    labels = np.asarray(labels).ravel()
+    values = np.asarray(arr, dtype=float).ravel()
+    assert labels.size == values.size, 'labels and arr must have the same size'
+    count = np.bincount(labels, minlength=minlength)
+    total = np.bincount(labels, weights=values, minlength=minlength)
+    squares = np.bincount(labels, weights=np.square(values), minlength=minlength)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - np.square(mean), 0))
+    return count, mean, std
+
+
+def _region_key(region):
+    return tuple((s.start, s.stop, s.step) if isinstance(s, slice) else s for s in region)
+
+
+class LabelVolume(object):
+    '''A uint16 array shared by the LabelROIs of its labels. labels is
+    copied unless copy is False and it already is uint16, in which case
+    editing the ROIs edits labels.'''
+    def __init__(self, labels, copy=True):
+        labels = np.asarray(labels)
+        if labels.dtype != bool and not np.issubdtype(labels.dtype, np.integer):
+            raise ValueError('labels must be integers, not %s' % labels.dtype)
+        if labels.size and (labels.min() < 0 or labels.max() > max_label):
+            raise ValueError('labels must be between 0 and %d' % max_label)
+        self.labels = labels.astype(np.uint16, copy=copy)
+        self._base = None
+        self.rois = {}
+        self._stats = None
+        self._present = None
+        # Bounding boxes by label, computed when first asked for
+        self._bounds = {}
+
+    @property
+    def shape(self):
+        return self.labels.shape
+
+    @property
+    def nbytes(self):
+        return self.labels.nbytes
+
+    def resize(self, shape):
+        '''Grow the volume to shape, new voxels are background'''
+        if self.labels.shape != tuple(shape):
+            self._base, self.labels = grow_array(self.labels, shape, self._base)
+            self._stats = None
+            self._present = None
+            self._bounds = {}
+
+    def present(self, region=()):
+        '''Returns a bool array, indexed by label, of the labels found in region'''
+        key = _region_key(region)
+        if self._present is None or self._present[0] != key:
+            counts = np.bincount(self.labels[region].ravel(), minlength=max_label + 1)
+            self._present = (key, counts > 0)
+        return self._present[1]
+
+    def stats(self, arr, label):
+        '''Returns (size, mean, std) of arr inside label, the statistics of
+        all labels are computed together and kept until invalidated'''
+        if self._stats is None or self._stats[0] is not arr:
+            self._stats = (arr, label_stats(self.labels, arr, minlength=max_label + 1))
+        count, mean, std = self._stats[1]
+        return int(count[label]), mean[label], std[label]
+
+    def invalidate_stats(self):
+        self._stats = None
+
+    def bounds(self, label):
+        '''Returns the tuple of slices bounding label, None if it has no voxels.
+        Kept until the label is assigned to.'''
+        if label not in self._bounds:
+            self._bounds[label] = bounding_box(self.labels == label)
+        return self._bounds[label]
+
+    def assign(self, label, index, mask):
+        '''Set label where mask is True and clear it where it is False in
+        the part index of the volume. Voxels of other labels under mask
+        are taken over, returns the LabelROIs that lost voxels.'''
+        region = self.labels[tuple(index)]
+        taken = np.unique(region[mask & (region != label) & (region != 0)])
+        region[mask] = label
+        region[~mask & (region == label)] = 0
+        self._stats = None
+        self._present = None
+        for l in [label] + list(taken):
+            self._bounds.pop(l, None)
+        return [self.rois[l] for l in taken if l in self.rois]
+
+    def __repr__(self):
+        return rep(self, ['shape', 'nbytes'])
+
+
+class LabelROI(ROI):
+    '''An ROI whose mask is the voxels of label in a shared LabelVolume.
+    The mask is computed when read and never stored.'''
+    volume = Any
+    label = Int
+    mask = Property
+
+    def _get_mask(self):
+        return self.volume.labels == self.label
+
+    def _set_mask(self, mask):
+        self._assign((), mask)
+
+    @property
+    def mask_shape(self):
+        return self.volume.shape
+
+    def resize(self, shape):
+        self.volume.resize(shape)
+
+    def mask_view(self, index):
+        return self.volume.labels[tuple(index)] == self.label
+
+    def bounds(self):
+        return self.volume.bounds(self.label)
+
+    def add_region(self, index, mask):
+        self._assign(index, mask | self.mask_view(index))
+
+    def set_region(self, index, mask):
+        self._assign(index, mask)
+
+    def set_mask(self, mask, slc):
+        if slc.is_transposed:
+            mask = mask.T
+        self._assign(slc.view_slice, mask)
+
+    def _assign(self, index, mask):
+        taken = self.volume.assign(self.label, index, np.asarray(mask, dtype=bool))
+        self.updated = True
+        for roi in taken:
+            roi.updated = True
+
+    def data_changed(self, region):
+        if not self.volume.present(region)[self.label]:
+            return False
+        self.volume.invalidate_stats()
+        return True
+
+    def stats(self, arr):
+        return self.volume.stats(arr, self.label)
+
+    @property
+    def nbytes(self):
+        return 0
+
+    def __repr__(self):
+        return rep(self, ['name', 'label'])
+
+
+def import_labels(labels, names=None, copy=True):
+    '''Returns a LabelROI for every label found in labels, an integer array
+    with labels from 1 to 65535 and 0 as background. All ROIs share one
+    uint16 copy of labels. Raises ValueError for other arrays.
+    Args:
+    labels -- integer array, with the shape of the viewed array
+    names  -- (default: None) dict of label to ROI name, label_<k> otherwise
+    copy   -- (default: True) with False a uint16 labels is shared instead
+              of copied, so edits to the ROIs are written to it
+    '''
+    names = {} if names is None else names
+    volume = LabelVolume(labels, copy=copy)
+    found = np.flatnonzero(volume.present())
+    rois = [LabelROI(name=names.get(label, 'label_%d' % label), volume=volume, label=label)
+            for label in found if label != 0]
+    volume.rois = dict((roi.label, roi) for roi in rois)
+    log.debug('imported %d labels', len(rois))
+    return rois
+
+
+def export_labels(rois, shape):
+    '''Returns a uint16 label volume with ROI i of rois labeled i + 1.
+    LabelROIs are relabeled with one lookup per shared volume, other ROIs
+    are then written by their masks and win where they overlap.'''
+    rois = list(rois)
+    assert len(rois) <= max_label, 'at most %d ROIs fit in a label volume' % max_label
+    out = np.zeros(shape, dtype=np.uint16)
+    volumes = {}
+    for i, roi in enumerate(rois, start=1):
+        if isinstance(roi, LabelROI):
+            volume, lut = volumes.setdefault(
+                id(roi.volume), (roi.volume, np.zeros(max_label + 1, dtype=np.uint16)))
+            lut[roi.label] = i
+    for volume, lut in volumes.itervalues():
+        relabeled = lut[volume.labels]
+        np.copyto(out, relabeled, where=relabeled > 0)
+    for i, roi in enumerate(rois, start=1):
+        if not isinstance(roi, LabelROI):
+            out[roi.mask] = i
+    return out
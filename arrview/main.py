@@ -2,18 +2,27 @@ import os
 import csv
 import logging
 
+import numpy as np
+
+from PySide.QtCore import QTimer
 from traits.api import *
 from traitsui.api import *
 from traitsui.key_bindings import KeyBinding, KeyBindings
 
+from arrview import morphology, profiling, segment, timing, watchdog
 from arrview.colormapper import ColorMapper
+from arrview.export import export_slices
 from arrview.file_dialog import qt_open_file, qt_save_file
-from arrview.roi import ROIManager
+from arrview.labels import export_labels, import_labels
+from arrview.roi import MaskView, ROIManager
 from arrview.roi_persistence import load_rois, store_rois
 from arrview.slicer import Slicer
+from arrview.streaming import StreamingArray
 from arrview.tools import *
+from arrview.ui.curveeditor import CurveEditor
 from arrview.ui.dimeditor import SlicerDims
 from arrview.ui.slicereditor import PixmapEditor
+from arrview.updates import UpdateCoalescer
 
 
 log = logging.getLogger(__name__)
@@ -34,25 +43,44 @@ class ArrayViewer(HasTraits):
     pixmap = Property(depends_on=['bottomPanel.cmap.+',
         'bottomPanel.cmap.norm.+', 'slicer.view'])
     bottomPanel = Instance(BottomPanel)
-    mode = Enum('pan', 'draw', 'erase')
+    mode = Enum('pan', 'draw', 'erase', 'grow')
     roi_size = Range(0, 30, 3)
+    # Region growing includes values within this fraction of the window width
+    grow_tolerance = Range(0.0, 1.0, 0.1)
+    # Search the current slice or the volume through it along the free dimension
+    grow_scope = Enum('slice', 'volume')
+    threshold = Button('Threshold Window')
+    # Elements the selected ROIs grow or shrink by
+    morph_size = Range(1, 10, 1)
+    dilate = Button('Dilate')
+    erode = Button('Erode')
+    fill_holes = Button('Fill Holes')
+    interpolate = Button('Interpolate')
     roi_manager = Instance(ROIManager)
 
     cursorInfo = Str
     colormapInfo = Str
+    # (values, index) along the free dimension through the voxel under the cursor
+    probe = Any
+    # Rolling render stage percentiles, shown while timing is enabled
+    timingInfo = Str
+    profileInfo = Str
 
     toolSet = Instance(ToolSet)
 
-    def __init__(self, slicer, roi_filename=None, title=None, rois_updated=None):
+    def __init__(self, slicer, roi_filename=None, title=None, rois_updated=None, session=None):
         '''Initialize ArrayViewer from a slicer and optional roi file
         Args:
             slice        -- Slice object that holds array and currently viewed slice
             roi_filename -- Filename for read/writing ROIs to
             title        -- (default: Array Viewer) Title of the window
             rois_updated -- (default: None) Callback function, called when ROIs have changed
+            session      -- (default: None) arrview.session.Session shared with other
+                            viewers for rendered slices and statistics
         '''
         super(ArrayViewer, self).__init__()
         self._title = 'Array Viewer' if title is None else title
+        self._session = session
         self.slicer = slicer
         slicerDims = SlicerDims(self.slicer)
         self.roi_manager = ROIManager(
@@ -60,8 +88,10 @@ class ArrayViewer(HasTraits):
                 slicerDims=slicerDims)
         self.bottomPanel = BottomPanel(
                 slicerDims=slicerDims,
-                cmap=ColorMapper(slicer=self.slicer))
-        self.bottomPanel.cmap.norm.set_scale(slicer.arr)
+                cmap=ColorMapper(
+                    slicer=self.slicer,
+                    stats_index=session.stats if session is not None else None))
+        self.bottomPanel.cmap.scale_to(slicer.arr, slicer.data_key())
         self._rois_updated = rois_updated if rois_updated is not None else lambda x:x
 
         if roi_filename is None:
@@ -84,21 +114,113 @@ class ArrayViewer(HasTraits):
                 slicer=self.slicer,
                 colorMapper=self.bottomPanel.cmap,
                 callback=self.update_colormapinfo),
+            ProbeTool(
+                slicer=self.slicer,
+                dim=self.free_dim,
+                callback=self.update_probe),
             PanTool(button='middle'),
             ZoomTool()]
 
+        # One ROI tool serves every mode so its display items survive mode changes
+        self._roiTool = ROITool(factory=self, roi_manager=self.roi_manager)
         self._factoryMap = {
-            'pan': [PanTool(button='left'), ROITool(factory=self, roi_manager=self.roi_manager)],
-            'draw': [ROITool(factory=self, roi_manager=self.roi_manager, mode='draw')],
-            'erase': [ROITool(factory=self, roi_manager=self.roi_manager, mode='erase')]
+            'pan': [PanTool(button='left'), self._roiTool],
+            'draw': [self._roiTool],
+            'erase': [self._roiTool],
+            'grow': [
+                RegionTool(
+                    slicer=self.slicer,
+                    roi_manager=self.roi_manager,
+                    index=self.segment_index,
+                    tolerance=self.grow_tolerance_value),
+                self._roiTool]
             }
+        self._roiModes = {'pan': 'view', 'draw': 'draw', 'erase': 'erase', 'grow': 'view'}
 
         self.toolSet = ToolSet()
         self.mode_changed()
+        self._updates = UpdateCoalescer(self.slicer.update, lambda: self.slicer.shape)
+        if isinstance(self.slicer.arr, StreamingArray):
+            self.slicer.arr.add_listener(self._frames_appended)
+        self._timingTimer = QTimer()
+        self._timingTimer.setInterval(500)
+        self._timingTimer.timeout.connect(self.update_timinginfo)
+        if timing.is_enabled():
+            self._timingTimer.start()
+        self._watchdog = watchdog.install(self)
+        self._profiler = profiling.Profiler(
+            profiling.directory_from_environment(), state=profiling.viewer_state(self))
+        if profiling.directory_from_environment() is not None:
+            self.add_tool(profiling.ProfileTool(profiler=self._profiler))
+
+    def dispose(self):
+        '''Stop the timers and threads of the viewer, called when its window closes'''
+        watchdog.uninstall(self)
+        self._watchdog = None
+        self._timingTimer.stop()
+        if self._profiler.running:
+            self._profiler.stop()
+
+    def toggle_profiling(self):
+        '''Start or stop profiling, returns the saved profile when stopping'''
+        filename = self._profiler.toggle()
+        self.profileInfo = 'profiling' if self._profiler.running else ''
+        return filename
+
+    def toggle_timing(self):
+        '''Turn render stage timing and its status bar display on or off'''
+        timing.enable(not timing.is_enabled())
+        if timing.is_enabled():
+            timing.reset()
+            self._timingTimer.start()
+        else:
+            self._timingTimer.stop()
+            self.timingInfo = ''
+
+    def update_timinginfo(self):
+        self.timingInfo = timing.summary()
+
+    def _frames_appended(self, start, stop, shifted):
+        if shifted:
+            self._updates.push()
+        else:
+            region = [slice(None)] * self.slicer.ndim
+            region[self.slicer.arr.axis] = slice(start, stop)
+            self._updates.push(region=tuple(region), appended=True)
+
+    def update(self, arr=None, region=None):
+        '''Notify the viewer that the array has changed, may be called from
+        any thread. Updates are coalesced and applied at most once per
+        display frame; the displayed slice is only re-rendered if it
+        overlaps the changed region.
+        Args:
+            arr    -- (default: None) replacement array of the same shape
+            region -- (default: None) index (tuple of ints and slices) of the
+                      changed part of the array, None if everything changed
+        '''
+        self._updates.push(arr=arr, region=region)
+
+    @property
+    def session(self):
+        return self._session
+
+    def roi_overlays(self):
+        '''Returns (roi name, nbytes) of the ROI overlay pixmaps'''
+        return self._roiTool.overlays()
+
+    def add_tool(self, factory):
+        '''Add a tool that is active in every mode'''
+        self._defaultFactories.append(factory)
+        self.mode_changed()
+
+    def remove_tool(self, factory):
+        self._defaultFactories.remove(factory)
+        self.mode_changed()
 
     @on_trait_change('mode')
     def mode_changed(self):
         log.debug('mode changed to %r', self.mode)
+        self._roiTool.mode = self._roiModes[self.mode]
         self.toolSet.factories = self._defaultFactories + self._factoryMap[self.mode]
 
     def update_cursorinfo(self, msg):
@@ -107,6 +229,74 @@ class ArrayViewer(HasTraits):
     def update_colormapinfo(self, msg):
         self.colormapInfo = msg
 
+    def free_dim(self):
+        '''Returns the free dimension selected in the dimension editor, or None'''
+        dim = self.bottomPanel.slicerDims.freedim.dim
+        return dim if dim in self.slicer.slc.freedims else None
+
+    def segment_index(self):
+        '''Returns the part of the array searched by region growing and
+        thresholding, see grow_scope'''
+        index = self.slicer.slc.view_slice
+        dim = self.free_dim()
+        if self.grow_scope == 'volume' and dim is not None:
+            index[dim] = slice(None)
+        return tuple(index)
+
+    def grow_tolerance_value(self):
+        norm = self.bottomPanel.cmap.norm
+        return self.grow_tolerance * (norm.vmax - norm.vmin)
+
+    def _threshold_fired(self):
+        norm = self.bottomPanel.cmap.norm
+        region, mask = segment.threshold(self.slicer.arr, norm.vmin, norm.vmax, self.segment_index())
+        self.roi_manager.add_region(region, mask)
+
+    def morphology_dims(self):
+        '''Returns the view dimensions and the free dimension, if any'''
+        dim = self.free_dim()
+        return list(self.slicer.slc.viewdims) + ([] if dim is None else [dim])
+
+    def _dilate_fired(self):
+        self.roi_manager.apply_morphology(
+            morphology.dilate, n=self.morph_size, dims=self.morphology_dims())
+
+    def _erode_fired(self):
+        self.roi_manager.apply_morphology(
+            morphology.erode, n=self.morph_size, dims=self.morphology_dims())
+
+    def _fill_holes_fired(self):
+        self.roi_manager.apply_morphology(
+            morphology.fill_holes, dims=list(self.slicer.slc.viewdims))
+
+    def _interpolate_fired(self):
+        dim = self.free_dim()
+        if dim is None:
+            log.debug('interpolation needs a free dimension')
+            return
+        self.roi_manager.apply_morphology(
+            morphology.interpolate, dim=dim, dims=list(self.slicer.slc.viewdims))
+
+    def update_probe(self, values, index):
+        self.probe = None if values is None else (values, index)
+
+    def export_slices(self, pattern, progress=None):
+        '''Write every slice along the free dimension to PNG files with the
+        current colormap, window and visible ROIs, see arrview.export.
+        The other dimensions stay at the currently viewed position.'''
+        dim = self.free_dim()
+        assert dim is not None, 'the array has no free dimension to export'
+        cmap = self.bottomPanel.cmap
+        slc = self.slicer.slc
+        point = [0 if d in slc.viewdims else slc[d] for d in range(self.slicer.ndim)]
+        # ROIs drawn with the viewer's unselected ROI opacity
+        overlays = [(MaskView(roi), roi.color.getRgb()[:3] + (102,))
+                    for roi in self.roi_manager.rois if roi.visible]
+        return export_slices(self.slicer.arr, dim, pattern, cmap.cmap,
+                             cmap.norm.vmin, cmap.norm.vmax,
+                             xdim=slc.xdim, ydim=slc.ydim, point=point,
+                             overlays=overlays, progress=progress)
+
     def default_traits_view(self):
         return View(
             VSplit(
@@ -120,13 +310,29 @@ class ArrayViewer(HasTraits):
                             Item('mode', style='custom',springy=False),
                             show_labels=False),
                         Item('roi_size', enabled_when='mode in ["draw", "erase"]'),
+                        HGroup(
+                            Item('grow_scope', style='custom'),
+                            Item('threshold'),
+                            show_labels=False),
+                        Item('grow_tolerance', enabled_when='mode == "grow"'),
+                        HGroup(
+                            Item('morph_size'),
+                            Item('dilate'),
+                            Item('erode'),
+                            Item('fill_holes'),
+                            Item('interpolate'),
+                            show_labels=False,
+                            enabled_when='roi_manager.selection and not roi_manager.busy'),
                         Item('roi_manager', style='custom'),
+                        Item('probe', editor=CurveEditor()),
                         show_labels=False)),
                 Item('bottomPanel', style='custom', show_label=False,
                     height=1)),
             statusbar = [
                 StatusItem(name='cursorInfo'),
-                StatusItem(name='colormapInfo')],
+                StatusItem(name='colormapInfo'),
+                StatusItem(name='timingInfo'),
+                StatusItem(name='profileInfo')],
             menubar = MenuBar(
                 Menu(
                     Action(name='Quit', action='_quit'),
@@ -134,10 +340,19 @@ class ArrayViewer(HasTraits):
                 Menu(
                     Action(name='Save', action='_save_rois'),
                     Action(name='Load', action='_load_rois'),
+                    Action(name='Import Labels', action='_import_labels'),
                     Menu(
                         Action(name='As CSV', action='_export_csv'),
+                        Action(name='As Labels', action='_export_labels'),
                         name='Export'),
-                    name='ROI')),
+                    name='ROI'),
+                Menu(
+                    Action(name='Export Slices as PNG', action='_export_slices'),
+                    name='Image'),
+                Menu(
+                    Action(name='Memory Usage', action='_show_memory'),
+                    Action(name='Start/Stop Profiling', action='toggle_profiling'),
+                    name='Tools')),
             resizable=True,
             title=self._title,
             key_bindings=KeyBindings(
@@ -150,6 +365,12 @@ class ArrayViewer(HasTraits):
                 KeyBinding(binding1='A',
                     description='Decrement free dimension',
                     method_name='free_dim_decrement'),
+                KeyBinding(binding1='T',
+                    description='Toggle render timing',
+                    method_name='toggle_timing'),
+                KeyBinding(binding1='P',
+                    description='Start or stop profiling',
+                    method_name='toggle_profiling'),
                 *[KeyBinding(binding1=str(i),
                              description='Select ROI {}'.format(i),
                              method_name='select_roi_{}'.format(i))
@@ -159,6 +380,8 @@ class ArrayViewer(HasTraits):
 
     @cached_property
     def _get_pixmap(self):
+        if self._session is not None:
+            return self._session.render(self.slicer, self.bottomPanel.cmap)
         return self.bottomPanel.cmap.array_to_pixmap(self.slicer.view)
 
 
@@ -170,6 +393,9 @@ class ArrayViewerHandler(Handler):
         log.debug('closing window')
         self.close(info, is_ok=True)
 
+    def closed(self, info, is_ok):
+        info.object.dispose()
+
     def _save_rois(self, info):
         filename = qt_save_file(file_name=self.roi_file, filters='ROI (*.h5)')
         if filename:
@@ -204,6 +430,61 @@ class ArrayViewerHandler(Handler):
                 wr.writerow((rv.roi.name, rv.mean, rv.std, rv.size))
         log.debug('finished export to csv %r', file_name)
 
+    def _import_labels(self, info):
+        """Adds an ROI for each label of an integer label volume"""
+        filename = qt_open_file(file_name=self.roi_file, filters='Labels (*.npy)')
+        if filename:
+            from pyface.api import error
+            labels = np.load(filename)
+            shape = info.object.slicer.shape
+            if labels.shape != shape:
+                error(info.ui.control, 'The label volume has shape %r, the array %r.'
+                      % (labels.shape, shape), title='Import Labels')
+                return
+            try:
+                # labels was just read from the file, no need to copy it
+                rois = import_labels(labels, copy=False)
+            except ValueError as e:
+                error(info.ui.control, 'Cannot import %s: %s.' % (filename, e),
+                      title='Import Labels')
+                return
+            info.object.roi_manager.add_rois(rois)
+
+    def _export_labels(self, info):
+        """Exports the ROIs to a uint16 label volume, ROI i has label i"""
+        file_name = qt_save_file(file_name=self._get_export_file_name('npy'), filters='Labels (*.npy)')
+        if not file_name:
+            return
+        self.export_file = file_name
+        np.save(file_name, export_labels(info.object.roi_manager.rois, info.object.slicer.shape))
+        log.debug('finished export to labels %r', file_name)
+
+    def _export_slices(self, info):
+        """Exports every slice along the free dimension as PNG images"""
+        from pyface.api import ProgressDialog, information
+        dim = info.object.free_dim()
+        if dim is None:
+            information(info.ui.control, 'Slices are exported along the free dimension, '
+                        'the array has none.', title='Export Slices')
+            return
+        file_name = qt_save_file(file_name=self._get_export_file_name('png'), filters='PNG (*.png)')
+        if not file_name:
+            return
+        self.export_file = file_name
+        pattern = os.path.splitext(file_name)[0] + '_{index:04d}.png'
+        dialog = ProgressDialog(title='Export', message='Exporting slices',
+                                max=info.object.slicer.shape[dim])
+        dialog.open()
+        try:
+            info.object.export_slices(pattern, progress=lambda done, total: dialog.update(done))
+        finally:
+            dialog.close()
+        log.debug('finished export to %r', pattern)
+
+    def _show_memory(self, info):
+        from arrview.ui.memorydialog import MemoryDialog
+        MemoryDialog(info.object).edit_traits()
+
     def escape_pressed(self, info):
         """Prevent escape key from closing the window"""
         log.debug('ignoring escape key, prevents window from closing')
@@ -214,6 +495,14 @@ class ArrayViewerHandler(Handler):
     def free_dim_decrement(self, info):
         info.object.bottomPanel.slicerDims.freedim.dec()
 
+    def toggle_timing(self, info):
+        info.object.toggle_timing()
+
+    def toggle_profiling(self, info):
+        filename = info.object.toggle_profiling()
+        if filename:
+            info.object.profileInfo = 'profile saved to %s' % filename
+
     def select_roi_1(self, info):
         self.select_roi_by_index(info, 1)
 
@@ -245,12 +534,55 @@ class ArrayViewerHandler(Handler):
         info.object.roi_manager.select_roi_by_index(idx)
 
 
-def view(arr, roi_filename=None, rois_updated=None, title=None):
-    viewer = ArrayViewer(Slicer(arr),
+def _start_event_loop():
+    '''Ensure a QApplication exists and, inside IPython, that its event loop
+    is integrated with the prompt so the window stays responsive'''
+    from PySide.QtGui import QApplication
+    app = QApplication.instance() or QApplication([])
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return app
+    ip = get_ipython()
+    if ip is not None:
+        ip.enable_gui('qt4')
+    return app
+
+
+def view(arr, roi_filename=None, rois_updated=None, title=None, reorder_budget=0,
+         xdim=1, ydim=0, block=True, process=False):
+    '''Open arr in an ArrayViewer window.
+    Args:
+        reorder_budget -- (default: 0) bytes allowed for a background copy of arr
+                          reordered for the chosen view dims, 0 disables it.
+                          See Slicer for details.
+        xdim, ydim     -- (default: 1, 0) initial view dimensions
+        block          -- (default: True) run the event loop until the window is
+                          closed. With block=False the window is shown and the
+                          viewer returned immediately, call viewer.update() to
+                          display changes to arr. Outside of IPython the caller
+                          is responsible for running the Qt event loop.
+        process        -- (default: False) run the viewer in a separate process
+                          that maps arr instead of copying it and return an
+                          arrview.process.ViewerProcess, see that module.
+    '''
+    if process:
+        from arrview.process import ViewerProcess
+        viewer = ViewerProcess(arr, roi_filename=roi_filename, title=title,
+                               rois_updated=rois_updated, xdim=xdim, ydim=ydim,
+                               reorder_budget=reorder_budget).start()
+        if block:
+            viewer.join()
+        return viewer
+    viewer = ArrayViewer(Slicer(arr, xdim=xdim, ydim=ydim, reorder_budget=reorder_budget),
                          roi_filename=roi_filename,
                          title=title,
                          rois_updated=rois_updated)
-    viewer.configure_traits()
+    if block:
+        viewer.configure_traits()
+    else:
+        _start_event_loop()
+        viewer.edit_traits()
     return viewer
 
 
@@ -0,0 +1,67 @@
+'''Accounting of the memory held by a viewer.
+
+memory_report lists the bytes held by the array, each ROI mask, the ROI
+overlay pixmaps and the caches. All caches of all viewers evict against
+arrview.cache.global_budget, see set_cache_budget.
+'''
+from collections import namedtuple
+
+import numpy as np
+
+from arrview.cache import global_budget
+from arrview.streaming import StreamingArray
+
+
+MemoryItem = namedtuple('MemoryItem', ['category', 'name', 'nbytes'])
+
+
+def array_item(arr):
+    '''The array counts only if it is held in memory, memmapped and
+    HDF5 arrays are read on demand and reported with 0 bytes'''
+    shape = tuple(arr.shape)
+    if isinstance(arr, np.memmap):
+        return MemoryItem('array', 'memory-mapped %s' % (shape,), 0)
+    if isinstance(arr, (np.ndarray, StreamingArray)):
+        return MemoryItem('array', 'in memory %s' % (shape,), arr.nbytes)
+    return MemoryItem('array', 'read on demand %s' % (shape,), 0)
+
+
+def _label_volumes(rois):
+    '''Returns the distinct LabelVolumes behind the LabelROIs in rois'''
+    volumes = {}
+    for roi in rois:
+        volume = getattr(roi, 'volume', None)
+        if volume is not None:
+            volumes[id(volume)] = volume
+    return volumes.values()
+
+
+def memory_report(viewer):
+    '''Returns a list of MemoryItem for viewer, an ArrayViewer'''
+    items = [array_item(viewer.slicer.arr)]
+    items += [MemoryItem('roi mask', roi.name, roi.nbytes)
+              for roi in viewer.roi_manager.rois]
+    items += [MemoryItem('label volume', '%d labels' % len(volume.rois), volume.nbytes)
+              for volume in _label_volumes(viewer.roi_manager.rois)]
+    items += [MemoryItem('roi overlay', name, nbytes)
+              for name, nbytes in viewer.roi_overlays()]
+    items += [MemoryItem('slicer', name, nbytes)
+              for name, nbytes in viewer.slicer.memory_usage()]
+    if viewer.session is not None:
+        items += [MemoryItem('session', name, nbytes)
+                  for name, nbytes in viewer.session.memory_usage()]
+    return items
+
+
+def total_bytes(items):
+    return sum(item.nbytes for item in items)
+
+
+def cache_budget():
+    '''Returns (max_bytes, nbytes) of the budget shared by all caches'''
+    return global_budget.max_bytes, global_budget.nbytes
+
+
+def set_cache_budget(max_bytes):
+    '''Set the bytes all caches together may hold, evicting if needed'''
+    global_budget.set_max_bytes(max_bytes)
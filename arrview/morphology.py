@@ -0,0 +1,145 @@
+'''Morphological operations on ROI masks across slices.
+
+Each operation takes a full size bool mask and returns (region, mask),
+where region is a tuple of slices into the full mask and mask the new
+contents of mask[region], or (None, None) if the mask is empty. Work is
+limited to the bounding box of the mask, grown by what the operation can
+reach, so the cost depends on the size of the ROI and not of the array.
+apply runs an operation on only the part of a mask around its bounding
+box. Use ROIManager.apply_morphology to run them on the selected ROIs on
+a worker thread.
+
+dims restricts an operation to some dimensions, e.g. the three spatial
+dimensions of a 4D series. Elements are connected through faces.
+
+scipy.ndimage is imported on first use to keep it out of the viewer's
+start up.
+'''
+import logging
+
+import numpy as np
+
+
+log = logging.getLogger(__name__)
+
+
+def bounding_box(mask, pad=0, dims=None):
+    '''Returns the tuple of slices bounding the True elements of mask,
+    grown by pad along dims (default: all) and clipped to mask, or None
+    if mask is empty'''
+    dims = range(mask.ndim) if dims is None else dims
+    box = []
+    for axis in range(mask.ndim):
+        other = tuple(a for a in range(mask.ndim) if a != axis)
+        hits = np.flatnonzero(mask.any(axis=other))
+        if len(hits) == 0:
+            return None
+        grow = pad if axis in dims else 0
+        box.append(slice(max(0, hits[0] - grow), min(mask.shape[axis], hits[-1] + 1 + grow)))
+    return tuple(box)
+
+
+def _structure(ndim, dims):
+    '''Face connectivity along dims only'''
+    structure = np.zeros((3,) * ndim, dtype=bool)
+    center = (1,) * ndim
+    structure[center] = True
+    for axis in dims:
+        for side in (0, 2):
+            index = list(center)
+            index[axis] = side
+            structure[tuple(index)] = True
+    return structure
+
+
+def dilate(mask, n=1, dims=None):
+    '''Grow mask by n elements along dims'''
+    from scipy import ndimage
+    dims = range(mask.ndim) if dims is None else dims
+    region = bounding_box(mask, pad=n, dims=dims)
+    if region is None or n < 1:
+        return None, None
+    out = ndimage.binary_dilation(mask[region], _structure(mask.ndim, dims), iterations=n)
+    return region, out
+
+
+def erode(mask, n=1, dims=None):
+    '''Shrink mask by n elements along dims, elements outside the array
+    count as background'''
+    from scipy import ndimage
+    dims = range(mask.ndim) if dims is None else dims
+    region = bounding_box(mask, pad=1, dims=dims)
+    if region is None or n < 1:
+        return None, None
+    out = ndimage.binary_erosion(mask[region], _structure(mask.ndim, dims), iterations=n)
+    return region, out
+
+
+def fill_holes(mask, dims=None):
+    '''Fill the background enclosed by mask. With dims the view dimensions,
+    holes are filled in each slice separately.'''
+    from scipy import ndimage
+    dims = range(mask.ndim) if dims is None else dims
+    region = bounding_box(mask, pad=1, dims=dims)
+    if region is None:
+        return None, None
+    out = ndimage.binary_fill_holes(mask[region], _structure(mask.ndim, dims))
+    return region, out
+
+
+def _signed_distance(mask):
+    '''Distance to the mask boundary, negative inside'''
+    from scipy import ndimage
+    return ndimage.distance_transform_edt(~mask) - ndimage.distance_transform_edt(mask)
+
+
+def interpolate(mask, dim, dims=None):
+    '''Fill the slices along dim between each pair of consecutive drawn
+    (non-empty) slices by linearly interpolating their signed distance
+    maps, slices that are drawn are kept. dims (default: all but dim) are
+    the dimensions of a slice, the others are interpolated separately.'''
+    dims = [d for d in range(mask.ndim) if d != dim] if dims is None else \
+        [d for d in dims if d != dim]
+    region = bounding_box(mask, pad=1, dims=dims)
+    if region is None:
+        return None, None
+    # Slices along dim first, then any dimension that is neither dim nor in dims
+    others = [d for d in range(mask.ndim) if d != dim and d not in dims]
+    order = [dim] + others + dims
+    sub = mask[region].transpose(order)
+    out = sub.copy()
+    stack = sub.reshape(sub.shape[:1 + len(others)] + (-1,))
+    for other in np.ndindex(*sub.shape[1:1 + len(others)]):
+        lines = stack[(slice(None),) + other]
+        drawn = np.flatnonzero(lines.any(axis=1))
+        for start, stop in zip(drawn[:-1], drawn[1:]):
+            if stop - start < 2:
+                continue
+            first = _signed_distance(sub[(start,) + other])
+            last = _signed_distance(sub[(stop,) + other])
+            t = (np.arange(start + 1, stop) - start) / float(stop - start)
+            t = t.reshape((-1,) + (1,) * first.ndim)
+            out[(slice(start + 1, stop),) + other] = (1 - t) * first + t * last < 0
+    return region, out.transpose(np.argsort(order))
+
+
+def apply(op, mask_view, bounds, shape, **params):
+    '''Run op with params on the part of a mask around bounds, the slices
+    bounding its True elements, without reading the rest of the mask.
+    Args:
+    op        -- one of the operations of this module
+    mask_view -- returns the part index of the mask, see ROI.mask_view
+    bounds    -- bounding box of the mask, see ROI.bounds, None if empty
+    shape     -- shape of the full mask
+    Returns:
+    (region, mask) as op, with region in the coordinates of the full mask
+    '''
+    if bounds is None:
+        return None, None
+    pad = params.get('n', 1) if op is dilate else 1
+    box = tuple(slice(max(0, b.start - pad), min(n, b.stop + pad))
+                for b, n in zip(bounds, shape))
+    region, mask = op(mask_view(box), **params)
+    if region is None:
+        return None, None
+    return tuple(slice(b.start + r.start, b.start + r.stop) for b, r in zip(box, region)), mask
@@ -0,0 +1,57 @@
+import logging
+
+import numpy as np
+
+from arrview.cache import LRUCache, global_budget
+from arrview.source import ChunkedReader
+from arrview.util import rep
+
+
+log = logging.getLogger(__name__)
+
+# Upper bound on the columns kept in memory per ColumnProbe
+_default_cache_bytes = 4 * 2**20
+
+
+class ColumnProbe(object):
+    '''Reads and caches 1D columns of an array source, e.g. the time curve
+    of one voxel of 4D data.
+
+    A column is read with integer indices in every other dimension, a
+    single strided read for ndarrays and memmaps. Chunked sources are read
+    directly instead of through the ChunkedReader, so hovering never pulls
+    whole chunks into its cache.
+    '''
+    def __init__(self, source, max_bytes=_default_cache_bytes):
+        self._source = source
+        self._cache = LRUCache(max_bytes, budget=global_budget, name='columns')
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def column(self, point, dim, data_key=None):
+        '''Returns the values along dim through point.
+        Args:
+        point    -- index of one element, its value along dim is ignored
+        dim      -- dimension to read along
+        data_key -- (default: None) key identifying the source data version,
+                    see Slicer.data_key. Cached columns from other keys are unused.
+        '''
+        point = tuple(int(p) for p in point)
+        key = (data_key, dim, point[:dim] + point[dim + 1:])
+        values = self._cache.get(key)
+        if values is None:
+            source = self._source
+            if isinstance(source, ChunkedReader):
+                source = source.source
+            index = point[:dim] + (slice(None),) + point[dim + 1:]
+            values = np.array(source[index])
+            self._cache.put(key, values)
+        return values
+
+    def clear(self):
+        self._cache.clear()
+
+    def __repr__(self):
+        return rep(self, ['cache'])
@@ -0,0 +1,243 @@
+'''Run the viewer in a separate process.
+
+The GUI process maps the array instead of receiving a pickled copy, so the
+calling process keeps its cores and its GIL while arrays of any size are
+viewed. ROIs and rois_updated notifications are sent back over a pipe.
+
+Arrays created with shared_array (or any memmap opened directly from a
+file) are mapped by filename, so changes made by the calling process are
+visible to the viewer and can be displayed with ViewerProcess.update.
+On POSIX other arrays are inherited by forking, which does not copy them
+either, but later changes to them are not seen by the viewer. A process
+that already runs a QApplication is not forked, as the child would inherit
+it. The viewer is spawned instead, so only memmaps can be viewed from
+there, or refused where spawning is not available (Python 2).
+'''
+from collections import namedtuple
+import atexit
+import logging
+import mmap
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+from arrview.util import bounds_to_slices, region_bounds
+
+
+log = logging.getLogger(__name__)
+
+# Interval at which the viewer process polls for commands
+_poll_ms = 20
+
+RemoteROI = namedtuple('RemoteROI', ['name', 'color', 'mask'])
+
+
+def _remove_file(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+def shared_array(shape, dtype=float):
+    '''Allocate a zero-filled array that a ViewerProcess maps without copying.
+    The array is backed by a file in /dev/shm (or the temp directory when
+    /dev/shm does not exist) that is removed when this process exits.'''
+    dirname = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    fd, filename = tempfile.mkstemp(prefix='arrview-', suffix='.dat', dir=dirname)
+    os.close(fd)
+    atexit.register(_remove_file, filename)
+    return np.memmap(filename, dtype=dtype, mode='w+', shape=shape)
+
+
+def _qt_app_running():
+    '''True if this process has created a QApplication, without importing Qt'''
+    qtgui = sys.modules.get('PySide.QtGui')
+    return qtgui is not None and qtgui.QApplication.instance() is not None
+
+
+def _context():
+    '''Fork where possible, a child forked from a process running a
+    QApplication inherits it and its windows so spawn one instead'''
+    if not hasattr(multiprocessing, 'get_context'):
+        if _qt_app_running():
+            raise RuntimeError('cannot fork a viewer process from a process running a '
+                               'QApplication, use view(arr, process=False) instead')
+        return multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods and not _qt_app_running():
+        return multiprocessing.get_context('fork')
+    if 'spawn' in methods:
+        return multiprocessing.get_context('spawn')
+    return multiprocessing.get_context()
+
+
+def _forks():
+    ctx = _context()
+    if ctx is multiprocessing:
+        return os.name == 'posix'
+    return ctx.get_start_method() == 'fork'
+
+
+def _array_spec(arr):
+    '''Describe how the viewer process gets hold of arr without copying it'''
+    if isinstance(arr, np.memmap) and isinstance(arr.base, mmap.mmap) and arr.filename:
+        order = 'F' if arr.flags.f_contiguous and not arr.flags.c_contiguous else 'C'
+        return ('memmap', arr.filename, arr.dtype.str, arr.shape, arr.offset, order)
+    if _forks():
+        return ('inherit', arr)
+    raise ValueError('arr must be a memmap, e.g. from arrview.process.shared_array, '
+                     'to be viewed in another process on this platform')
+
+
+def _array_from_spec(spec):
+    if spec[0] == 'memmap':
+        _, filename, dtype, shape, offset, order = spec
+        return np.memmap(filename, dtype=dtype, mode='r', shape=shape,
+                         offset=offset, order=order)
+    return spec[1]
+
+
+def _serialize_rois(rois):
+    return [(roi.name, tuple(roi.color.toTuple()[:3]), np.packbits(roi.mask), roi.mask.shape)
+            for roi in rois]
+
+
+def _deserialize_rois(data):
+    rois = []
+    for name, color, bits, shape in data:
+        size = int(np.prod(shape))
+        mask = np.unpackbits(bits)[:size].reshape(shape).astype(bool)
+        rois.append(RemoteROI(name=name, color=color, mask=mask))
+    return rois
+
+
+def _viewer_main(conn, spec, kwargs):
+    '''Entry point of the viewer process'''
+    from PySide.QtCore import QTimer
+    from PySide.QtGui import QApplication
+    from arrview.main import ArrayViewer
+    from arrview.slicer import Slicer
+
+    app = QApplication.instance() or QApplication([])
+    arr = _array_from_spec(spec)
+    viewer = ArrayViewer(Slicer(arr, xdim=kwargs['xdim'], ydim=kwargs['ydim'],
+                                reorder_budget=kwargs['reorder_budget']),
+                         roi_filename=kwargs['roi_filename'],
+                         title=kwargs['title'],
+                         rois_updated=lambda filename: conn.send(('rois_updated', filename)))
+
+    def poll():
+        while conn.poll():
+            msg = conn.recv()
+            cmd = msg[0]
+            if cmd == 'update':
+                bounds = msg[1]
+                viewer.update(region=bounds_to_slices(bounds))
+            elif cmd == 'rois':
+                conn.send(('rois', _serialize_rois(viewer.roi_manager.rois)))
+            elif cmd == 'close':
+                app.closeAllWindows()
+            else:
+                log.warning('unknown command: %r', cmd)
+
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(_poll_ms)
+    viewer.edit_traits()
+    app.exec_()
+    conn.send(('closed',))
+
+
+class ViewerProcess(object):
+    '''Handle on an ArrayViewer running in its own process.
+
+    Callbacks passed as rois_updated are called on a listener thread of
+    this process with the filename the ROIs were saved to.
+    '''
+    def __init__(self, arr, roi_filename=None, title=None, rois_updated=None,
+                 xdim=1, ydim=0, reorder_budget=0):
+        self._shape = arr.shape
+        self._context = _context()
+        self._spec = _array_spec(arr)
+        self._kwargs = dict(roi_filename=roi_filename, title=title, xdim=xdim, ydim=ydim,
+                            reorder_budget=reorder_budget)
+        self._rois_updated = rois_updated
+        self._send_lock = threading.Lock()
+        self._reply = None
+        self._reply_ready = threading.Event()
+        self._closed = threading.Event()
+        self._conn = None
+        self._process = None
+        self._listener = None
+
+    @property
+    def shared(self):
+        '''True if changes to the array in this process are seen by the viewer'''
+        return self._spec[0] == 'memmap'
+
+    def start(self):
+        ctx = self._context
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(target=_viewer_main,
+                                    args=(child_conn, self._spec, self._kwargs),
+                                    name='arrview-viewer')
+        self._process.daemon = True
+        self._process.start()
+        child_conn.close()
+        self._listener = threading.Thread(target=self._listen, name='arrview-listener')
+        self._listener.daemon = True
+        self._listener.start()
+        return self
+
+    def _listen(self):
+        while True:
+            try:
+                msg = self._conn.recv()
+            except (EOFError, IOError):
+                break
+            if msg[0] == 'rois_updated':
+                if self._rois_updated is not None:
+                    self._rois_updated(msg[1])
+            elif msg[0] == 'rois':
+                self._reply = msg[1]
+                self._reply_ready.set()
+            elif msg[0] == 'closed':
+                break
+        self._closed.set()
+        self._reply_ready.set()
+
+    def _send(self, *msg):
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def update(self, region=None):
+        '''Tell the viewer that region of the shared array has changed,
+        see ArrayViewer.update'''
+        if not self.shared:
+            log.warning('array is not shared with the viewer process, '
+                        'use arrview.process.shared_array to display updates')
+        self._send('update', region_bounds(region, self._shape))
+
+    def rois(self, timeout=10):
+        '''Returns the viewer's current ROIs as a list of RemoteROI'''
+        self._reply_ready.clear()
+        self._send('rois')
+        if not self._reply_ready.wait(timeout) or self._closed.is_set():
+            raise RuntimeError('viewer process did not reply')
+        return _deserialize_rois(self._reply)
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def join(self, timeout=None):
+        self._process.join(timeout)
+
+    def close(self):
+        if self.is_alive():
+            self._send('close')
+            self.join()
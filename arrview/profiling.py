@@ -0,0 +1,146 @@
+'''Profile the interaction with a viewer and save it for later inspection.
+
+A Profiler runs cProfile on the GUI thread between start() and stop(). Each
+profile is saved to a timestamped .prof file in the profile directory,
+next to a .json file of the same name with the viewer state it was taken
+in, so a user can send both of them in without running a debugger.
+
+In an ArrayViewer, 'P' or Tools > Start/Stop Profiling toggles the
+profiler. Setting ARRVIEW_PROFILE also profiles every mouse interaction,
+from the press of a button to its release, into a file of its own.
+ARRVIEW_PROFILE is the profile directory, or 1 for the current directory.
+
+Inspect a profile with:
+>>> import pstats
+>>> pstats.Stats('arrview-20160101-120000-000.prof').sort_stats('cumtime').print_stats(20)
+'''
+import cProfile
+from datetime import datetime
+import json
+import logging
+import os
+import platform
+
+from traits.api import Any
+
+from arrview import timing
+from arrview.tools.base import GraphicsTool, GraphicsToolFactory
+
+
+log = logging.getLogger(__name__)
+
+
+def directory_from_environment():
+    '''Returns the directory set by ARRVIEW_PROFILE, None if unset or 0'''
+    value = os.environ.get('ARRVIEW_PROFILE', '')
+    if value in ('', '0'):
+        return None
+    return os.getcwd() if value == '1' else value
+
+
+def profile_name(directory, now=None):
+    '''Returns the path, without extension, of a profile taken at now'''
+    now = datetime.now() if now is None else now
+    stamp = now.strftime('%Y%m%d-%H%M%S') + '-%03d' % (now.microsecond // 1000)
+    return os.path.join(directory, 'arrview-%s' % stamp)
+
+
+class Profiler(object):
+    '''Profiles the calling thread between start and stop.
+    Args:
+    directory -- (default: current directory) where profiles are saved
+    state     -- (default: None) callable returning a dict describing what
+                 is profiled, saved with each profile
+    '''
+    def __init__(self, directory=None, state=None):
+        self.directory = os.getcwd() if directory is None else directory
+        self._state = state
+        self._profile = None
+        self._started = None
+        self._label = None
+
+    @property
+    def running(self):
+        return self._profile is not None
+
+    @property
+    def label(self):
+        return self._label
+
+    def start(self, label='manual'):
+        '''Start profiling, label names what is profiled in the saved state'''
+        if self.running:
+            return
+        self._label = label
+        self._started = datetime.now()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        '''Stop profiling and save the profile, returns its filename'''
+        if not self.running:
+            return None
+        self._profile.disable()
+        profile, self._profile = self._profile, None
+        name = profile_name(self.directory, self._started)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        profile.dump_stats(name + '.prof')
+        with open(name + '.json', 'w') as f:
+            json.dump(self.info(), f, indent=2, default=repr)
+        log.info('saved %s profile to %s.prof', self._label, name)
+        return name + '.prof'
+
+    def toggle(self):
+        '''Start or stop profiling, returns the saved filename when stopping'''
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def info(self):
+        '''Returns the state saved with a profile'''
+        info = {'interaction': self._label,
+                'started': self._started.isoformat(),
+                'seconds': (datetime.now() - self._started).total_seconds(),
+                'python': platform.python_version(),
+                'platform': platform.platform()}
+        if timing.is_enabled():
+            info['timing'] = timing.summary()
+        if self._state is not None:
+            info['viewer'] = self._state()
+        return info
+
+
+class _ProfileTool(GraphicsTool):
+    name = 'Profile'
+
+    def mouse_pressed(self):
+        profiler = self.factory.profiler
+        if not profiler.running:
+            profiler.start(label='mouse %s' % ','.join(
+                b for b, down in zip(('left', 'middle', 'right'), self.mouse.buttons.state())
+                if down))
+
+    def mouse_released(self):
+        profiler = self.factory.profiler
+        if self.mouse.buttons.none() and profiler.running and profiler.label.startswith('mouse'):
+            profiler.stop()
+
+
+class ProfileTool(GraphicsToolFactory):
+    '''Profiles each mouse interaction, from a button press until all
+    buttons are released, with profiler'''
+    klass = _ProfileTool
+    profiler = Any
+
+
+def viewer_state(viewer):
+    '''Returns a callable describing viewer for saved profiles'''
+    def state():
+        return {'shape': list(viewer.slicer.shape),
+                'dtype': str(viewer.slicer.arr.dtype),
+                'slice': list(viewer.slicer.slc),
+                'mode': viewer.mode,
+                'rois': len(viewer.roi_manager.rois)}
+    return state
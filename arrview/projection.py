@@ -0,0 +1,206 @@
+from collections import namedtuple
+import logging
+
+import numpy as np
+
+from arrview.cache import LRUCache, global_budget
+from arrview.source import ChunkedReader
+from arrview.util import rep
+
+
+log = logging.getLogger(__name__)
+
+OPS = ('max', 'min', 'mean', 'std')
+
+# Upper bound on the projections kept in memory per Projector
+_default_cache_bytes = 64 * 2**20
+
+# Upper bound on the slab read at once from unchunked sources
+_default_block_bytes = 32 * 2**20
+
+
+class Projection(namedtuple('Projection', ['op', 'dim', 'start', 'stop'])):
+    '''Reduce the array with op ('max', 'min', 'mean' or 'std') along
+    dimension dim over the index range [start, stop)'''
+    def __new__(cls, op, dim, start, stop):
+        assert op in OPS, 'op must be one of %r' % (OPS,)
+        assert start < stop, 'projection range must not be empty'
+        return super(Projection, cls).__new__(cls, op, dim, start, stop)
+
+
+class _Accumulator(object):
+    '''Running reduction of 2D planes, stored in array (not screen) order'''
+    def __init__(self, op):
+        self.op = op
+        self.count = 0
+        self._a = None
+        self._b = None
+
+    @property
+    def removable(self):
+        '''True if planes can be taken out of the reduction again'''
+        return self.op in ('mean', 'std')
+
+    @property
+    def nbytes(self):
+        return sum(x.nbytes for x in (self._a, self._b) if x is not None)
+
+    def add(self, block, axis):
+        n = block.shape[axis]
+        if n == 0:
+            return
+        if self.op == 'max':
+            part = block.max(axis=axis)
+            self._a = part if self._a is None else np.maximum(self._a, part)
+        elif self.op == 'min':
+            part = block.min(axis=axis)
+            self._a = part if self._a is None else np.minimum(self._a, part)
+        else:
+            block = block.astype('float64')
+            s = block.sum(axis=axis)
+            self._a = s if self._a is None else self._a + s
+            if self.op == 'std':
+                ss = np.square(block).sum(axis=axis)
+                self._b = ss if self._b is None else self._b + ss
+        self.count += n
+
+    def remove(self, block, axis):
+        assert self.removable, '%s does not support removal' % self.op
+        n = block.shape[axis]
+        if n == 0:
+            return
+        block = block.astype('float64')
+        self._a = self._a - block.sum(axis=axis)
+        if self.op == 'std':
+            self._b = self._b - np.square(block).sum(axis=axis)
+        self.count -= n
+
+    def result(self):
+        if self.op in ('max', 'min'):
+            return self._a.copy()
+        mean = self._a / self.count
+        if self.op == 'mean':
+            return mean
+        return np.sqrt(np.maximum(self._b / self.count - np.square(mean), 0))
+
+
+class Projector(object):
+    '''Computes and caches intensity projections of an array source.
+
+    Slabs are read in blocks along the projected dimension (one chunk
+    along it for chunked sources), so memmapped and HDF5 sources never
+    have to be read whole. Results are cached per (op, dim, range, slice).
+    When only the range changes, the previous reduction is extended or,
+    for mean and std, shrunk plane by plane instead of recomputed.
+    '''
+    def __init__(self, source, max_bytes=_default_cache_bytes,
+                 block_bytes=_default_block_bytes):
+        self._source = source
+        self._cache = LRUCache(max_bytes, budget=global_budget, name='projections')
+        self._block_bytes = block_bytes
+        self._last = None
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def _block_size(self, slc, dim):
+        if isinstance(self._source, ChunkedReader):
+            return self._source.chunks[dim]
+        xdim, ydim = slc.viewdims
+        shape = self._source.shape
+        plane_bytes = shape[xdim] * shape[ydim] * np.dtype(self._source.dtype).itemsize
+        return max(1, self._block_bytes // max(1, plane_bytes))
+
+    def _reduce(self, acc, slc, dim, start, stop, remove=False):
+        '''Add (or remove) the planes [start, stop) along dim to acc'''
+        index = list(slc.view_slice)
+        axis = sorted(slc.viewdims + (dim,)).index(dim)
+        block = self._block_size(slc, dim)
+        pos = start
+        while pos < stop:
+            end = min(stop, (pos // block + 1) * block)
+            index[dim] = slice(pos, end)
+            data = np.asarray(self._source[tuple(index)])
+            if remove:
+                acc.remove(data, axis)
+            else:
+                acc.add(data, axis)
+            pos = end
+
+    def _incremental(self, base, proj, slc):
+        '''Returns an accumulator for proj derived from the last one, or None'''
+        if self._last is None or self._last[0] != base:
+            return None
+        _, (start, stop), acc = self._last
+        if not (acc.removable or (proj.start <= start and proj.stop >= stop)):
+            return None
+        overlap = min(stop, proj.stop) - max(start, proj.start)
+        changed = abs(proj.start - start) + abs(proj.stop - stop)
+        if overlap <= 0 or changed >= proj.stop - proj.start:
+            return None
+        if proj.start < start:
+            self._reduce(acc, slc, proj.dim, proj.start, start)
+        elif proj.start > start:
+            self._reduce(acc, slc, proj.dim, start, proj.start, remove=True)
+        if proj.stop > stop:
+            self._reduce(acc, slc, proj.dim, stop, proj.stop)
+        elif proj.stop < stop:
+            self._reduce(acc, slc, proj.dim, proj.stop, stop, remove=True)
+        return acc
+
+    def project(self, slc, proj, data_key=None):
+        '''Returns the 2D projection proj of the view described by slc,
+        in screen orientation like SliceTuple.viewarray.
+        Args:
+        slc      -- SliceTuple, positions along proj.dim are ignored
+        proj     -- Projection
+        data_key -- (default: None) key identifying the source data version,
+                    see Slicer.data_version. Cached results from other keys are unused.
+        '''
+        assert proj.dim in slc.freedims, 'projected dim must be a free dimension'
+        n = self._source.shape[proj.dim]
+        proj = Projection(proj.op, proj.dim, max(0, proj.start), min(n, proj.stop))
+        others = tuple(slc[d] for d in slc.freedims if d != proj.dim)
+        base = (data_key, proj.op, proj.dim, slc.viewdims, others)
+        key = base + (proj.start, proj.stop)
+        result = self._cache.get(key)
+        if result is None:
+            acc = self._incremental(base, proj, slc)
+            if acc is None:
+                acc = _Accumulator(proj.op)
+                self._reduce(acc, slc, proj.dim, proj.start, proj.stop)
+            self._last = (base, (proj.start, proj.stop), acc)
+            result = acc.result()
+            if slc.is_transposed:
+                result = result.T
+            self._cache.put(key, result)
+        return result
+
+    def invalidate(self, bounds):
+        '''Drop the cached projections that read from bounds, a (start, stop)
+        pair per dimension. Needed when data changes without a new data_key,
+        e.g. appended to a growing array.'''
+        def overlaps(d, start, stop):
+            return bounds[d][0] < stop and start < bounds[d][1]
+
+        def stale(key):
+            _, _, dim, viewdims, others, start, stop = key
+            free = [d for d in range(len(bounds)) if d not in viewdims and d != dim]
+            return (overlaps(dim, start, stop) and
+                    all(overlaps(d, i, i + 1) for d, i in zip(free, others)))
+
+        if any(start >= stop for start, stop in bounds):
+            return
+        for key in self._cache.keys():
+            if stale(key):
+                self._cache.pop(key)
+        if self._last is not None and stale(self._last[0] + self._last[1]):
+            self._last = None
+
+    def clear(self):
+        self._cache.clear()
+        self._last = None
+
+    def __repr__(self):
+        return rep(self, ['cache'])
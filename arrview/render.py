@@ -0,0 +1,103 @@
+'''Rendering of arrays to RGBA images with NumPy only.
+
+Nothing here needs Qt, so slices can be rendered on machines without a
+display. The viewer renders through the same functions, so a batch
+rendering of a slice has the same pixels as the viewer shows.
+
+Example:
+>>> from matplotlib import cm
+>>> vmin, vmax, _, _ = scale_stats(arr)
+>>> images = render(arr.transpose(2, 0, 1), cm.gray, linear_norm(vmin, vmax),
+...                 overlays=[(mask.transpose(2, 0, 1), (255, 0, 0, 128))])
+'''
+import numpy as np
+
+
+def scale_stats(ndarray):
+    '''Compute the statistics Norm.set_scale uses to scale ndarray.
+    Returns:
+    (vmin, vmax, low, high) where vmin and vmax are the 5th and 95th
+    percentiles of the finite values and low and high their range'''
+    ndarray = np.asarray(ndarray)
+    arr = ndarray[np.isfinite(ndarray)]
+    pdf,bins = np.histogram(arr, bins=50)
+    cdf = pdf.cumsum() / float(arr.size)
+    vmin = float(bins[np.argmax(cdf > 0.05)])
+    vmax = float(bins[np.argmin(cdf < 0.95)])
+    low,high = float(arr.min()), float(arr.max())
+    if vmin == vmax:
+        vmin, vmax = low, high
+    return vmin, vmax, low, high
+
+
+def normalize(ndarray, vmin, vmax):
+    '''Linearly map [vmin, vmax] to [0, 1], clipping values outside'''
+    if vmin == vmax:
+        return np.zeros_like(ndarray)
+    return np.clip((ndarray - vmin) / (vmax - vmin), 0, 1)
+
+
+def linear_norm(vmin, vmax):
+    '''Returns a norm for render that maps [vmin, vmax] to [0, 1]'''
+    return lambda ndarray: normalize(ndarray, vmin, vmax)
+
+
+def colorize(ndarray, cmap, norm):
+    '''Map ndarray to an opaque RGBA uint8 array of shape ndarray.shape + (4,).
+    Args:
+    ndarray -- array of any shape, e.g. one slice or a stack of slices
+    cmap    -- callable mapping values in [0, 1] to RGB(A) floats in [0, 1],
+               e.g. a matplotlib colormap
+    norm    -- callable mapping ndarray to [0, 1], see linear_norm
+    '''
+    colors = (255 * cmap(norm(ndarray).astype('float'))).astype('uint8')
+    out = np.empty(ndarray.shape + (4,), dtype='uint8')
+    out[..., :3] = colors[..., :3]
+    out[..., 3] = 255
+    return out
+
+
+def mask_rgba(mask, color):
+    '''RGBA uint8 image that is color where mask is set and transparent elsewhere.
+    Args:
+    mask  -- boolean array of any shape
+    color -- RGBA tuple, [0, 255] for each channel
+    '''
+    assert len(color) == 4, 'Color should be a 4-tuple'
+    mask = np.asarray(mask, dtype=bool)
+    out = np.zeros(mask.shape + (4,), dtype='uint8')
+    out[mask] = color
+    return out
+
+
+def composite(rgba, overlay):
+    '''Draw the RGBA overlay over the RGBA image rgba (source over), in place.
+    Returns rgba'''
+    alpha = overlay[..., 3:].astype('float32') / 255
+    color = overlay[..., :3] * alpha + rgba[..., :3] * (1 - alpha)
+    rgba[..., :3] = np.round(color).astype('uint8')
+    rgba[..., 3:] = np.maximum(rgba[..., 3:], overlay[..., 3:])
+    return rgba
+
+
+def render(ndarray, cmap, norm, overlays=()):
+    '''Render ndarray, one slice or a stack of slices, to RGBA uint8.
+    Args:
+    ndarray  -- array of shape (..., h, w)
+    cmap     -- colormap, see colorize
+    norm     -- norm, see colorize and linear_norm
+    overlays -- (default: ()) sequence of (mask, color) pairs drawn in order
+                on top of the image, e.g. ROIs. masks have the shape of ndarray.
+    Returns:
+    uint8 array of shape ndarray.shape + (4,)
+    '''
+    out = colorize(np.asarray(ndarray), cmap, norm)
+    for mask, color in overlays:
+        composite(out, mask_rgba(mask, color))
+    return out
+
+
+def rgba_to_argb32(rgba):
+    '''Pack an RGBA uint8 image into the uint32 pixels of QImage.Format_ARGB32'''
+    rgba = rgba.astype('uint32')
+    return (rgba[..., 3] << 24 | rgba[..., 0] << 16 | rgba[..., 1] << 8 | rgba[..., 2])
@@ -0,0 +1,184 @@
+'''Record the interaction with an ArrayViewer and replay it offscreen.
+
+A recording is a file of JSON lines. Each line is either a mouse event,
+as the viewer's tools received it, or a change of the mode, the free
+dimension position or the ROI selection, with its time since the start
+of the recording. Replaying drives a viewer through the same sequence
+and measures how long each event takes, including the Qt events and
+painting it causes, so a slow interaction can be reproduced exactly.
+
+Record from the command line with `arrview data.npy --record session.jsonl`
+and replay with `arrview data.npy --replay session.jsonl`, or:
+>>> viewer = ArrayViewer(Slicer(arr))
+>>> results = replay(viewer, 'session.jsonl')
+>>> summarize(results)
+'''
+import json
+import logging
+import time
+
+import numpy as np
+
+from traits.api import Any
+
+from arrview.tools.base import GraphicsTool, GraphicsToolFactory, MouseButtons
+
+
+log = logging.getLogger(__name__)
+
+class _RecorderTool(GraphicsTool):
+    name = 'Recorder'
+
+    def _record(self, event):
+        mouse = self.mouse
+        self.factory.recorder.write({
+            'kind': 'mouse',
+            'event': event,
+            'coords': list(mouse.coords),
+            'screenCoords': list(mouse.screenCoords),
+            'buttons': list(mouse.buttons.state()),
+            'delta': mouse.delta,
+            'path': [list(p) for p in mouse.path]})
+
+    def mouse_entered(self):
+        self._record('entered')
+
+    def mouse_left(self):
+        self._record('left')
+
+    def mouse_moved(self):
+        self._record('moved')
+
+    def mouse_pressed(self):
+        self._record('pressed')
+
+    def mouse_wheeled(self):
+        self._record('wheeled')
+
+    def mouse_released(self):
+        self._record('released')
+
+    def mouse_double_clicked(self):
+        self._record('doubleclicked')
+
+
+class RecorderTool(GraphicsToolFactory):
+    klass = _RecorderTool
+    recorder = Any
+
+
+class Recorder(object):
+    '''Writes the interaction with viewer to filename until stopped'''
+    def __init__(self, viewer, filename):
+        self._viewer = viewer
+        self._filename = filename
+        self._file = None
+        self._start = None
+        self._tool = RecorderTool(recorder=self)
+
+    def start(self):
+        self._file = open(self._filename, 'w')
+        self._start = time.time()
+        viewer = self._viewer
+        viewer.add_tool(self._tool)
+        viewer.on_trait_change(self._mode_changed, 'mode')
+        viewer.bottomPanel.slicerDims.on_trait_change(self._freedim_changed, 'freedim.val')
+        viewer.roi_manager.on_trait_change(self._selection_changed, 'selection[]')
+        log.debug('recording interaction to %r', self._filename)
+        return self
+
+    def stop(self):
+        viewer = self._viewer
+        viewer.remove_tool(self._tool)
+        viewer.on_trait_change(self._mode_changed, 'mode', remove=True)
+        viewer.bottomPanel.slicerDims.on_trait_change(self._freedim_changed, 'freedim.val',
+                                                      remove=True)
+        viewer.roi_manager.on_trait_change(self._selection_changed, 'selection[]', remove=True)
+        self._file.close()
+        self._file = None
+
+    def write(self, record):
+        if self._file is None:
+            return
+        record['t'] = time.time() - self._start
+        self._file.write(json.dumps(record) + '\n')
+
+    def _mode_changed(self, mode):
+        self.write({'kind': 'mode', 'value': mode})
+
+    def _freedim_changed(self):
+        freedim = self._viewer.bottomPanel.slicerDims.freedim
+        self.write({'kind': 'freedim', 'dim': freedim.dim, 'value': freedim.val})
+
+    def _selection_changed(self):
+        manager = self._viewer.roi_manager
+        self.write({'kind': 'selection', 'value': [rv.index for rv in manager.selection]})
+
+
+def load_recording(filename):
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _apply(viewer, mouse, record):
+    kind = record['kind']
+    if kind == 'mouse':
+        mouse.coords = tuple(record['coords'])
+        mouse.screenCoords = tuple(record['screenCoords'])
+        mouse.buttons = MouseButtons(*record['buttons'])
+        mouse.delta = record['delta']
+        mouse.path = [tuple(p) for p in record['path']]
+        setattr(mouse, record['event'], True)
+    elif kind == 'mode':
+        viewer.mode = record['value']
+    elif kind == 'freedim':
+        freedim = viewer.bottomPanel.slicerDims.freedim
+        if freedim.dim == record['dim']:
+            freedim.val = record['value']
+    elif kind == 'selection':
+        manager = viewer.roi_manager
+        manager.selection = [manager.roiviews[i - 1] for i in record['value']
+                             if 0 < i <= len(manager.roiviews)]
+
+
+def replay(viewer, filename, realtime=False):
+    '''Replay the recording in filename on viewer, which is opened if it
+    has no window yet.
+    Args:
+    realtime -- (default: False) keep the recorded pace instead of replaying
+                each event as soon as the previous one is done
+    Returns:
+    list of (record, seconds) pairs, the time each event took including
+    the pending Qt events it caused
+    '''
+    from PySide.QtGui import QApplication
+    app = QApplication.instance() or QApplication([])
+    ui = viewer.edit_traits()
+    mouse = ui.get_editors('pixmap')[0].mouse
+    app.processEvents()
+    results = []
+    start = time.time()
+    for record in load_recording(filename):
+        if realtime:
+            delay = record['t'] - (time.time() - start)
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.time()
+        _apply(viewer, mouse, record)
+        app.processEvents()
+        results.append((record, time.time() - t0))
+    ui.dispose()
+    return results
+
+
+def summarize(results, q=(50, 90, 99)):
+    '''Latency percentiles in milliseconds per event kind, e.g. mouse:moved'''
+    latencies = {}
+    for record, seconds in results:
+        name = record['kind'] if record['kind'] != 'mouse' else 'mouse:' + record['event']
+        latencies.setdefault(name, []).append(1000.0 * seconds)
+    summary = {}
+    for name, ms in latencies.items():
+        summary[name] = dict(zip(['p%d' % p for p in q], np.percentile(ms, q)))
+        summary[name].update(count=len(ms), max=max(ms))
+    return summary
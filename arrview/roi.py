@@ -1,7 +1,8 @@
-from collections import namedtuple, OrderedDict
+from collections import namedtuple
 from itertools import izip
 import logging
 import os
+import threading
 import time
 
 import numpy as np
@@ -10,15 +11,16 @@ from traits.api import (HasTraits, HasPrivateTraits, List, Instance, Property,
     Any, Str, Int, Bool, Float, Button, DelegatesTo, WeakRef, Array, File,
     on_trait_change, cached_property, TraitError, Event, Color)
 
-from traitsui.api import View, Item, HGroup, TableEditor, ColorEditor
-from traitsui.extras.checkbox_column import CheckboxColumn
+from traitsui.api import View, Item, HGroup, ColorEditor
 from traitsui.menu import OKCancelButtons
-from traitsui.table_column import ObjectColumn, NumericColumn
 
+from arrview import morphology
 from arrview.color import color_generator
-from arrview.util import rep
+from arrview.util import bounds_to_slices, grow_array, rep
 from arrview.slicer import Slicer, SliceTuple
+from arrview.streaming import StreamingArray, TimeCurves
 from arrview.ui.dimeditor import SlicerDims
+from arrview.ui.roitable import ROITableEditor
 
 
 log = logging.getLogger(__name__)
@@ -30,6 +32,18 @@ class ROI(HasPrivateTraits):
     visible = Bool(True)
     mask = Array
     updated = Event
+    # Array mask is a view into while it grows, see resize
+    _base = Any
+
+    @property
+    def mask_shape(self):
+        return self.mask.shape
+
+    def resize(self, shape):
+        '''Grow the mask to shape, e.g. when frames are appended to a
+        StreamingArray. New elements are False.'''
+        if self.mask.shape != tuple(shape):
+            self._base, self.mask = grow_array(self.mask, shape, self._base)
 
     def set_mask(self, mask, slc):
         mask_view = self.mask[slc.view_slice]
@@ -38,6 +52,43 @@ class ROI(HasPrivateTraits):
         self.mask[slc.view_slice] = mask
         self.updated = True
 
+    def mask_view(self, index):
+        '''Returns the part index of the mask'''
+        return self.mask[tuple(index)]
+
+    def bounds(self):
+        '''Returns the tuple of slices bounding the mask, None if it is empty'''
+        return morphology.bounding_box(self.mask)
+
+    def add_region(self, index, mask):
+        '''Add the elements where mask is True to the part index of the mask'''
+        self.mask[tuple(index)] |= mask
+        self.updated = True
+
+    def set_region(self, index, mask):
+        '''Replace the part index of the mask with mask'''
+        self.mask[tuple(index)] = mask
+        self.updated = True
+
+    def data_changed(self, region):
+        '''Called when the data changed in region, a tuple of slices.
+        Returns True if the statistics of this ROI are affected.'''
+        return self.mask_view(region).any()
+
+    def stats(self, arr):
+        '''Returns (size, mean, std) of arr inside the mask'''
+        masked_data = arr[self.mask]
+        if len(masked_data) == 0:
+            return 0, float('nan'), float('nan')
+        return masked_data.size, masked_data.mean(), masked_data.std()
+
+    @property
+    def nbytes(self):
+        '''Bytes held by this ROI alone'''
+        if self._base is not None and self.mask.base is self._base:
+            return self._base.nbytes
+        return self.mask.nbytes
+
     def mask_arr(self, arr):
         return np.ma.array(arr, mask=~self.mask)
 
@@ -45,12 +96,32 @@ class ROI(HasPrivateTraits):
         return rep(self, ['name', 'color'])
 
 
+class MaskView(object):
+    '''Indexable stand-in for roi.mask that builds only the indexed part,
+    see ROI.mask_view. Use it where masks are only read in parts, e.g.
+    as export overlays, so LabelROIs never build a full size mask.'''
+    def __init__(self, roi):
+        self.roi = roi
+
+    @property
+    def shape(self):
+        return self.roi.mask_shape
+
+    def __getitem__(self, index):
+        return self.roi.mask_view(index if isinstance(index, tuple) else (index,))
+
+
 class ROIView(HasTraits):
+    '''Statistics of an ROI over arr. They are computed when first read
+    after the ROI or the data changed, so only the rows a table shows
+    are ever computed.'''
     roi = Instance(ROI)
     arr = Any
-    name = DelegatesTo('roi')
-    color = DelegatesTo('roi')
-    visible = DelegatesTo('roi')
+    # TimeCurves of arr when it is a StreamingArray
+    curves = Any
+    name = Property
+    color = Property
+    visible = Property
     index = Int()
 
     mean = Property
@@ -60,75 +131,85 @@ class ROIView(HasTraits):
     size = Property
     _size = Int
 
-    def __init__(self, **traits):
-        super(ROIView, self).__init__(**traits)
-        self.update_stats()
+    # Fired when the statistics have to be recomputed or the ROI's
+    # name, color or visibility changed
+    changed = Event
+    _stale = Bool(True)
+
+    # A single listener on the ROI keeps creating thousands of views fast
+    @on_trait_change('roi:[updated,name,color,visible]')
+    def _roi_changed(self, obj, name, new):
+        if name == 'updated':
+            self.invalidate()
+            if self.curves is not None:
+                self.curves.discard(self.roi)
+        else:
+            self.changed = True
+
+    def invalidate(self):
+        self._stale = True
+        self.changed = True
+
+    def _ensure_stats(self):
+        if self._stale:
+            self.update_stats()
 
-    @on_trait_change('roi:updated')
     def update_stats(self):
-        masked_data = self.arr[self.roi.mask]
-        self._size = masked_data.size
-        if len(masked_data) == 0:
-            self._mean = float('nan')
-            self._std = float('nan')
-        else:
-            self._mean = masked_data.mean()
-            self._std = masked_data.std()
+        self._stale = False
+        self._size, self._mean, self._std = self.roi.stats(self.arr)
+
+    def time_curve(self):
+        '''Returns the mean of each frame of a StreamingArray inside the
+        footprint of the ROI over all frames, None for other arrays. The
+        curve is extended as frames are appended and only recomputed
+        after the ROI changed.'''
+        if self.curves is None:
+            return None
+        if self.roi not in self.curves:
+            self.curves.add(self.roi, self.roi.mask.any(axis=self.curves.stream.axis))
+        return self.curves.curve(self.roi)
+
+    def _get_name(self):
+        return self.roi.name
+
+    def _set_name(self, name):
+        self.roi.name = name
+
+    def _get_color(self):
+        return self.roi.color
+
+    def _set_color(self, color):
+        self.roi.color = color
+
+    def _get_visible(self):
+        return self.roi.visible
+
+    def _set_visible(self, visible):
+        self.roi.visible = visible
 
     def _get_mean(self):
+        self._ensure_stats()
         return self._mean
 
     def _get_std(self):
+        self._ensure_stats()
         return self._std
 
     def _get_size(self):
+        self._ensure_stats()
         return self._size
 
     def __repr__(self):
         return rep(self, ['name','size','mean','std', 'color'])
 
 
-class CustomColorColumn(ObjectColumn):
-    def _get_color(self, object):
-        color = getattr(object, self.name).toTuple()
-        rgb = tuple(int(x) for x in color[:3])
-        return rgb
-
-    def get_cell_color(self, object):
-        return self._get_color(object)
-
-    def set_value(self, object, row, value):
-        print("set_value", args, kwargs)
-        return super(CustomColorColumn, self).set_value(object, row, value)
-
-    def get_text_color(self, object):
-        return self._get_color(object)
-
-    def get_value(self, object):
-        return ""
-
-
-roi_editor = TableEditor(
-    sortable = False,
-    configurable = False,
-    auto_size = True,
-    show_toolbar = False,
-    selection_mode = 'rows',
-    selected = 'selection',
-    columns = [
-        NumericColumn(name='index', label='#', editable=False),
-        CheckboxColumn(name='visible', label='', editable=True),
-        CustomColorColumn(name='color', label='', editable=False),
-        ObjectColumn(name='name', label='Name', editable=True),
-        NumericColumn(name='mean', label='Mean', editable=False, format='%0.2f'),
-        ObjectColumn(name='std', label='STD', editable=False, format='%0.2f'),
-        ObjectColumn(name='size', label='Size', editable=False)])
-
-
 class ROIManager(HasTraits):
     slicer = Instance(Slicer)
     rois = List(ROI, [])
     roiviews = List(ROIView, [])
+    # Fired with ('remove' or 'insert', start, count) or ('reset',) right
+    # before roiviews is changed, so table models can announce the change
+    roiviews_changing = Event
     selection = List(ROIView, [])
     next_id = Int(0)
     slicerDims = Instance(SlicerDims)
@@ -136,10 +217,14 @@ class ROIManager(HasTraits):
 
     new = Button
     delete = Button
+    # True while a morphology operation runs on the worker thread
+    busy = Bool(False)
+    # Fired from the worker thread with the (roi, region, mask) results
+    _morphology_done = Event
 
     view = View(
             Item('roiviews',
-                editor=roi_editor,
+                editor=ROITableEditor(),
                 show_label=False),
             HGroup(
                 Item('new', show_label=False),
@@ -148,25 +233,90 @@ class ROIManager(HasTraits):
                     show_label=False)))
 
     def __init__(self, **traits):
-        self._statsmap = OrderedDict()
+        self._statsmap = {}
+        self._curves = None
         self._color_gen = color_generator()
         super(ROIManager, self).__init__(**traits)
 
     @on_trait_change('rois[]')
     def rois_updated(self, obj, trait, old, new):
-        for roi in old:
-            del self._statsmap[roi]
-        for roi in new:
-            self._statsmap[roi] = ROIView(roi=roi, arr=self.slicer.arr)
-        roiviews = self._statsmap.values()
-        for i, rv in enumerate(roiviews, start=1):
-            rv.index = i
-        self.roiviews = self._statsmap.values()
+        # roiviews is edited in place, so views only add or remove the changed rows
+        old_set, new_set = set(old), set(new)
+        removed = [roi for roi in old if roi not in new_set]
+        added = [roi for roi in new if roi not in old_set]
+        if removed:
+            self._remove_views([self._statsmap.pop(roi) for roi in removed])
+        if added:
+            self._insert_views(added)
+        if trait == 'rois' and [rv.roi for rv in self.roiviews] != list(self.rois):
+            # reordered by assignment
+            self.roiviews_changing = ('reset',)
+            self.roiviews = [self._statsmap[roi] for roi in self.rois]
+            self._renumber(0)
         # reset next_id and color_gen if rois is empty
         if len(self.rois) == 0:
             self.next_id = 0
             self._color_gen = color_generator()
 
+    def _remove_views(self, views):
+        for rv in views:
+            if rv.curves is not None:
+                rv.curves.discard(rv.roi)
+        positions = sorted(rv.index - 1 for rv in views)
+        # Remove runs of consecutive rows at once, last run first
+        runs = []
+        for i in positions:
+            if runs and runs[-1][1] == i:
+                runs[-1][1] = i + 1
+            else:
+                runs.append([i, i + 1])
+        for start, stop in reversed(runs):
+            self.roiviews_changing = ('remove', start, stop - start)
+            del self.roiviews[start:stop]
+        self._renumber(positions[0])
+
+    def _insert_views(self, rois):
+        curves = self._time_curves()
+        views = dict((roi, ROIView(roi=roi, arr=self.slicer.arr, curves=curves)) for roi in rois)
+        self._statsmap.update(views)
+        start = len(self.roiviews)
+        if self.rois[start:] == rois:
+            self.roiviews_changing = ('insert', start, len(rois))
+            self.roiviews.extend([views[roi] for roi in rois])
+        else:
+            positions = [i for i, roi in enumerate(self.rois) if roi in views]
+            for i in positions:
+                self.roiviews_changing = ('insert', i, 1)
+                self.roiviews.insert(i, views[self.rois[i]])
+            start = positions[0]
+        self._renumber(start)
+
+    def _renumber(self, start):
+        for i in xrange(start, len(self.roiviews)):
+            self.roiviews[i].index = i + 1
+
+    def _time_curves(self):
+        arr = self.slicer.arr
+        if not isinstance(arr, StreamingArray):
+            return None
+        if self._curves is None or self._curves.stream is not arr:
+            self._curves = TimeCurves(arr)
+        return self._curves
+
+    def _fit_mask(self, roi):
+        '''Grow the mask of roi with an array that grew'''
+        if roi.mask_shape != self.slicer.shape:
+            roi.resize(self.slicer.shape)
+
+    @on_trait_change('slicer:data_changed')
+    def _data_changed(self, bounds):
+        region = bounds_to_slices(bounds)
+        for rv in self.roiviews:
+            self._fit_mask(rv.roi)
+            rv.arr = self.slicer.arr
+            if rv.roi.data_changed(region):
+                rv.invalidate()
+
     def _next_roi_color(self):
         return tuple(255 * ch for ch in self._color_gen.next())
 
@@ -181,20 +331,73 @@ class ROIManager(HasTraits):
 
     def add_rois(self, rois):
         """Add ROIs to ROIManager, increments next ROI ID and color"""
+        rois = list(rois)
         for roi in rois:
             roi.color = self._next_roi_color()
-            self.rois.append(roi)
-            self.next_id += 1
+        self.rois.extend(rois)
+        self.next_id += len(rois)
 
     def update_mask(self, roi, mask):
+        self._fit_mask(roi)
         roi.set_mask(mask, self.slicer.slc)
 
+    def add_region(self, index, mask):
+        '''Add a (region, mask) pair from arrview.segment to the selected
+        ROI, or to a new ROI unless exactly one is selected. Returns the ROI,
+        or None if mask is empty.'''
+        if not np.any(mask):
+            return None
+        if len(self.selection) == 1:
+            roi = self.selection[0].roi
+        else:
+            roi = self.new_roi()
+        self._fit_mask(roi)
+        roi.add_region(index, mask)
+        return roi
+
     def select_roi_by_index(self, index):
         if 1 <= index <= len(self.roiviews):
             self.selection = [self.roiviews[index - 1]]
         else:
             log.debug('index %s is invalid for current roi list', index)
 
+    def apply_morphology(self, op, rois=None, **params):
+        '''Run op, a function of arrview.morphology, with params on each of
+        rois (default: the selected ROIs) on a worker thread. The results
+        are written to the ROIs on the GUI thread, replacing edits made
+        meanwhile inside the result regions. Returns the thread, or None
+        if an operation is still running or there are no ROIs.'''
+        rois = [rv.roi for rv in self.selection] if rois is None else list(rois)
+        if self.busy or not rois:
+            return None
+        self.busy = True
+
+        def run():
+            results = []
+            try:
+                for roi in rois:
+                    # Only the part of the mask around the ROI is read
+                    region, mask = morphology.apply(op, roi.mask_view, roi.bounds(),
+                                                    roi.mask_shape, **params)
+                    if region is not None:
+                        results.append((roi, region, mask))
+            except Exception:
+                log.exception('%s failed', op.__name__)
+            self._morphology_done = results
+
+        thread = threading.Thread(target=run, name='arrview-morphology')
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    @on_trait_change('_morphology_done', dispatch='ui')
+    def _apply_morphology(self, results):
+        for roi, region, mask in results:
+            # Skip ROIs deleted while the operation ran
+            if roi in self._statsmap:
+                roi.set_region(region, mask)
+        self.busy = False
+
     def by_name(self, name):
         return [roi for roi in self.rois if roi.name==name]
 
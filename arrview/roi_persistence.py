@@ -1,11 +1,10 @@
 from collections import defaultdict
 import logging
 
-import h5py
 import numpy as np
-import skimage.draw
 import time
 
+from arrview.labels import LabelROI
 from arrview.roi import ROI
 from arrview.slicer import SliceTuple
 
@@ -37,6 +36,7 @@ def store_rois(rois, filename):
     filename : str
         name of file to save ROIs to
     """
+    import h5py
     with h5py.File(filename, 'w') as f:
         f.attrs['version'] = _version
         f.attrs['description'] = _file_description
@@ -46,11 +46,23 @@ def store_rois(rois, filename):
             roigrp = root.create_group('roi_%d' % i)
             roigrp.attrs['index'] = i
             roigrp.attrs['name'] = roi.name
-            roigrp.create_dataset('mask',
-                                  data=roi.mask,
-                                  dtype=bool,
-                                  compression=_compression_type,
-                                  compression_opts=_compression_opts)
+            if isinstance(roi, LabelROI):
+                # Write slab by slab instead of building the full mask
+                shape = roi.mask_shape
+                dset = roigrp.create_dataset('mask',
+                                             shape=shape,
+                                             dtype=bool,
+                                             chunks=(1,) + shape[1:],
+                                             compression=_compression_type,
+                                             compression_opts=_compression_opts)
+                for j in range(shape[0]):
+                    dset[j] = roi.mask_view((j,))
+            else:
+                roigrp.create_dataset('mask',
+                                      data=roi.mask,
+                                      dtype=bool,
+                                      compression=_compression_type,
+                                      compression_opts=_compression_opts)
         log.debug('rois saved to:{!r} count:{!r} version:{!r} time:{!r}'
                 .format(filename, len(rois), _version, f.attrs['creation_time']))
 
@@ -69,6 +81,7 @@ def load_rois(filename, shape=None):
     -------
     List of ROIs loaded from file
     """
+    import h5py
     rois = {}
     with h5py.File(filename, 'r') as f:
         version = f.attrs.get('version')
@@ -101,6 +114,7 @@ def _create_mask(shape, slc, poly, collapse=False):
         binary mask with the region in poly set to False and everywhere else
         set to True
     """
+    import skimage.draw
     mask = np.zeros(shape, dtype=bool)
     if len(poly) > 0:
         viewShape = shape[slc.ydim],shape[slc.xdim]
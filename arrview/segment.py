@@ -0,0 +1,121 @@
+'''Create ROI masks from intensities instead of by drawing.
+
+Both functions return (region, mask), where region indexes arr (slices
+along the searched dimensions, integers elsewhere) and mask is a bool
+array of the shape of arr[region]. The region is the bounding box of the
+mask, so the masks of small structures in large volumes stay small.
+
+grow_region only reads and labels a box around the seed, which is grown
+along the sides the connected region touches until it fits, so seeding a
+small structure in a large volume stays interactive.
+
+scipy.ndimage is imported on first use to keep it out of the viewer's
+start up.
+'''
+import logging
+
+import numpy as np
+
+
+log = logging.getLogger(__name__)
+
+# Edge length of the first box searched around a seed
+_default_box = 64
+
+
+def _bounds(index, shape):
+    '''Returns {dim: (start, stop)} of the dimensions index slices'''
+    return dict((d, i.indices(n)[:2]) for d, (i, n) in enumerate(zip(index, shape))
+                if isinstance(i, slice))
+
+
+def _region(index, box):
+    return tuple(slice(*box[d]) if d in box else i for d, i in enumerate(index))
+
+
+def _empty(index, box):
+    '''Returns the (region, mask) of nothing found'''
+    dims = sorted(box)
+    return _region(index, dict((d, (box[d][0], box[d][0])) for d in dims)), \
+        np.zeros((0,) * len(dims), dtype=bool)
+
+
+def _crop(index, box, mask):
+    '''Shrink box and mask to the bounding box of mask'''
+    dims = sorted(box)
+    if not mask.any():
+        return _empty(index, box)
+    crop = []
+    cropped = {}
+    for axis, d in enumerate(dims):
+        other = tuple(a for a in range(mask.ndim) if a != axis)
+        hits = np.flatnonzero(mask.any(axis=other))
+        crop.append(slice(hits[0], hits[-1] + 1))
+        cropped[d] = (box[d][0] + hits[0], box[d][0] + hits[-1] + 1)
+    return _region(index, cropped), mask[tuple(crop)]
+
+
+def threshold(arr, low, high, index=None):
+    '''Returns (region, mask) of the elements of arr[index] between low and
+    high inclusive.
+    Args:
+    arr   -- array
+    low   -- lowest value included
+    high  -- highest value included
+    index -- (default: None) tuple of slices and integers restricting the
+             search, e.g. SliceTuple.view_slice for the current slice
+    '''
+    index = (slice(None),) * arr.ndim if index is None else tuple(index)
+    box = _bounds(index, arr.shape)
+    data = np.asarray(arr[_region(index, box)])
+    mask = (data >= low) & (data <= high)
+    return _crop(index, box, mask)
+
+
+def grow_region(arr, seed, tolerance, index=None, box=_default_box):
+    '''Returns (region, mask) of the elements connected to seed, through
+    faces, whose values are within tolerance of the value at seed.
+    Args:
+    arr       -- array
+    seed      -- index of the starting element, inside index
+    tolerance -- largest difference to the seed value that is included
+    index     -- (default: None) tuple of slices and integers restricting
+                 the search, e.g. SliceTuple.view_slice for the current slice
+    box       -- (default: 64) edge length of the first box searched
+    Nothing is found from a seed that is nan or infinite.
+    '''
+    from scipy import ndimage
+    index = (slice(None),) * arr.ndim if index is None else tuple(index)
+    seed = tuple(int(s) for s in seed)
+    limits = _bounds(index, arr.shape)
+    assert all(limits[d][0] <= seed[d] < limits[d][1] for d in limits), \
+        'seed must be inside index'
+    value = float(arr[seed])
+    if not np.isfinite(value):
+        return _empty(index, limits)
+    low, high = value - tolerance, value + tolerance
+    half = box // 2
+    bounds = dict((d, (max(start, seed[d] - half), min(stop, seed[d] + half + 1)))
+                  for d, (start, stop) in limits.items())
+    dims = sorted(bounds)
+    while True:
+        data = np.asarray(arr[_region(index, bounds)])
+        labels, _ = ndimage.label((data >= low) & (data <= high))
+        label = labels[tuple(seed[d] - bounds[d][0] for d in dims)]
+        if label == 0:
+            # The seed itself is out of range, e.g. a negative tolerance
+            return _empty(index, limits)
+        mask = labels == label
+        grown = False
+        for axis, d in enumerate(dims):
+            start, stop = bounds[d]
+            width = stop - start
+            if start > limits[d][0] and mask.take(0, axis=axis).any():
+                start = max(limits[d][0], start - width)
+            if stop < limits[d][1] and mask.take(-1, axis=axis).any():
+                stop = min(limits[d][1], stop + width)
+            grown |= (start, stop) != bounds[d]
+            bounds[d] = (start, stop)
+        if not grown:
+            log.debug('grew %d elements from %r', mask.sum(), seed)
+            return _crop(index, bounds, mask)
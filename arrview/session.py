@@ -0,0 +1,97 @@
+import logging
+
+from arrview.cache import LRUCache, global_budget
+from arrview.colormapper import StatsIndex, ndarray_to_arraypixmap
+from arrview.slicer import Slicer, SliceTuple
+
+
+log = logging.getLogger(__name__)
+
+# Upper bound on the rendered slices kept in memory per session
+_default_render_cache_bytes = 128 * 2**20
+
+
+class Session(object):
+    '''Several ArrayViewers sharing slicers, rendered slices and statistics.
+
+    Viewers opened on the same array share one Slicer. When linked is True,
+    moving a free dimension in one viewer moves the same dimension in every
+    viewer whose array has the same shape, e.g. co-registered volumes.
+    Rendered slices and slice statistics are cached once for the session,
+    so no viewer re-slices or re-histograms what another already has.
+
+    Example:
+    >>> session = Session()
+    >>> session.show(t1)
+    >>> session.show(t2)
+    '''
+    def __init__(self, linked=True, render_cache_bytes=_default_render_cache_bytes):
+        self.linked = linked
+        self.stats = StatsIndex()
+        self._pixmaps = LRUCache(render_cache_bytes, budget=global_budget, name='rendered slices')
+        self._slicers = []
+        self._linking = False
+
+    def memory_usage(self):
+        '''Returns (name, nbytes) pairs of the memory held by the session's caches'''
+        return [('rendered slices', self._pixmaps.nbytes)]
+
+    @property
+    def slicers(self):
+        return list(self._slicers)
+
+    def slicer(self, arr, **kwargs):
+        '''Returns the session's Slicer for arr, creating it if needed.
+        kwargs are passed to Slicer when it is created.'''
+        for slicer in self._slicers:
+            if slicer.arr is arr:
+                return slicer
+        slicer = Slicer(arr, **kwargs)
+        slicer.on_trait_change(self._slc_changed, 'slc')
+        self._slicers.append(slicer)
+        return slicer
+
+    def viewer(self, arr, roi_filename=None, title=None, rois_updated=None, **kwargs):
+        '''Create an ArrayViewer for arr in this session.
+        kwargs are passed to Slicer if arr is new to the session.'''
+        from arrview.main import ArrayViewer
+        return ArrayViewer(self.slicer(arr, **kwargs),
+                           roi_filename=roi_filename,
+                           title=title,
+                           rois_updated=rois_updated,
+                           session=self)
+
+    def show(self, arr, **kwargs):
+        '''Create a viewer for arr and show it without blocking, see viewer'''
+        viewer = self.viewer(arr, **kwargs)
+        viewer.edit_traits()
+        return viewer
+
+    def render(self, slicer, colormapper):
+        '''Returns the ArrayPixmap of the current view of slicer, rendering
+        it only if no viewer in the session has done so already'''
+        key = slicer.view_key()
+        if colormapper.autoscale:
+            colormapper.scale_to(slicer.view, key)
+        norm = colormapper.norm
+        render_key = key + (colormapper.cmap.name, norm.vmin, norm.vmax)
+        pixmap = self._pixmaps.get(render_key)
+        if pixmap is None:
+            pixmap = ndarray_to_arraypixmap(slicer.view, colormapper.cmap, norm.normalize)
+            self._pixmaps.put(render_key, pixmap, pixmap.nbytes)
+        return pixmap
+
+    def _slc_changed(self, slicer, name, old, new):
+        if not self.linked or self._linking:
+            return
+        self._linking = True
+        try:
+            for other in self._slicers:
+                if other is slicer or other.shape != slicer.shape:
+                    continue
+                slc = list(other.slc)
+                for d in set(new.freedims) & set(other.slc.freedims):
+                    slc[d] = new[d]
+                other.slc = SliceTuple(slc)
+        finally:
+            self._linking = False
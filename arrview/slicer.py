@@ -1,8 +1,20 @@
 from collections import namedtuple
+import itertools
+import logging
+
 import numpy as np
 from traits.api import (HasTraits,
-        Tuple, Property, cached_property)
-from .util import unique, rep
+        Tuple, Property, Event, List, Instance, cached_property, on_trait_change)
+from .probe import ColumnProbe
+from .projection import Projection, Projector
+from .source import ChunkedReader, ReorderedCopy, array_source
+from . import timing
+from .util import unique, rep, region_bounds, clamp
+
+
+log = logging.getLogger(__name__)
+
+_slicer_ids = itertools.count()
 
 
 class SliceTuple(tuple):
@@ -79,6 +91,24 @@ class SliceTuple(tuple):
     def freedims(self):
         return tuple(i for i,x in enumerate(self) if i not in self.viewdims)
 
+    def intersects(self, bounds, ranges=None):
+        '''Test if the 2D slice described by this object overlaps bounds.
+        Args:
+        bounds -- a (start, stop) pair for each dimension, see util.region_bounds
+        ranges -- (default: None) dict of free dim to the (start, stop) range
+                  of it that is part of the view, e.g. a projected dim
+        '''
+        ranges = {} if ranges is None else ranges
+        for d, (start, stop) in enumerate(bounds):
+            if start >= stop:
+                return False
+            if d in ranges:
+                if ranges[d][0] >= stop or start >= ranges[d][1]:
+                    return False
+            elif d not in self.viewdims and not start <= self[d] < stop:
+                return False
+        return True
+
     #TODO: @deprecated: Get rid of this method
     @staticmethod
     def from_arrayslice(arrslice, viewdims):
@@ -106,20 +136,40 @@ class SliceTuple(tuple):
 
 class Slicer(HasTraits):
     slc = Tuple
-    view = Property(depends_on='slc')
+    view = Property(depends_on='slc,_view_changed,projection')
+    # When set, view shows this projection instead of a single slice
+    # whenever its dim is a free dimension
+    projection = Instance(Projection)
+    # Fired with the bounds of the changed region whenever update is called
+    data_changed = Event
+    _view_changed = Event
     shape = Property()
     ndim = Property()
     arr = Property()
     transposed = Property
 
-    def __init__(self, arr, xdim=1, ydim=0):
+    def __init__(self, arr, xdim=1, ydim=0, reorder_budget=0):
         '''Wraps a numpy array to keep track of a 2D slice.
-        The viewing dimension default to x=1 and y=0'''
+        The viewing dimension default to x=1 and y=0.
+        Chunked disk-backed arrays (e.g. h5py Datasets) are read through
+        a chunk cache, see arrview.source.ChunkedReader.
+
+        If reorder_budget (bytes) is non-zero and the array fits within it,
+        a contiguous copy with the view dims innermost is built in the
+        background whenever the view dims change, see
+        arrview.source.ReorderedCopy. Views are served from it once ready.'''
         assert arr.ndim >= 2, 'arr must be at least 2 dimensions'
         assert xdim != ydim, 'diminsion x must be different from y'
         super(Slicer, self).__init__()
 
         self._arr = arr
+        self._source = array_source(arr)
+        self._reorder_budget = reorder_budget
+        self._reordered = None
+        self._id = next(_slicer_ids)
+        self._version = 0
+        self._projector = None
+        self._probe = None
         self._set_dims([0]*self.ndim, xdim, ydim)
 
     def _get_ndim(self):
@@ -145,6 +195,28 @@ class Slicer(HasTraits):
         slc[xdim] = 'x'
         slc[ydim] = 'y'
         self.slc = SliceTuple(slc)
+        self._update_reordered()
+
+    def _update_reordered(self):
+        '''Start building a reordered copy for the current view dims if
+        the view is strided and the array fits in the reorder budget'''
+        viewdims = self.slc.viewdims
+        if self._reordered is not None:
+            if self._reordered.viewdims == viewdims:
+                return
+            self._reordered.cancel()
+            self._reordered = None
+        arr = self._source
+        if not self._reorder_budget or not isinstance(arr, np.ndarray):
+            return
+        xdim, ydim = viewdims
+        if (ydim, xdim) == (self.ndim - 2, self.ndim - 1) and arr.flags.c_contiguous:
+            return
+        if arr.nbytes > self._reorder_budget:
+            log.debug('array (%d bytes) exceeds reorder budget (%d bytes)',
+                      arr.nbytes, self._reorder_budget)
+            return
+        self._reordered = ReorderedCopy(arr, viewdims).start()
 
     def set_freedim(self, dim, val):
         '''Set the dimension dim to the value val.
@@ -169,10 +241,171 @@ class Slicer(HasTraits):
             slc[dim] = val
             self.slc = SliceTuple(slc)
 
+    def set_projection(self, op, dim, start=0, stop=None):
+        '''Show the op ('max', 'min', 'mean' or 'std') projection along the
+        free dimension dim over [start, stop) instead of a single slice.
+        stop defaults to the size of dim. See arrview.projection.'''
+        assert 0 <= dim < self.ndim, 'Dim [%d] must be in [0,%d)' % (dim, self.ndim)
+        stop = self.shape[dim] if stop is None else stop
+        self.projection = Projection(op, dim, start, stop)
+
+    def clear_projection(self):
+        self.projection = None
+
+    def update(self, arr=None, region=None, appended=False):
+        '''Notify the slicer that the array data has changed.
+        The view is only recomputed if the current slice, or the range of
+        an active projection, overlaps region.
+        Args:
+        arr      -- (default: None) replacement array of the same shape
+        region   -- (default: None) index (tuple of ints and slices) of the
+                    changed part of the array, None if everything changed
+        appended -- (default: False) region was appended to a growing array,
+                    e.g. an arrview.streaming.StreamingArray, and the data
+                    already there is unchanged so cached results stay valid
+        Returns:
+        True if the current view was affected'''
+        bounds = region_bounds(region, self.shape)
+        if not appended:
+            self._version += 1
+        if arr is not None:
+            assert arr.shape == self.shape, 'arr must have shape %r' % (self.shape,)
+            self._arr = arr
+            self._source = array_source(arr)
+            self._projector = None
+            self._probe = None
+            if self._reordered is not None:
+                self._reordered.cancel()
+                self._reordered = None
+        elif isinstance(self._source, ChunkedReader):
+            self._source.invalidate(bounds)
+        if self._reordered is not None and not self._reordered.refresh(bounds):
+            self._reordered.cancel()
+            self._reordered = None
+        self._update_reordered()
+        if self._projector is not None:
+            self._projector.invalidate(bounds)
+        self.data_changed = bounds
+        if self.slc.intersects(bounds, self._projected_ranges()):
+            self._view_changed = True
+            return True
+        return False
+
+    def _projected_ranges(self):
+        '''Returns {dim: (start, stop)} of the projection shown in the view'''
+        proj = self.projection
+        if proj is None or proj.dim not in self.slc.freedims:
+            return {}
+        return {proj.dim: (proj.start, proj.stop)}
+
+    def column(self, point, dim):
+        '''Returns the values along dim through the element at point,
+        see arrview.probe.ColumnProbe'''
+        if self._probe is None:
+            self._probe = ColumnProbe(self._source)
+        return self._probe.column(point, dim, self.data_key())
+
+    def data_version(self):
+        '''Returns a hashable key that changes whenever existing data changes'''
+        return (self._id, self._version)
+
+    def data_key(self, slc=None):
+        '''Returns a hashable key identifying the data of slc (default: the
+        whole array) as of the last update, for use in caches'''
+        return self.data_version() + (self.shape if slc is None else slc,)
+
+    def view_key(self):
+        '''Returns a hashable key identifying the data of the current view,
+        including the projection it shows, for use in caches'''
+        proj = self.projection
+        shown = tuple(proj) if proj is not None and proj.dim in self.slc.freedims else None
+        return self.data_key(self.slc) + (shown,)
+
     @cached_property
     def _get_view(self):
         '''Get the current view of the array'''
-        return self.slc.viewarray(self.arr)
+        with timing.stage('slice'):
+            return self._compute_view()
+
+    def _compute_view(self):
+        proj = self.projection
+        if proj is not None and proj.dim in self.slc.freedims:
+            if self._projector is None:
+                self._projector = Projector(self._source)
+            return self._projector.project(self.slc, proj, self.data_version())
+        reordered = self._reordered
+        if (reordered is not None and reordered.ready
+                and reordered.viewdims == self.slc.viewdims):
+            return reordered.view(self.slc)
+        return self.slc.viewarray(self._source)
+
+    def memory_usage(self):
+        '''Returns (name, nbytes) pairs of the memory held by the slicer
+        besides the array: its caches and the reordered copy'''
+        usage = []
+        if isinstance(self._source, ChunkedReader):
+            usage.append(('chunk cache', self._source.cache.nbytes))
+        if self._projector is not None:
+            usage.append(('projection cache', self._projector.cache.nbytes))
+        if self._probe is not None:
+            usage.append(('column cache', self._probe.cache.nbytes))
+        if self._reordered is not None:
+            usage.append(('reordered copy', self._reordered.nbytes))
+        return usage
 
     def __repr__(self):
         return rep(self, ['arr','slc'])
+
+
+class OrthoSlicer(HasTraits):
+    '''Three Slicers showing the orthogonal planes through point.
+
+    The planes are (x, y), (x, z) and (y, z) for dims=(x, y, z) and share one
+    array source, so a chunked array is decoded once for all of them. When
+    point moves only the planes whose slice changed update their view;
+    moving along a plane's own view dims leaves it untouched.
+    '''
+    point = Tuple
+    planes = List(Slicer)
+
+    def __init__(self, arr, dims=(1, 0, 2), point=None):
+        assert arr.ndim >= 3, 'arr must be at least 3 dimensions'
+        assert unique(dims) and len(dims) == 3, 'dims must be 3 distinct dimensions'
+        super(OrthoSlicer, self).__init__()
+        xdim, ydim, zdim = dims
+        self.dims = tuple(dims)
+        self._source = array_source(arr)
+        self.planes = [Slicer(self._source, xdim, ydim),
+                       Slicer(self._source, xdim, zdim),
+                       Slicer(self._source, ydim, zdim)]
+        if point is None:
+            point = [n // 2 for n in arr.shape]
+        self.point = tuple(point)
+
+    @property
+    def shape(self):
+        return self._source.shape
+
+    @property
+    def value(self):
+        '''Value of the array at point'''
+        return self._source[self.point]
+
+    @on_trait_change('point')
+    def _point_changed(self):
+        for slicer in self.planes:
+            slc = list(slicer.slc)
+            for d in slicer.slc.freedims:
+                slc[d] = self.point[d]
+            slicer.slc = SliceTuple(slc)
+
+    def set_point_from_plane(self, plane, x, y):
+        '''Move point to the screen coordinates x, y of planes[plane]'''
+        xdim, ydim = self.planes[plane].slc.viewdims
+        point = list(self.point)
+        point[xdim] = clamp(int(x), 0, self.shape[xdim] - 1)
+        point[ydim] = clamp(int(y), 0, self.shape[ydim] - 1)
+        self.point = tuple(point)
+
+    def __repr__(self):
+        return rep(self, ['dims', 'point'])
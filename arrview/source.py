@@ -0,0 +1,223 @@
+import itertools
+import logging
+import threading
+
+import numpy as np
+
+from arrview.cache import LRUCache, global_budget
+from arrview.util import bounds_to_slices, rep
+
+
+log = logging.getLogger(__name__)
+
+# Upper bound on the decoded chunks kept in memory per chunked source
+_default_chunk_cache_bytes = 256 * 2**20
+
+
+def _is_chunked(arr):
+    '''Returns True if arr reports a regular chunk layout, e.g. a chunked h5py Dataset'''
+    chunks = getattr(arr, 'chunks', None)
+    if not chunks:
+        return False
+    return all(isinstance(c, (int, long, np.integer)) for c in chunks)
+
+
+def array_source(arr, chunk_cache_bytes=_default_chunk_cache_bytes):
+    '''Wrap arr in the reader best suited to slicing it.
+    Chunked disk-backed arrays are wrapped in a ChunkedReader, anything
+    else (ndarrays, memmaps) is returned unchanged.'''
+    if isinstance(arr, (np.ndarray, ChunkedReader)) or not _is_chunked(arr):
+        return arr
+    return ChunkedReader(arr, max_bytes=chunk_cache_bytes)
+
+
+def _normalize_index(index, shape):
+    '''Convert index to a tuple of (start, stop, is_int) per dimension.
+    Returns None if index contains anything other than integers and
+    unit-step slices.'''
+    if not isinstance(index, (tuple, list)):
+        index = (index,)
+    if len(index) > len(shape):
+        return None
+    index = tuple(index) + (slice(None),) * (len(shape) - len(index))
+    ranges = []
+    for idx, n in zip(index, shape):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(n)
+            if step != 1:
+                return None
+            ranges.append((start, max(start, stop), False))
+        elif isinstance(idx, (int, long, np.integer)):
+            i = int(idx) + n if idx < 0 else int(idx)
+            if not 0 <= i < n:
+                raise IndexError('index %d is out of bounds for axis with size %d' % (idx, n))
+            ranges.append((i, i + 1, True))
+        else:
+            return None
+    return ranges
+
+
+class ChunkedReader(object):
+    '''Reads a chunked, disk-backed array (e.g. an h5py Dataset) one whole
+    chunk at a time and keeps the decoded chunks in an LRU cache.
+
+    A 2D slice that cuts across the chunk layout touches many chunks but
+    uses only a sliver of each. Caching the decoded chunks lets the
+    neighbouring slices be served from memory, so paging through a
+    dataset decompresses each chunk roughly once instead of once per slice.
+    '''
+    def __init__(self, source, max_bytes=_default_chunk_cache_bytes):
+        assert _is_chunked(source), 'source must have a regular chunk shape'
+        self._source = source
+        self._chunks = tuple(int(c) for c in source.chunks)
+        self._cache = LRUCache(max_bytes, budget=global_budget, name='chunks')
+
+    @property
+    def source(self):
+        return self._source
+
+    @property
+    def chunks(self):
+        return self._chunks
+
+    @property
+    def shape(self):
+        return tuple(self._source.shape)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        return self._source.dtype
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def _chunk_slices(self, key):
+        return tuple(slice(k * c, min((k + 1) * c, n))
+                     for k, c, n in zip(key, self._chunks, self.shape))
+
+    def read_chunk(self, key):
+        '''Returns the decoded chunk at chunk grid position key'''
+        chunk = self._cache.get(key)
+        if chunk is None:
+            chunk = np.asarray(self._source[self._chunk_slices(key)])
+            self._cache.put(key, chunk)
+        return chunk
+
+    def invalidate(self, bounds=None):
+        '''Drop cached chunks that overlap bounds, see arrview.util.region_bounds.
+        All chunks are dropped if bounds is None.'''
+        if bounds is None:
+            self._cache.clear()
+            return
+        for key in self._cache.keys():
+            if all(k * c < stop and start < (k + 1) * c
+                   for k, c, (start, stop) in zip(key, self._chunks, bounds)):
+                self._cache.pop(key)
+
+    def __getitem__(self, index):
+        ranges = _normalize_index(index, self.shape)
+        if ranges is None:
+            log.debug('unsupported index %r, reading directly from source', index)
+            return self._source[index]
+
+        out = np.empty([stop - start for start, stop, _ in ranges], dtype=self.dtype)
+        if out.size > 0:
+            grid = [xrange(start // c, (stop - 1) // c + 1)
+                    for (start, stop, _), c in zip(ranges, self._chunks)]
+            for key in itertools.product(*grid):
+                chunk = self.read_chunk(key)
+                src, dst = [], []
+                for k, c, (start, stop, _) in zip(key, self._chunks, ranges):
+                    lo, hi = max(start, k * c), min(stop, (k + 1) * c)
+                    src.append(slice(lo - k * c, hi - k * c))
+                    dst.append(slice(lo - start, hi - start))
+                out[tuple(dst)] = chunk[tuple(src)]
+        return out[tuple(0 if is_int else slice(None) for _, _, is_int in ranges)]
+
+    def __array__(self, dtype=None):
+        arr = self[()]
+        return arr if dtype is None else arr.astype(dtype)
+
+    def __repr__(self):
+        return rep(self, ['source', 'chunks', 'cache'])
+
+
+class ReorderedCopy(object):
+    '''A C-contiguous copy of arr with the view dimensions innermost.
+
+    Viewing a C-contiguous array across its slow axes yields heavily strided
+    2D views, which makes normalizing and colormapping them slow. The copy
+    is built on a background thread, one block along the first free dimension
+    at a time, so it can be abandoned part way through with cancel().
+    Once ready, view(slc) returns contiguous 2D slices already in screen
+    orientation (rows=y, columns=x).
+    '''
+    def __init__(self, arr, viewdims):
+        xdim, ydim = viewdims
+        self.viewdims = tuple(viewdims)
+        self.freedims = tuple(d for d in range(arr.ndim) if d not in self.viewdims)
+        self._perm = self.freedims + (ydim, xdim)
+        self._src = arr.transpose(self._perm)
+        self._arr = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='arrview-reorder')
+        self._thread.daemon = True
+
+    @property
+    def nbytes(self):
+        return self._src.nbytes
+
+    @property
+    def ready(self):
+        return self._arr is not None
+
+    @property
+    def arr(self):
+        return self._arr
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        '''Block until the copy is finished or cancelled, returns ready'''
+        self._thread.join(timeout)
+        return self.ready
+
+    def refresh(self, bounds):
+        '''Copy the region bounds of the source array into the finished copy.
+        Returns False if the copy is not ready and has to be rebuilt.'''
+        if not self.ready:
+            return False
+        region = bounds_to_slices(bounds[d] for d in self._perm)
+        self._arr[region] = self._src[region]
+        return True
+
+    def view(self, slc):
+        '''Returns the 2D view described by the SliceTuple slc'''
+        return self._arr[tuple(slc[d] for d in self.freedims)]
+
+    def _run(self):
+        out = np.empty(self._src.shape, dtype=self._src.dtype)
+        if out.ndim == 2:
+            out[...] = self._src
+        else:
+            for i in xrange(out.shape[0]):
+                if self._cancelled.is_set():
+                    log.debug('reordered copy for viewdims %r cancelled', self.viewdims)
+                    return
+                out[i] = self._src[i]
+        if not self._cancelled.is_set():
+            self._arr = out
+            log.debug('reordered copy for viewdims %r ready', self.viewdims)
+
+    def __repr__(self):
+        return rep(self, ['viewdims', 'ready'])
@@ -0,0 +1,234 @@
+'''Array sources that grow while they are being viewed, e.g. during acquisition.
+
+Example:
+>>> stream = StreamingArray((128, 128, 16), axis=-1)
+>>> stream.append(first_frame)
+>>> viewer = arrview.view(stream, block=False)
+>>> stream.append(next_frame)   # from any thread
+'''
+from collections import OrderedDict, deque
+import logging
+import threading
+
+import numpy as np
+
+from arrview.source import _normalize_index
+from arrview.util import rep
+
+
+log = logging.getLogger(__name__)
+
+
+class StreamingArray(object):
+    '''An array that grows along one axis as frames are appended.
+
+    Frames are stored in preallocated blocks of block_frames frames. Growing
+    allocates a new block and never copies the frames already stored. With
+    ring=True a single block of capacity frames is kept and the newest frame
+    overwrites the oldest, index 0 along axis always being the oldest frame.
+
+    Listeners added with add_listener are called as listener(start, stop, shifted)
+    on the appending thread, where [start, stop) are the indices of the new
+    frames and shifted is True if older frames moved to other indices, which
+    happens once a ring buffer is full.
+    '''
+    def __init__(self, frame_shape, dtype=float, axis=-1, block_frames=64,
+                 ring=False, capacity=None):
+        ndim = len(frame_shape) + 1
+        assert -ndim <= axis < ndim, 'axis out of range'
+        assert not ring or capacity, 'a ring buffer needs a capacity'
+        self._frame_shape = tuple(frame_shape)
+        self._dtype = np.dtype(dtype)
+        self._axis = axis % ndim
+        self._ring = ring
+        self._block_frames = capacity if ring else block_frames
+        self._blocks = []
+        self._count = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def axis(self):
+        return self._axis
+
+    @property
+    def ring(self):
+        return self._ring
+
+    @property
+    def capacity(self):
+        '''Maximum number of frames kept, None if unbounded'''
+        return self._block_frames if self._ring else None
+
+    @property
+    def frame_shape(self):
+        return self._frame_shape
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def ndim(self):
+        return len(self._frame_shape) + 1
+
+    def __len__(self):
+        if self._ring:
+            return min(self._count, self._block_frames)
+        return self._count
+
+    @property
+    def shape(self):
+        shape = list(self._frame_shape)
+        shape.insert(self._axis, len(self))
+        return tuple(shape)
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self._blocks)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def frame(self, i):
+        '''Returns frame i (oldest first) without copying it'''
+        n = len(self)
+        i = i + n if i < 0 else i
+        if not 0 <= i < n:
+            raise IndexError('frame %d out of range for %d frames' % (i, n))
+        if self._ring:
+            return self._blocks[0][(self._count - n + i) % self._block_frames]
+        return self._blocks[i // self._block_frames][i % self._block_frames]
+
+    def _store(self, frame):
+        if self._ring:
+            if not self._blocks:
+                self._blocks.append(np.empty((self._block_frames,) + self._frame_shape, self._dtype))
+            self._blocks[0][self._count % self._block_frames] = frame
+        else:
+            if self._count == len(self._blocks) * self._block_frames:
+                self._blocks.append(np.empty((self._block_frames,) + self._frame_shape, self._dtype))
+            self._blocks[-1][self._count % self._block_frames] = frame
+        self._count += 1
+
+    def extend(self, frames):
+        '''Append several frames stacked along axis, listeners are notified once'''
+        frames = np.asarray(frames)
+        assert frames.ndim == self.ndim, 'frames must have %d dimensions' % self.ndim
+        frames = np.moveaxis(frames, self._axis, 0)
+        with self._lock:
+            shifted = self._ring and self._count + len(frames) > self._block_frames
+            for frame in frames:
+                assert frame.shape == self._frame_shape, \
+                    'frame shape %r must be %r' % (frame.shape, self._frame_shape)
+                self._store(frame)
+            stop = len(self)
+            start = max(0, stop - len(frames))
+        log.debug('appended %d frames, now %d', len(frames), stop)
+        for listener in list(self._listeners):
+            listener(start, stop, shifted)
+
+    def append(self, frame):
+        self.extend(np.expand_dims(np.asarray(frame), self._axis))
+
+    def _masked(self, mask):
+        '''Returns the elements where mask, a bool array of the full shape,
+        is True, reading only the frames mask touches'''
+        other = tuple(d for d in range(self.ndim) if d != self._axis)
+        frames = np.flatnonzero(mask.any(axis=other))
+        if len(frames) == 0:
+            return np.empty(0, self._dtype)
+        data = np.stack([self.frame(i) for i in frames], axis=self._axis)
+        return data[mask.take(frames, axis=self._axis)]
+
+    def __getitem__(self, index):
+        if (isinstance(index, np.ndarray) and index.dtype == bool
+                and index.shape == self.shape):
+            return self._masked(index)
+        ranges = _normalize_index(index, self.shape)
+        if ranges is None:
+            return np.asarray(self)[index]
+        start, stop, is_int = ranges[self._axis]
+        frame_index = tuple(a if int_ else slice(a, b)
+                            for d, (a, b, int_) in enumerate(ranges) if d != self._axis)
+        if is_int:
+            return self.frame(start)[frame_index].copy()
+        pos = sum(1 for d, (_, _, int_) in enumerate(ranges) if d < self._axis and not int_)
+        frames = [self.frame(i)[frame_index] for i in xrange(start, stop)]
+        if not frames:
+            shape = np.empty(self._frame_shape)[frame_index].shape
+            return np.empty(shape[:pos] + (0,) + shape[pos:], self._dtype)
+        return np.stack(frames, axis=pos)
+
+    def __array__(self, dtype=None):
+        arr = self[()]
+        return arr if dtype is None else arr.astype(dtype)
+
+    def __repr__(self):
+        return rep(self, ['shape', 'axis', 'ring'])
+
+
+class TimeCurves(object):
+    '''Mean of a StreamingArray inside each of a set of frame masks, one value
+    per frame. Curves are extended as frames arrive instead of recomputed.
+    Masks are tracked by key, any hashable such as an ROI.'''
+    def __init__(self, stream):
+        self._stream = stream
+        self._masks = OrderedDict()
+        self._curves = {}
+        self._lock = threading.Lock()
+        stream.add_listener(self._frames_appended)
+
+    @property
+    def stream(self):
+        return self._stream
+
+    def _new_curve(self):
+        return deque(maxlen=self._stream.capacity)
+
+    def add(self, name, mask):
+        '''Track the mean inside mask, a boolean array with the frame shape'''
+        mask = np.asarray(mask, dtype=bool)
+        assert mask.shape == self._stream.frame_shape, 'mask must have the frame shape'
+        with self._lock:
+            curve = self._new_curve()
+            curve.extend(self._means(mask, 0, len(self._stream)))
+            self._masks[name] = mask
+            self._curves[name] = curve
+
+    def remove(self, name):
+        with self._lock:
+            del self._masks[name]
+            del self._curves[name]
+
+    def discard(self, name):
+        '''Stop tracking name if it is tracked'''
+        with self._lock:
+            self._masks.pop(name, None)
+            self._curves.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._masks
+
+    def names(self):
+        return list(self._masks)
+
+    def curve(self, name):
+        with self._lock:
+            return np.array(self._curves[name])
+
+    def _means(self, mask, start, stop):
+        if not mask.any():
+            return [float('nan')] * (stop - start)
+        return [float(self._stream.frame(i)[mask].mean()) for i in xrange(start, stop)]
+
+    def _frames_appended(self, start, stop, shifted):
+        with self._lock:
+            for name, mask in self._masks.items():
+                curve = self._curves[name]
+                # Curves added while the frames were stored already have them
+                first = start if shifted else max(start, len(curve))
+                curve.extend(self._means(mask, first, stop))
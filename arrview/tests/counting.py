@@ -0,0 +1,21 @@
+'''Array stand-ins shared by the tests that count reads from a source'''
+
+
+class CountingArray(object):
+    '''Stands in for a disk-backed array, e.g. a chunked h5py Dataset when
+    chunks is given, counting each read and the elements read'''
+    def __init__(self, arr, chunks=None):
+        self.arr = arr
+        self.chunks = chunks
+        self.reads = 0
+        self.elements_read = 0
+
+    shape = property(lambda self: self.arr.shape)
+    ndim = property(lambda self: self.arr.ndim)
+    dtype = property(lambda self: self.arr.dtype)
+
+    def __getitem__(self, index):
+        out = self.arr[index]
+        self.reads += 1
+        self.elements_read += out.size
+        return out
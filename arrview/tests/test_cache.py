@@ -0,0 +1,63 @@
+import numpy as np
+
+from arrview.cache import CacheBudget, LRUCache
+
+
+def test_get_and_put():
+    cache = LRUCache(max_bytes=100)
+    cache.put('a', 1, nbytes=10)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.nbytes == 10
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=20)
+    cache.put('a', 1, nbytes=10)
+    cache.put('b', 2, nbytes=10)
+    cache.get('a')
+    cache.put('c', 3, nbytes=10)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.nbytes == 20
+
+
+def test_oversized_values_are_not_cached():
+    cache = LRUCache(max_bytes=10)
+    cache.put('a', np.zeros(100))
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_replacing_key_updates_size():
+    cache = LRUCache(max_bytes=100)
+    cache.put('a', 1, nbytes=10)
+    cache.put('a', 2, nbytes=30)
+    assert cache.get('a') == 2
+    assert cache.nbytes == 30
+
+
+def test_budget_evicts_least_recently_used_across_caches():
+    budget = CacheBudget(max_bytes=30)
+    a = LRUCache(max_bytes=100, budget=budget)
+    b = LRUCache(max_bytes=100, budget=budget)
+    a.put('a1', 1, nbytes=10)
+    b.put('b1', 2, nbytes=10)
+    a.put('a2', 3, nbytes=10)
+    b.put('b2', 4, nbytes=10)
+    assert 'a1' not in a
+    assert 'b1' in b
+    assert budget.nbytes == 30
+
+
+def test_budget_set_max_bytes_evicts():
+    budget = CacheBudget(max_bytes=100)
+    a = LRUCache(max_bytes=100, budget=budget)
+    b = LRUCache(max_bytes=100, budget=budget)
+    a.put('a1', 1, nbytes=10)
+    b.put('b1', 2, nbytes=10)
+    a.get('a1')
+    budget.set_max_bytes(10)
+    assert 'a1' in a
+    assert len(b) == 0
+    assert budget.nbytes == 10
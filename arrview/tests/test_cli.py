@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+
+import h5py
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from arrview.cli import load_array, parse_path
+
+
+@pytest.fixture
+def tmpdir_path():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def test_parse_path():
+    assert parse_path('a.npy') == ('a.npy', 'npy', None)
+    assert parse_path('a.npz:arr_0') == ('a.npz', 'npz', 'arr_0')
+    assert parse_path('dir/a.H5:/grp/data') == ('dir/a.H5', 'h5', '/grp/data')
+
+
+def test_parse_path_unsupported():
+    with pytest.raises(ValueError):
+        parse_path('a.txt')
+
+
+def test_load_npy_is_memmapped(tmpdir_path):
+    arr = np.arange(12).reshape(3, 4)
+    filename = os.path.join(tmpdir_path, 'a.npy')
+    np.save(filename, arr)
+    loaded = load_array(filename)
+    assert isinstance(loaded, np.memmap)
+    assert_array_equal(arr, loaded)
+
+
+def test_load_npz(tmpdir_path):
+    filename = os.path.join(tmpdir_path, 'a.npz')
+    np.savez(filename, a=np.zeros((2, 2)), b=np.ones((3, 3)))
+    assert_array_equal(np.ones((3, 3)), load_array(filename + ':b'))
+    with pytest.raises(ValueError):
+        load_array(filename)
+
+
+def test_load_h5_dataset(tmpdir_path):
+    arr = np.arange(24).reshape(2, 3, 4)
+    filename = os.path.join(tmpdir_path, 'a.h5')
+    with h5py.File(filename, 'w') as f:
+        f.create_dataset('grp/data', data=arr)
+    dataset = load_array(filename + ':/grp/data')
+    assert isinstance(dataset, h5py.Dataset)
+    assert_array_equal(arr, dataset[...])
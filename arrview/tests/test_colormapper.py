@@ -14,3 +14,18 @@ class TestColorMapper(object):
         assert_array_equal(x, arr[:,:,0])
         assert_array_equal(x, arr[:,:,1])
         assert_array_equal(x, arr[:,:,2])
+
+
+class TestStatsIndex(object):
+    def test_stats_cached_by_key(self):
+        index = cm.StatsIndex()
+        x = np.arange(100, dtype=float)
+        stats = index.stats('a', x)
+        assert stats == cm.scale_stats(x)
+        # A different array under the same key returns the cached stats
+        assert index.stats('a', np.zeros(3)) == stats
+
+    def test_norm_set_stats(self):
+        norm = cm.Norm()
+        norm.set_stats((1.0, 2.0, 0.0, 3.0))
+        assert (norm.vmin, norm.vmax, norm.low, norm.high) == (1.0, 2.0, 0.0, 3.0)
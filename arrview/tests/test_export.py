@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+from numpy.testing import assert_array_equal
+from matplotlib.image import imread
+
+from arrview import export, render
+
+
+def _gray(a):
+    return np.stack([a, a, a, np.ones_like(a)], axis=-1)
+
+
+def test_encode_png_roundtrip(tmpdir):
+    rgba = np.random.randint(0, 256, size=(5, 7, 4)).astype('uint8')
+    filename = str(tmpdir.join('a.png'))
+    export.write_png(filename, rgba)
+    assert_array_equal((imread(filename) * 255).round().astype('uint8'), rgba)
+
+
+def test_slab_index_orders_slice_y_x():
+    arr = np.random.random((4, 5, 6, 7))
+    index, axes = export.slab_index(arr.shape, 3, 1, 3, xdim=0, ydim=2, point=(0, 2, 0, 0))
+    slab = arr[index].transpose(axes)
+    assert slab.shape == (2, 6, 4)
+    assert_array_equal(slab[1], arr[:, 2, :, 2].T)
+
+
+def test_export_slices_matches_render(tmpdir):
+    arr = np.random.random((6, 5, 9))
+    mask = arr > 0.7
+    pattern = str(tmpdir.join('out', 'slice_{index:02d}.png'))
+    calls = []
+    names = export.export_slices(arr, 2, pattern, _gray, 0.1, 0.9,
+                                 overlays=[(mask, (255, 0, 0, 102))],
+                                 workers=2, batch_bytes=1,
+                                 progress=lambda done, total: calls.append((done, total)))
+    assert [os.path.basename(n) for n in names] == ['slice_%02d.png' % i for i in range(9)]
+    assert calls[-1] == (9, 9)
+    expected = render.render(arr[:, :, 4], _gray, render.linear_norm(0.1, 0.9),
+                             [(mask[:, :, 4], (255, 0, 0, 102))])
+    assert_array_equal((imread(names[4]) * 255).round().astype('uint8'), expected)
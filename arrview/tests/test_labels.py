@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from arrview.labels import export_labels, import_labels, label_stats
+from arrview.roi import ROI
+from arrview.slicer import SliceTuple
+
+
+def _labels():
+    labels = np.zeros((4, 5, 6), dtype=int)
+    labels[:2, :2, 0] = 1
+    labels[2:, :, 3:] = 3
+    return labels
+
+
+def test_label_stats_matches_masks():
+    labels = _labels()
+    arr = np.random.random(labels.shape)
+    count, mean, std = label_stats(labels, arr, minlength=5)
+    for label in (1, 3):
+        np.testing.assert_allclose(mean[label], arr[labels == label].mean())
+        np.testing.assert_allclose(std[label], arr[labels == label].std())
+    assert count[3] == (labels == 3).sum()
+    assert np.isnan(mean[2])
+
+
+def test_import_shares_one_volume():
+    labels = _labels()
+    rois = import_labels(labels, names={3: 'three'})
+    assert [roi.label for roi in rois] == [1, 3]
+    assert [roi.name for roi in rois] == ['label_1', 'three']
+    assert rois[0].volume is rois[1].volume
+    assert rois[0].volume.labels.dtype == np.uint16
+    np.testing.assert_array_equal(rois[1].mask, labels == 3)
+    arr = np.random.random(labels.shape)
+    size, mean, std = rois[1].stats(arr)
+    assert size == (labels == 3).sum()
+    np.testing.assert_allclose(mean, arr[labels == 3].mean())
+
+
+def test_set_mask_takes_over_other_labels():
+    labels = _labels()
+    one, three = import_labels(labels)
+    updated = []
+    three.on_trait_change(lambda: updated.append(True), 'updated')
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[3, :] = True
+    one.set_mask(mask, SliceTuple(('y', 'x', 3)))
+    expected = labels == 1
+    expected[3, :, 3] = True
+    np.testing.assert_array_equal(one.mask, expected)
+    assert not three.mask[3, :, 3].any()
+    assert updated
+
+
+def test_bounds_follow_assign():
+    labels = _labels()
+    one, three = import_labels(labels)
+    assert one.bounds() == (slice(0, 2), slice(0, 2), slice(0, 1))
+    assert three.bounds() == (slice(2, 4), slice(0, 5), slice(3, 6))
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[3, :] = True
+    one.set_mask(mask, SliceTuple(('y', 'x', 3)))
+    assert one.bounds() == (slice(0, 4), slice(0, 5), slice(0, 4))
+    assert three.bounds() == (slice(2, 4), slice(0, 5), slice(3, 6))
+    mask[:] = False
+    one.set_mask(mask, SliceTuple(('y', 'x', 0)))
+    one.set_mask(mask, SliceTuple(('y', 'x', 3)))
+    assert one.bounds() is None
+
+
+def test_export_relabels_in_order():
+    labels = _labels()
+    one, three = import_labels(labels)
+    plain = ROI(name='plain', mask=np.zeros(labels.shape, dtype=bool))
+    plain.mask[0, 4, 5] = True
+    out = export_labels([three, plain, one], labels.shape)
+    assert out.dtype == np.uint16
+    np.testing.assert_array_equal(out == 1, labels == 3)
+    np.testing.assert_array_equal(out == 3, labels == 1)
+    assert out[0, 4, 5] == 2
+
+
+def test_import_copies_labels():
+    labels = _labels().astype(np.uint16)
+    rois = import_labels(labels)
+    rois[0].set_region((slice(0, 1), 0, 0), np.zeros(1, dtype=bool))
+    assert labels[0, 0, 0] == 1
+    shared = import_labels(labels, copy=False)
+    assert shared[0].volume.labels is labels
+
+
+def test_import_rejects_non_integer_labels():
+    with pytest.raises(ValueError):
+        import_labels(_labels() + 0.5)
+    with pytest.raises(ValueError):
+        import_labels(-_labels())
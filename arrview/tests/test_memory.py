@@ -0,0 +1,15 @@
+import numpy as np
+
+from arrview.memory import array_item
+from arrview.streaming import StreamingArray
+
+
+def test_array_item_counts_resident_arrays(tmpdir):
+    arr = np.zeros((4, 5, 6))
+    assert array_item(arr).nbytes == arr.nbytes
+    filename = str(tmpdir.join('arr.npy'))
+    np.save(filename, arr)
+    assert array_item(np.load(filename, mmap_mode='r')).nbytes == 0
+    stream = StreamingArray((4, 5), block_frames=2)
+    stream.append(np.zeros((4, 5)))
+    assert array_item(stream).nbytes == stream.nbytes
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy import ndimage
+
+from arrview.morphology import apply, bounding_box, dilate, erode, fill_holes, interpolate
+
+
+def _apply(mask, result):
+    region, sub = result
+    out = mask.copy()
+    out[region] = sub
+    return out
+
+
+def _cube():
+    mask = np.zeros((20, 30, 10), dtype=bool)
+    mask[5:10, 8:15, 3:6] = True
+    return mask
+
+
+def test_bounding_box():
+    mask = _cube()
+    assert bounding_box(mask) == (slice(5, 10), slice(8, 15), slice(3, 6))
+    assert bounding_box(mask, pad=4, dims=[0, 1]) == (slice(1, 14), slice(4, 19), slice(3, 6))
+    assert bounding_box(np.zeros((3, 3), dtype=bool)) is None
+
+
+def test_dilate_and_erode_match_dense():
+    mask = _cube()
+    np.testing.assert_array_equal(_apply(mask, dilate(mask, 2)),
+                                  ndimage.binary_dilation(mask, iterations=2))
+    np.testing.assert_array_equal(_apply(mask, erode(mask, 1)),
+                                  ndimage.binary_erosion(mask))
+    assert dilate(np.zeros((3, 3), dtype=bool)) == (None, None)
+
+
+def test_dilate_along_dims_only():
+    mask = _cube()
+    out = _apply(mask, dilate(mask, 1, dims=[0, 1]))
+    assert not out[:, :, 2].any() and not out[:, :, 6].any()
+    assert out[4, 8, 3] and out[10, 14, 5]
+
+
+def test_fill_holes_per_slice():
+    mask = _cube()
+    mask[6:9, 10:13, 4] = False
+    region, sub = fill_holes(mask, dims=[0, 1])
+    np.testing.assert_array_equal(_apply(mask, (region, sub)), _cube())
+
+
+def test_interpolate_between_drawn_slices():
+    mask = np.zeros((20, 20, 9), dtype=bool)
+    mask[5:10, 5:10, 0] = True
+    mask[5:15, 5:15, 8] = True
+    out = _apply(mask, interpolate(mask, dim=2))
+    np.testing.assert_array_equal(out[:, :, 0], mask[:, :, 0])
+    np.testing.assert_array_equal(out[:, :, 8], mask[:, :, 8])
+    sizes = out.sum(axis=(0, 1))
+    assert (np.diff(sizes) >= 0).all()
+    assert 25 < sizes[4] < 100
+
+
+def test_apply_reads_only_around_bounds():
+    mask = _cube()
+    boxes = []
+    def mask_view(index):
+        boxes.append(index)
+        return mask[index]
+    result = apply(dilate, mask_view, bounding_box(mask), mask.shape, n=2)
+    assert boxes == [(slice(3, 12), slice(6, 17), slice(1, 8))]
+    np.testing.assert_array_equal(_apply(mask, result), _apply(mask, dilate(mask, 2)))
+    np.testing.assert_array_equal(
+        _apply(mask, apply(erode, mask_view, bounding_box(mask), mask.shape)), ndimage.binary_erosion(mask))
+    assert apply(dilate, mask_view, None, mask.shape) == (None, None)
@@ -0,0 +1,42 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from arrview.probe import ColumnProbe
+from arrview.slicer import Slicer
+from arrview.source import ChunkedReader
+
+from counting import CountingArray
+
+
+def test_column_matches_indexing():
+    arr = np.random.random((5, 6, 7, 8))
+    probe = ColumnProbe(arr)
+    assert_array_equal(probe.column((1, 2, 3, 0), 3), arr[1, 2, 3, :])
+    assert_array_equal(probe.column((1, 2, 0, 4), 2), arr[1, 2, :, 4])
+
+
+def test_column_is_cached_per_data_key():
+    arr = np.arange(60).reshape(3, 4, 5)
+    src = CountingArray(arr, (3, 4, 5))
+    probe = ColumnProbe(ChunkedReader(src))
+    probe.column((1, 2, 0), 2, data_key=0)
+    probe.column((1, 2, 3), 2, data_key=0)
+    assert src.reads == 1
+    probe.column((1, 2, 3), 2, data_key=1)
+    assert src.reads == 2
+
+
+def test_column_does_not_fill_chunk_cache():
+    arr = np.arange(60).reshape(3, 4, 5)
+    reader = ChunkedReader(CountingArray(arr, (3, 4, 5)))
+    assert_array_equal(ColumnProbe(reader).column((0, 1, 0), 2), arr[0, 1])
+    assert len(reader.cache) == 0
+
+
+def test_slicer_column_follows_updates():
+    arr = np.zeros((4, 5, 6))
+    slicer = Slicer(arr)
+    assert_array_equal(slicer.column((1, 2, 0), 2), np.zeros(6))
+    arr[1, 2, 3] = 7
+    slicer.update(region=np.s_[1, 2, 3])
+    assert slicer.column((1, 2, 0), 2)[3] == 7
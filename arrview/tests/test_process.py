@@ -0,0 +1,58 @@
+import multiprocessing
+import sys
+
+import numpy as np
+from numpy.testing import assert_array_equal
+import pytest
+
+from arrview.process import (_array_from_spec, _array_spec, _context, _deserialize_rois,
+                             shared_array)
+
+
+def test_shared_array_is_mapped_by_filename():
+    arr = shared_array((4, 5), dtype='int16')
+    arr[:] = np.arange(20).reshape(4, 5)
+    spec = _array_spec(arr)
+    assert spec[0] == 'memmap'
+    mapped = _array_from_spec(spec)
+    assert_array_equal(arr, mapped)
+    arr[0, 0] = 100
+    assert mapped[0, 0] == 100
+
+
+def test_view_of_memmap_is_not_mapped_by_filename():
+    arr = shared_array((4, 5))
+    spec = _array_spec(arr[::2])
+    assert spec[0] == 'inherit'
+
+
+def test_deserialize_rois():
+    mask = np.zeros((3, 5), dtype=bool)
+    mask[1, 2:4] = True
+    data = [('roi_00', (0, 255, 0), np.packbits(mask), mask.shape)]
+    roi, = _deserialize_rois(data)
+    assert roi.name == 'roi_00'
+    assert_array_equal(mask, roi.mask)
+
+
+class _QApplication(object):
+    @staticmethod
+    def instance():
+        return object()
+
+
+class _QtGui(object):
+    QApplication = _QApplication
+
+
+def test_no_fork_with_running_qapplication(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'PySide.QtGui', _QtGui)
+    arr = shared_array((4, 5))
+    assert _array_spec(arr)[0] == 'memmap'
+    if hasattr(multiprocessing, 'get_context'):
+        assert _context().get_start_method() != 'fork'
+        with pytest.raises(ValueError):
+            _array_spec(np.zeros((4, 5)))
+    else:
+        with pytest.raises(RuntimeError):
+            _array_spec(np.zeros((4, 5)))
@@ -0,0 +1,32 @@
+import json
+import os
+
+from arrview.profiling import Profiler, directory_from_environment
+
+
+def test_profile_saved_with_state(tmpdir):
+    profiler = Profiler(str(tmpdir), state=lambda: {'mode': 'pan'})
+    assert profiler.toggle() is None
+    assert profiler.running
+    sum(range(1000))
+    filename = profiler.toggle()
+    assert not profiler.running
+    assert os.path.isfile(filename)
+    with open(os.path.splitext(filename)[0] + '.json') as f:
+        info = json.load(f)
+    assert info['interaction'] == 'manual'
+    assert info['viewer'] == {'mode': 'pan'}
+
+
+def test_stop_without_start_saves_nothing(tmpdir):
+    assert Profiler(str(tmpdir)).stop() is None
+    assert tmpdir.listdir() == []
+
+
+def test_directory_from_environment(monkeypatch):
+    monkeypatch.setenv('ARRVIEW_PROFILE', '0')
+    assert directory_from_environment() is None
+    monkeypatch.setenv('ARRVIEW_PROFILE', '1')
+    assert directory_from_environment() == os.getcwd()
+    monkeypatch.setenv('ARRVIEW_PROFILE', '/tmp/profiles')
+    assert directory_from_environment() == '/tmp/profiles'
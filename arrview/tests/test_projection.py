@@ -0,0 +1,88 @@
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from arrview.projection import Projection, Projector
+from arrview.slicer import SliceTuple
+from arrview.source import ChunkedReader
+
+from counting import CountingArray
+
+
+def _arr():
+    return np.random.RandomState(0).random_sample((6, 7, 10, 3))
+
+
+# Elements of one (6, 7) plane of _arr
+_plane = 6 * 7
+
+
+def test_ops_match_numpy():
+    arr = _arr()
+    slc = SliceTuple(('y', 'x', 0, 2))
+    projector = Projector(arr)
+    for op, fn in [('max', np.max), ('min', np.min), ('mean', np.mean), ('std', np.std)]:
+        result = projector.project(slc, Projection(op, 2, 2, 8))
+        assert_array_almost_equal(fn(arr[:, :, 2:8, 2], axis=2), result)
+
+
+def test_transposed_view():
+    arr = _arr()
+    slc = SliceTuple(('x', 'y', 0, 1))
+    result = Projector(arr).project(slc, Projection('max', 2, 0, 10))
+    assert_array_equal(arr[:, :, :, 1].max(axis=2).T, result)
+
+
+def test_projection_over_chunked_source():
+    arr = _arr()
+    reader = ChunkedReader(CountingArray(arr, chunks=(3, 7, 4, 1)))
+    slc = SliceTuple(('y', 'x', 0, 0))
+    result = Projector(reader).project(slc, Projection('mean', 2, 1, 9))
+    assert_array_almost_equal(arr[:, :, 1:9, 0].mean(axis=2), result)
+
+
+def test_cached():
+    src = CountingArray(_arr())
+    projector = Projector(src)
+    slc = SliceTuple(('y', 'x', 0, 0))
+    projector.project(slc, Projection('max', 2, 0, 10))
+    read = src.elements_read
+    projector.project(SliceTuple(('y', 'x', 5, 0)), Projection('max', 2, 0, 10))
+    assert src.elements_read == read
+
+
+def test_incremental_range_change():
+    arr = _arr()
+    src = CountingArray(arr)
+    projector = Projector(src)
+    slc = SliceTuple(('y', 'x', 0, 0))
+    projector.project(slc, Projection('mean', 2, 2, 8))
+    read = src.elements_read
+    result = projector.project(slc, Projection('mean', 2, 3, 8))
+    assert src.elements_read - read == _plane
+    assert_array_almost_equal(arr[:, :, 3:8, 0].mean(axis=2), result)
+
+    read = src.elements_read
+    result = projector.project(slc, Projection('max', 2, 2, 8))
+    projector.project(slc, Projection('max', 2, 2, 9))
+    assert src.elements_read - read == 7 * _plane
+
+
+def test_max_shrinking_recomputes():
+    arr = _arr()
+    projector = Projector(arr)
+    slc = SliceTuple(('y', 'x', 0, 0))
+    projector.project(slc, Projection('max', 2, 0, 10))
+    result = projector.project(slc, Projection('max', 2, 0, 9))
+    assert_array_equal(arr[:, :, :9, 0].max(axis=2), result)
+
+
+def test_invalidate():
+    arr = _arr()
+    projector = Projector(arr)
+    slc = SliceTuple(('y', 'x', 0, 0))
+    projector.project(slc, Projection('max', 2, 0, 5))
+    projector.project(SliceTuple(('y', 'x', 0, 1)), Projection('max', 2, 0, 5))
+    arr[:, :, 3, 0] = 2
+    projector.invalidate(((0, 6), (0, 7), (3, 4), (0, 1)))
+    assert len(projector.cache) == 1
+    assert_array_equal(np.full((6, 7), 2.0), projector.project(slc, Projection('max', 2, 0, 5)))
@@ -0,0 +1,44 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from arrview import render
+
+
+def _gray(a):
+    return np.stack([a, a, a, np.ones_like(a)], axis=-1)
+
+
+def test_colorize_is_opaque_rgba():
+    x = np.linspace(0, 1, 12).reshape(3, 4)
+    rgba = render.colorize(x, _gray, lambda a: a)
+    assert rgba.shape == (3, 4, 4) and rgba.dtype == np.uint8
+    assert_array_equal(rgba[..., 3], 255)
+    assert_array_equal(rgba[..., 0], (255 * x).astype('uint8'))
+
+
+def test_render_stack_matches_single_slices():
+    stack = np.random.random((5, 6, 7))
+    mask = stack > 0.5
+    norm = render.linear_norm(0.2, 0.8)
+    overlays = [(mask, (255, 0, 0, 128))]
+    batch = render.render(stack, _gray, norm, overlays)
+    for i in range(len(stack)):
+        single = render.render(stack[i], _gray, norm, [(mask[i], (255, 0, 0, 128))])
+        assert_array_equal(batch[i], single)
+
+
+def test_overlay_composites_only_inside_mask():
+    x = np.zeros((2, 2))
+    mask = np.array([[True, False], [False, False]])
+    rgba = render.render(x, _gray, lambda a: a, [(mask, (255, 0, 0, 255))])
+    assert tuple(rgba[0, 0]) == (255, 0, 0, 255)
+    assert tuple(rgba[1, 1]) == (0, 0, 0, 255)
+
+
+def test_rgba_to_argb32():
+    rgba = np.array([[[1, 2, 3, 4]]], dtype='uint8')
+    assert render.rgba_to_argb32(rgba)[0, 0] == (4 << 24 | 1 << 16 | 2 << 8 | 3)
+
+
+def test_normalize_constant_range():
+    assert_array_equal(render.normalize(np.arange(3.0), 1, 1), np.zeros(3))
@@ -0,0 +1,113 @@
+import os
+import tempfile
+
+from traits.api import HasTraits, Instance, Int, List, Str
+
+from arrview.replay import Recorder, _apply, load_recording, summarize
+from arrview.tools.base import MouseState
+
+
+class FreeDim(HasTraits):
+    dim = Int(2)
+    val = Int
+
+
+class SlicerDims(HasTraits):
+    freedim = Instance(FreeDim, ())
+
+
+class BottomPanel(object):
+    def __init__(self):
+        self.slicerDims = SlicerDims()
+
+
+class ROIView(HasTraits):
+    index = Int
+
+
+class ROIManager(HasTraits):
+    roiviews = List
+    selection = List
+
+
+class Viewer(HasTraits):
+    '''Stands in for an ArrayViewer, with the traits a recording touches'''
+    mode = Str('pan')
+    roi_manager = Instance(ROIManager, ())
+    tools = List
+
+    def __init__(self, **traits):
+        super(Viewer, self).__init__(**traits)
+        self.bottomPanel = BottomPanel()
+        self.roi_manager.roiviews = [ROIView(index=i) for i in (1, 2, 3)]
+
+    def add_tool(self, tool):
+        self.tools.append(tool)
+
+    def remove_tool(self, tool):
+        self.tools.remove(tool)
+
+
+def _mouse_record(event, coords=(1.5, 2.5)):
+    return {'kind': 'mouse', 'event': event, 'coords': list(coords),
+            'screenCoords': [10.0, 20.0], 'buttons': [True, False, False],
+            'delta': 0, 'path': [list(coords)]}
+
+
+def test_record_round_trip():
+    viewer = Viewer()
+    _, filename = tempfile.mkstemp(suffix='.jsonl')
+    try:
+        recorder = Recorder(viewer, filename).start()
+        assert len(viewer.tools) == 1
+        recorder.write(_mouse_record('pressed'))
+        viewer.mode = 'draw'
+        viewer.bottomPanel.slicerDims.freedim.val = 3
+        viewer.roi_manager.selection = viewer.roi_manager.roiviews[1:]
+        recorder.stop()
+        assert viewer.tools == []
+        viewer.mode = 'erase'
+        records = load_recording(filename)
+    finally:
+        os.remove(filename)
+    assert [r['kind'] for r in records] == ['mouse', 'mode', 'freedim', 'selection']
+    assert records[0]['coords'] == [1.5, 2.5] and records[0]['event'] == 'pressed'
+    assert records[1]['value'] == 'draw'
+    assert (records[2]['dim'], records[2]['value']) == (2, 3)
+    assert records[3]['value'] == [2, 3]
+    times = [r['t'] for r in records]
+    assert times == sorted(times)
+
+
+def test_apply_drives_mouse_and_viewer():
+    viewer = Viewer()
+    mouse = MouseState()
+    pressed = []
+    mouse.on_trait_change(lambda: pressed.append(mouse.coords), 'pressed')
+    _apply(viewer, mouse, _mouse_record('pressed', (4.0, 5.0)))
+    assert pressed == [(4.0, 5.0)]
+    assert mouse.buttons.left and mouse.path == [(4.0, 5.0)]
+
+    _apply(viewer, mouse, {'kind': 'mode', 'value': 'draw'})
+    assert viewer.mode == 'draw'
+    freedim = viewer.bottomPanel.slicerDims.freedim
+    _apply(viewer, mouse, {'kind': 'freedim', 'dim': 2, 'value': 4})
+    _apply(viewer, mouse, {'kind': 'freedim', 'dim': 3, 'value': 7})
+    assert freedim.val == 4
+
+    manager = viewer.roi_manager
+    _apply(viewer, mouse, {'kind': 'selection', 'value': [0, 2, 3, 9]})
+    assert manager.selection == manager.roiviews[1:]
+
+
+def test_summarize_per_event_kind():
+    results = [(_mouse_record('moved'), s) for s in (0.001, 0.002, 0.003, 0.004)]
+    results.append(({'kind': 'mode', 'value': 'draw'}, 0.010))
+    summary = summarize(results, q=(50, 90))
+    assert sorted(summary) == ['mode', 'mouse:moved']
+    moved = summary['mouse:moved']
+    assert sorted(moved) == ['count', 'max', 'p50', 'p90']
+    assert moved['count'] == 4
+    assert abs(moved['p50'] - 2.5) < 1e-9
+    assert abs(moved['max'] - 4.0) < 1e-9
+    assert summary['mode']['count'] == 1
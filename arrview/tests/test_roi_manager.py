@@ -1,10 +1,23 @@
 import numpy as np
+from scipy import ndimage
 
+import traits.trait_notifiers as notifiers
 from traits.testing.unittest_tools import unittest
 from traits.testing.api import UnittestTools
 
+from arrview.labels import import_labels
+from arrview.morphology import dilate
 from arrview.roi import ROIManager
 from arrview.slicer import Slicer
+from arrview.streaming import StreamingArray
+
+
+class CountingStream(StreamingArray):
+    frames_read = 0
+
+    def frame(self, i):
+        self.frames_read += 1
+        return super(CountingStream, self).frame(i)
 
 
 class TestROIManager(unittest.TestCase, UnittestTools):
@@ -29,3 +42,100 @@ class TestROIManager(unittest.TestCase, UnittestTools):
 
         expected = [(roimngr, 'rois', prevROIs, [])]
         self.assertSequenceEqual(result.events, expected)
+
+    def test_rows_updated_in_place(self):
+        slicer = Slicer(np.zeros((3, 3)))
+        roimngr = ROIManager(slicer=slicer)
+        for _ in range(4):
+            roimngr.new_roi()
+        roiviews = roimngr.roiviews
+        with self.assertTraitChanges(roimngr, 'roiviews_items', count=1):
+            del roimngr.rois[1]
+        self.assertIs(roimngr.roiviews, roiviews)
+        self.assertEqual([rv.roi for rv in roimngr.roiviews], list(roimngr.rois))
+        self.assertEqual([rv.index for rv in roimngr.roiviews], [1, 2, 3])
+
+    def test_roiviews_changes_are_announced(self):
+        roimngr = ROIManager(slicer=Slicer(np.zeros((3, 3))))
+        changes = []
+        roimngr.on_trait_change(lambda new: changes.append((new, len(roimngr.roiviews))),
+                                'roiviews_changing')
+        for _ in range(5):
+            roimngr.new_roi()
+        del roimngr.rois[1:3]
+        roimngr.rois = roimngr.rois[::-1]
+        self.assertEqual(changes[:5], [(('insert', i, 1), i) for i in range(5)])
+        self.assertEqual(changes[5:], [(('remove', 1, 2), 5), (('reset',), 3)])
+
+    def test_stats_computed_when_read(self):
+        arr = np.arange(9.).reshape(3, 3)
+        roimngr = ROIManager(slicer=Slicer(arr))
+        roi = roimngr.new_roi()
+        rv = roimngr.roiviews[0]
+        self.assertTrue(rv._stale)
+        roi.set_mask(np.eye(3, dtype=bool), roimngr.slicer.slc)
+        self.assertEqual(rv.size, 3)
+        self.assertAlmostEqual(rv.mean, 4.0)
+
+    def test_add_region_to_selected_roi(self):
+        roimngr = ROIManager(slicer=Slicer(np.zeros((4, 4, 4))))
+        roi = roimngr.new_roi()
+        added = roimngr.add_region((slice(1, 3), 2, slice(0, 2)), np.ones((2, 2), dtype=bool))
+        self.assertIs(added, roi)
+        self.assertEqual(roi.mask.sum(), 4)
+        self.assertTrue(roi.mask[1:3, 2, 0:2].all())
+        roimngr.selection = []
+        self.assertIsNot(roimngr.add_region((0, 0, 0), True), roi)
+        self.assertEqual(len(roimngr.rois), 2)
+        self.assertIsNone(roimngr.add_region((slice(0, 0),) * 3, np.zeros((0, 0, 0), dtype=bool)))
+        self.assertEqual(len(roimngr.rois), 2)
+
+    def test_apply_morphology_to_selection(self):
+        # Without a GUI, run handlers dispatched to the UI thread right away
+        previous = notifiers.ui_handler
+        notifiers.set_ui_handler(lambda handler, *args: handler(*args))
+        try:
+            roimngr = ROIManager(slicer=Slicer(np.zeros((5, 5))))
+            roi = roimngr.new_roi()
+            roi.mask[2, 2] = True
+            roimngr.apply_morphology(dilate, n=1).join()
+        finally:
+            notifiers.set_ui_handler(previous)
+        self.assertEqual(roi.mask.sum(), 5)
+        self.assertFalse(roimngr.busy)
+
+    def test_apply_morphology_to_labels(self):
+        labels = np.zeros((5, 6, 4), dtype=int)
+        labels[0, 1:3, 1] = 1
+        labels[3, 3, 2] = 2
+        previous = notifiers.ui_handler
+        notifiers.set_ui_handler(lambda handler, *args: handler(*args))
+        try:
+            roimngr = ROIManager(slicer=Slicer(np.zeros(labels.shape)))
+            rois = import_labels(labels)
+            roimngr.add_rois(rois)
+            roimngr.selection = roimngr.roiviews[:1]
+            roimngr.apply_morphology(dilate, n=1).join()
+        finally:
+            notifiers.set_ui_handler(previous)
+        np.testing.assert_array_equal(rois[0].mask, ndimage.binary_dilation(labels == 1))
+        np.testing.assert_array_equal(rois[1].mask, labels == 2)
+
+    def test_streaming_masks_grow_and_curves_extend(self):
+        stream = CountingStream((3, 4), axis=-1)
+        stream.extend(np.ones((3, 4, 2)))
+        roimngr = ROIManager(slicer=Slicer(stream))
+        roi = roimngr.new_roi()
+        roimngr.update_mask(roi, np.eye(3, 4, dtype=bool))
+        rv = roimngr.roiviews[0]
+        np.testing.assert_allclose(rv.time_curve(), [1, 1])
+        stream.frames_read = 0
+        stream.extend(np.full((3, 4, 2), 3.0))
+        roimngr.slicer.update(region=np.s_[:, :, 2:4], appended=True)
+        self.assertEqual(roi.mask.shape, (3, 4, 4))
+        self.assertEqual(stream.frames_read, 2)
+        np.testing.assert_allclose(rv.time_curve(), [1, 1, 3, 3])
+        roimngr.slicer.set_freedim(2, 3)
+        roimngr.update_mask(roi, np.eye(3, 4, dtype=bool))
+        self.assertEqual(rv.size, 6)
+        self.assertAlmostEqual(rv.mean, 2.0)
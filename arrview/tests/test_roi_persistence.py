@@ -4,6 +4,7 @@ import tempfile
 import numpy as np
 from numpy.testing import assert_array_equal
 
+from arrview.labels import import_labels
 from arrview.roi import ROI
 from arrview.roi_persistence import load_rois, store_rois
 
@@ -24,3 +25,15 @@ def test_load_old_format():
     filename = os.path.join(dirname, 'data/old_roi_format.h5')
     rois = load_rois(filename, shape=(128, 128, 5, 5))
     #TODO: validate
+
+
+def test_save_label_rois():
+    labels = np.zeros((3, 4, 5), dtype=int)
+    labels[1, :2, :] = 1
+    labels[2, 3, 1:] = 2
+    rois = import_labels(labels)
+    _, filename = tempfile.mkstemp()
+    store_rois(rois, filename)
+    lrois = load_rois(filename)
+    for roi, lroi in zip(rois, lrois):
+        assert_array_equal(labels == roi.label, lroi.mask)
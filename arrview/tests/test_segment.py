@@ -0,0 +1,55 @@
+import numpy as np
+
+from arrview.segment import grow_region, threshold
+
+
+def _blobs():
+    arr = np.zeros((40, 50, 30))
+    arr[5:10, 5:12, 5:8] = 10
+    arr[20:35, 2:48, 3:27] = 10
+    arr[25, 25, 15] = 10.5
+    return arr
+
+
+def test_grow_region_finds_connected_component():
+    arr = _blobs()
+    region, mask = grow_region(arr, (6, 6, 6), tolerance=1, box=4)
+    full = np.zeros(arr.shape, dtype=bool)
+    full[region] = mask
+    expected = np.zeros(arr.shape, dtype=bool)
+    expected[5:10, 5:12, 5:8] = True
+    np.testing.assert_array_equal(full, expected)
+    assert mask.shape == (5, 7, 3)
+
+
+def test_grow_region_box_grows_to_fit():
+    arr = _blobs()
+    region, mask = grow_region(arr, (25, 25, 15), tolerance=1, box=4)
+    assert mask.sum() == 15 * 46 * 24
+    assert region == (slice(20, 35), slice(2, 48), slice(3, 27))
+
+
+def test_grow_region_in_slice():
+    arr = _blobs()
+    region, mask = grow_region(arr, (6, 6, 6), tolerance=1, index=(slice(None), slice(None), 6))
+    assert region == (slice(5, 10), slice(5, 12), 6)
+    assert mask.all() and mask.shape == (5, 7)
+
+
+def test_threshold_crops_to_bounding_box():
+    arr = _blobs()
+    region, mask = threshold(arr, 10.2, 11)
+    assert region == (slice(25, 26), slice(25, 26), slice(15, 16))
+    assert mask.sum() == 1
+    region, mask = threshold(arr, 20, 30, index=(slice(None), 0, slice(None)))
+    assert mask.size == 0
+
+
+def test_grow_region_from_nan_finds_nothing():
+    arr = np.zeros((30, 100))
+    arr[3, 4] = np.nan
+    for index in [None, (slice(None), slice(None))]:
+        region, mask = grow_region(arr, (3, 4), tolerance=1, index=index)
+        assert mask.size == 0
+    region, mask = grow_region(np.zeros((5, 5)), (1, 1), tolerance=-1)
+    assert mask.size == 0
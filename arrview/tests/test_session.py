@@ -0,0 +1,47 @@
+from matplotlib import cm
+import numpy as np
+
+from arrview.colormapper import ColorMapper, ndarray_to_pixdata
+from arrview.session import Session
+from arrview.slicer import SliceTuple
+
+
+def test_same_array_shares_slicer():
+    session = Session()
+    arr = np.zeros((4, 5, 6))
+    assert session.slicer(arr) is session.slicer(arr)
+    assert session.slicer(arr) is not session.slicer(np.zeros((4, 5, 6)))
+
+
+def test_linked_free_dims():
+    session = Session()
+    a = session.slicer(np.zeros((4, 5, 6)))
+    b = session.slicer(np.ones((4, 5, 6)))
+    c = session.slicer(np.ones((4, 5, 7)))
+    a.set_freedim(2, 3)
+    assert b.slc == SliceTuple(('y', 'x', 3))
+    assert c.slc == SliceTuple(('y', 'x', 0))
+
+
+def test_unlinked_free_dims():
+    session = Session(linked=False)
+    a = session.slicer(np.zeros((4, 5, 6)))
+    b = session.slicer(np.ones((4, 5, 6)))
+    a.set_freedim(2, 3)
+    assert b.slc == SliceTuple(('y', 'x', 0))
+
+
+def test_render_shows_projection():
+    session = Session()
+    arr = np.zeros((4, 5, 6))
+    arr[:, :, 3] = 1
+    slicer = session.slicer(arr)
+    cmap = ColorMapper(slicer=slicer, stats_index=session.stats, cmap=cm.gray)
+    plain = session.render(slicer, cmap)
+    slicer.set_projection('max', 2)
+    projected = session.render(slicer, cmap)
+    assert projected is not plain
+    np.testing.assert_array_equal(projected._array, ndarray_to_pixdata(
+        np.ones((4, 5)), cmap.cmap, cmap.norm.normalize))
+    slicer.clear_projection()
+    assert session.render(slicer, cmap) is plain
@@ -4,7 +4,7 @@ from numpy.testing import assert_array_equal
 from traits.testing.unittest_tools import unittest
 from traits.testing.api import UnittestTools
 
-from arrview.slicer import Slicer, SliceTuple
+from arrview.slicer import OrthoSlicer, Slicer, SliceTuple
 
 
 class TestSlicer(unittest.TestCase, UnittestTools):
@@ -94,3 +94,139 @@ class TestSlicer(unittest.TestCase, UnittestTools):
         self.assertTrue(slc.is_transposed_view_of(slcT))
         self.assertTrue(slcT.is_transposed_view_of(slc))
         self.assertFalse(slc.is_transposed_view_of(slc))
+
+
+class TestSlicerReorder(unittest.TestCase):
+    def setUp(self):
+        self.arr = np.arange(4*5*6).reshape(4,5,6)
+
+    def test_no_copy_without_budget(self):
+        slicer = Slicer(self.arr, xdim=0, ydim=2)
+        assert slicer._reordered is None
+
+    def test_no_copy_for_contiguous_view(self):
+        slicer = Slicer(self.arr, xdim=2, ydim=1, reorder_budget=2**20)
+        assert slicer._reordered is None
+
+    def test_no_copy_over_budget(self):
+        slicer = Slicer(self.arr, xdim=0, ydim=2, reorder_budget=16)
+        assert slicer._reordered is None
+
+    def test_view_served_from_reordered_copy(self):
+        slicer = Slicer(self.arr, xdim=0, ydim=2, reorder_budget=2**20)
+        self.assertTrue(slicer._reordered.wait(5))
+        slicer.set_freedim(1, 3)
+        assert slicer.view.flags.c_contiguous
+        assert_array_equal(self.arr[:,3,:].T, slicer.view)
+
+    def test_viewdims_change_replaces_copy(self):
+        slicer = Slicer(self.arr, xdim=0, ydim=2, reorder_budget=2**20)
+        first = slicer._reordered
+        slicer.set_viewdims(1, 0)
+        assert slicer._reordered is not first
+        self.assertTrue(slicer._reordered.wait(5))
+        slicer.set_freedim(2, 4)
+        assert_array_equal(self.arr[:,:,4], slicer.view)
+
+
+class TestSlicerUpdate(unittest.TestCase, UnittestTools):
+    def setUp(self):
+        self.arr = np.arange(4*5*6).reshape(4,5,6)
+        self.slicer = Slicer(self.arr)
+
+    def test_update_in_view(self):
+        self.slicer.view
+        self.arr[:, :, 0] = -1
+        with self.assertTraitChanges(self.slicer, 'view'):
+            assert self.slicer.update(region=(slice(None), slice(None), 0))
+        assert_array_equal(self.arr[:, :, 0], self.slicer.view)
+
+    def test_update_outside_view(self):
+        with self.assertTraitDoesNotChange(self.slicer, 'view'):
+            assert not self.slicer.update(region=(slice(None), slice(None), slice(2, 4)))
+
+    def test_update_fires_data_changed(self):
+        with self.assertTraitChanges(self.slicer, 'data_changed') as result:
+            self.slicer.update(region=(1, slice(None), 3))
+        assert result.events[0][3] == ((1, 2), (0, 5), (3, 4))
+
+    def test_update_replaces_array(self):
+        arr = self.arr * 2
+        self.slicer.update(arr=arr)
+        assert self.slicer.arr is arr
+        assert_array_equal(arr[:, :, 0], self.slicer.view)
+
+    def test_update_refreshes_reordered_copy(self):
+        slicer = Slicer(self.arr, xdim=0, ydim=2, reorder_budget=2**20)
+        self.assertTrue(slicer._reordered.wait(5))
+        self.arr[:, 1, :] = -1
+        slicer.update(region=(slice(None), 1))
+        slicer.set_freedim(1, 1)
+        assert_array_equal(self.arr[:, 1, :].T, slicer.view)
+
+
+def test_slicetuple_intersects():
+    slc = SliceTuple(('y', 'x', 2, 0))
+    assert slc.intersects(((0, 1), (0, 5), (2, 3), (0, 1)))
+    assert not slc.intersects(((0, 1), (0, 5), (3, 4), (0, 1)))
+    assert not slc.intersects(((0, 0), (0, 5), (2, 3), (0, 1)))
+    assert slc.intersects(((0, 1), (0, 5), (4, 5), (0, 1)), {2: (0, 6)})
+    assert not slc.intersects(((0, 1), (0, 5), (4, 5), (0, 1)), {2: (0, 4)})
+
+
+class TestOrthoSlicer(unittest.TestCase, UnittestTools):
+    def setUp(self):
+        self.arr = np.arange(4*5*6*2).reshape(4,5,6,2)
+        self.ortho = OrthoSlicer(self.arr, dims=(1, 0, 2), point=(1, 2, 3, 1))
+
+    def test_planes(self):
+        axial, coronal, sagittal = self.ortho.planes
+        assert_array_equal(self.arr[:, :, 3, 1], axial.view)
+        assert_array_equal(self.arr[1, :, :, 1].T, coronal.view)
+        assert_array_equal(self.arr[:, 2, :, 1].T, sagittal.view)
+
+    def test_only_changed_planes_update(self):
+        axial, coronal, sagittal = self.ortho.planes
+        with self.assertTraitDoesNotChange(axial, 'view'):
+            with self.assertTraitChanges(coronal, 'view', count=1):
+                with self.assertTraitDoesNotChange(sagittal, 'view'):
+                    self.ortho.point = (3, 2, 3, 1)
+
+    def test_set_point_from_plane(self):
+        self.ortho.set_point_from_plane(1, 4.7, 100)
+        assert self.ortho.point == (1, 4, 5, 1)
+        assert self.ortho.value == self.arr[1, 4, 5, 1]
+
+
+class TestSlicerProjection(unittest.TestCase, UnittestTools):
+    def setUp(self):
+        self.arr = np.arange(4*5*6).reshape(4,5,6)
+        self.slicer = Slicer(self.arr)
+
+    def test_projection_view(self):
+        with self.assertTraitChanges(self.slicer, 'view'):
+            self.slicer.set_projection('max', 2, 1, 4)
+        assert_array_equal(self.arr[:, :, 1:4].max(axis=2), self.slicer.view)
+
+    def test_projection_ignored_when_dim_is_viewed(self):
+        self.slicer.set_projection('max', 2)
+        self.slicer.set_viewdims(2, 0)
+        assert_array_equal(self.arr[:, 0, :], self.slicer.view)
+
+    def test_clear_projection(self):
+        self.slicer.set_projection('mean', 2)
+        self.slicer.clear_projection()
+        assert_array_equal(self.arr[:, :, 0], self.slicer.view)
+
+    def test_update_inside_projected_range(self):
+        arr = np.zeros((4, 5, 6))
+        slicer = Slicer(arr)
+        slicer.set_projection('max', 2)
+        assert_array_equal(np.zeros((4, 5)), slicer.view)
+        arr[:, :, 3] = 7
+        with self.assertTraitChanges(slicer, 'view'):
+            assert slicer.update(region=np.s_[:, :, 3])
+        assert_array_equal(np.full((4, 5), 7.0), slicer.view)
+        arr[:, :, 4] = 9
+        assert slicer.update(region=np.s_[:, :, 4], appended=True)
+        assert_array_equal(np.full((4, 5), 9.0), slicer.view)
@@ -0,0 +1,59 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from arrview.slicer import Slicer
+from arrview.source import ChunkedReader, array_source
+
+from counting import CountingArray
+
+
+def _make(shape=(10, 12, 8), chunks=(4, 5, 3)):
+    arr = np.arange(np.prod(shape)).reshape(shape)
+    return arr, CountingArray(arr, chunks)
+
+
+def test_array_source_passes_through_ndarray():
+    arr = np.zeros((3, 3))
+    assert array_source(arr) is arr
+
+
+def test_array_source_wraps_chunked():
+    _, src = _make()
+    assert isinstance(array_source(src), ChunkedReader)
+
+
+def test_reader_matches_ndarray_indexing():
+    arr, src = _make()
+    reader = ChunkedReader(src)
+    for index in [(slice(None), slice(None), 2),
+                  (7, slice(None), slice(None)),
+                  (slice(None), 11, slice(None)),
+                  (slice(2, 9), slice(1, 7), 0),
+                  (3, 4, 5),
+                  [slice(None), slice(None), -1]]:
+        assert_array_equal(arr[tuple(index)], reader[index])
+
+
+def test_neighbouring_slices_read_each_chunk_once():
+    arr, src = _make()
+    reader = ChunkedReader(src)
+    for z in range(3):
+        reader[:, :, z]
+    # 3 chunks along dim 0, 3 along dim 1, one along dim 2
+    assert src.reads == 9
+
+
+def test_cache_is_bounded():
+    arr, src = _make(shape=(8, 10, 6))
+    chunk_bytes = 4 * 5 * 3 * arr.itemsize
+    reader = ChunkedReader(src, max_bytes=2 * chunk_bytes)
+    reader[:, :, 0]
+    assert len(reader.cache) == 2
+    assert reader.cache.nbytes <= 2 * chunk_bytes
+
+
+def test_slicer_view_through_chunked_source():
+    arr, src = _make()
+    slicer = Slicer(src)
+    slicer.set_freedim(2, 4)
+    assert_array_equal(arr[:, :, 4], slicer.view)
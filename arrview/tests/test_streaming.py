@@ -0,0 +1,95 @@
+import numpy as np
+
+from arrview.slicer import Slicer
+from arrview.streaming import StreamingArray, TimeCurves
+
+
+def _frames(n, shape=(4, 5)):
+    return [np.full(shape, i, dtype=float) + np.arange(shape[1]) for i in range(n)]
+
+
+def test_append_grows_along_axis():
+    s = StreamingArray((4, 5), axis=-1, block_frames=3)
+    for f in _frames(7):
+        s.append(f)
+    assert s.shape == (4, 5, 7)
+    assert len(s) == 7
+    expected = np.stack(_frames(7), axis=-1)
+    np.testing.assert_array_equal(np.asarray(s), expected)
+
+
+def test_growing_does_not_copy_blocks():
+    s = StreamingArray((4, 5), axis=0, block_frames=2)
+    s.append(np.zeros((4, 5)))
+    first = s._blocks[0]
+    for f in _frames(5):
+        s.append(f)
+    assert s._blocks[0] is first
+    assert len(s._blocks) == 3
+
+
+def test_getitem_matches_asarray():
+    s = StreamingArray((4, 5), axis=1, block_frames=3)
+    s.extend(np.stack(_frames(8), axis=1))
+    full = np.asarray(s)
+    for index in [np.s_[:, 3], np.s_[2, 1:6, :], np.s_[1:3, :, 4],
+                  np.s_[:, 5:5], np.s_[..., 2]]:
+        np.testing.assert_array_equal(s[index], full[index])
+
+
+def test_bool_mask_reads_touched_frames():
+    s = StreamingArray((4, 5), axis=1, block_frames=3)
+    s.extend(np.stack(_frames(8), axis=1))
+    mask = np.zeros(s.shape, dtype=bool)
+    mask[1:3, 2, 0] = True
+    mask[0, 6, 1:4] = True
+    np.testing.assert_array_equal(s[mask], np.asarray(s)[mask])
+    assert s[np.zeros(s.shape, dtype=bool)].size == 0
+
+
+def test_ring_keeps_newest_frames():
+    s = StreamingArray((4, 5), axis=-1, ring=True, capacity=3)
+    events = []
+    s.add_listener(lambda *args: events.append(args))
+    for f in _frames(5):
+        s.append(f)
+    assert s.shape == (4, 5, 3)
+    np.testing.assert_array_equal(np.asarray(s), np.stack(_frames(5)[2:], axis=-1))
+    assert events[:3] == [(0, 1, False), (1, 2, False), (2, 3, False)]
+    assert events[3:] == [(2, 3, True), (2, 3, True)]
+
+
+def test_time_curves_extend_incrementally():
+    s = StreamingArray((4, 5), axis=-1)
+    s.extend(np.stack(_frames(2), axis=-1))
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[1:3, 0] = True
+    curves = TimeCurves(s)
+    curves.add('a', mask)
+    for f in _frames(4)[2:]:
+        s.append(f)
+    np.testing.assert_allclose(curves.curve('a'), [0, 1, 2, 3])
+    assert curves.names() == ['a']
+
+
+def test_time_curves_ring():
+    s = StreamingArray((4, 5), axis=-1, ring=True, capacity=2)
+    curves = TimeCurves(s)
+    curves.add('all', np.ones((4, 5), dtype=bool))
+    for f in _frames(4):
+        s.append(f)
+    np.testing.assert_allclose(curves.curve('all'), [4, 5])
+
+
+def test_slicer_append_keeps_data_version():
+    s = StreamingArray((4, 5), axis=-1)
+    s.extend(np.stack(_frames(2), axis=-1))
+    slicer = Slicer(s)
+    version = slicer.data_version()
+    key = slicer.data_key()
+    s.append(_frames(3)[2])
+    assert not slicer.update(region=np.s_[:, :, 2:3], appended=True)
+    assert slicer.data_version() == version
+    assert slicer.data_key() != key
+    slicer.set_freedim(2, 2)
+    np.testing.assert_array_equal(slicer.view, _frames(3)[2])
@@ -0,0 +1,28 @@
+import logging
+
+from arrview import timing
+
+
+def test_disabled_stage_records_nothing():
+    timing.enable(False)
+    timing.reset()
+    with timing.stage('a'):
+        pass
+    assert timing.stages() == []
+
+
+def test_enabled_stage_records_and_logs(caplog):
+    timing.enable(True)
+    timing.reset()
+    try:
+        with caplog.at_level(logging.DEBUG, logger='arrview.timing'):
+            for _ in range(10):
+                with timing.stage('a'):
+                    pass
+        assert timing.stages() == ['a']
+        assert set(timing.percentiles('a')) == {50, 90, 99}
+        assert caplog.records[-1].stage == 'a'
+        assert timing.summary().startswith('a ')
+    finally:
+        timing.enable(False)
+        timing.reset()
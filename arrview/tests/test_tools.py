@@ -0,0 +1,42 @@
+from arrview.tools.base import GraphicsTool, GraphicsToolFactory, MouseState, ToolSet
+
+
+class _CountingTool(GraphicsTool):
+    def init(self):
+        self.moves = 0
+        self.deactivated = 0
+
+    def mouse_moved(self):
+        self.moves += 1
+
+    def deactivate(self):
+        self.deactivated += 1
+
+
+class CountingTool(GraphicsToolFactory):
+    klass = _CountingTool
+
+
+class Graphics(object):
+    pass
+
+
+def test_sync_tools_keeps_tools_across_factory_changes():
+    a, b = CountingTool(), CountingTool()
+    graphics, mouse = Graphics(), MouseState()
+    toolset = ToolSet(factories=[a, b])
+    tools = toolset.sync_tools({}, graphics, mouse)
+    tool_a, tool_b = tools[a], tools[b]
+
+    toolset.factories = [a]
+    toolset.sync_tools(tools, graphics, mouse)
+    assert tools[b] is tool_b and not tool_b.enabled
+    assert tool_b.deactivated == 1
+    mouse.moved = True
+    assert (tool_a.moves, tool_b.moves) == (1, 0)
+
+    toolset.factories = [a, b]
+    toolset.sync_tools(tools, graphics, mouse)
+    assert tools[b] is tool_b and tool_b.enabled
+    mouse.moved = True
+    assert (tool_a.moves, tool_b.moves) == (2, 1)
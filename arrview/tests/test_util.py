@@ -0,0 +1,29 @@
+import numpy as np
+
+from arrview.util import grow_array, merge_bounds, region_bounds
+
+
+def test_region_bounds_full():
+    assert region_bounds(None, (3, 4)) == ((0, 3), (0, 4))
+
+
+def test_region_bounds_mixed():
+    assert region_bounds((1, slice(1, None)), (3, 4, 5)) == ((1, 2), (1, 4), (0, 5))
+    assert region_bounds((-1,), (3,)) == ((2, 3),)
+    assert region_bounds((slice(None, None, -1),), (3,)) == ((0, 3),)
+
+
+def test_merge_bounds():
+    assert merge_bounds(None, ((0, 1),)) == ((0, 1),)
+    assert merge_bounds(((0, 2), (3, 4)), ((1, 5), (0, 1))) == ((0, 5), (0, 4))
+
+
+def test_grow_array():
+    arr = np.ones((2, 3), dtype=bool)
+    base, grown = grow_array(arr, (2, 4))
+    assert grown.shape == (2, 4)
+    assert grown[:, :3].all() and not grown[:, 3].any()
+    grown[0, 3] = True
+    same, regrown = grow_array(grown, (2, 5), base)
+    assert same is base
+    assert regrown[0, 3] and regrown.shape == (2, 5)
@@ -0,0 +1,44 @@
+import logging
+import threading
+
+from arrview import watchdog
+
+
+def test_stall_reported_once_with_stack_and_state(caplog):
+    detector = watchdog.StallDetector(threading.current_thread().ident, 0.5,
+                                      state=lambda: {'mode': 'draw'})
+    detector.beat()
+    start = detector._last_beat
+    with caplog.at_level(logging.WARNING, logger='arrview.watchdog'):
+        assert not detector.check(start + 0.1)
+        assert detector.check(start + 1)
+        assert detector.check(start + 2)
+        detector.beat()
+        assert not detector.check()
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 2
+    assert 'stalled' in messages[0] and "'mode': 'draw'" in messages[0]
+    assert 'test_stall_reported_once_with_stack_and_state' in messages[0]
+    assert 'recovered' in messages[1]
+
+
+def test_threshold_from_environment(monkeypatch):
+    monkeypatch.delenv('ARRVIEW_WATCHDOG', raising=False)
+    assert watchdog.threshold_from_environment() is None
+    monkeypatch.setenv('ARRVIEW_WATCHDOG', '0.25')
+    assert watchdog.threshold_from_environment() == 0.25
+    monkeypatch.setenv('ARRVIEW_WATCHDOG', 'yes')
+    assert watchdog.threshold_from_environment() == watchdog._default_threshold
+
+
+def test_viewers_share_one_watchdog(monkeypatch):
+    monkeypatch.setattr(watchdog.Watchdog, 'start', lambda self: self)
+    a, b = object(), object()
+    shared = watchdog.install(a, threshold=1)
+    assert watchdog.install(b, threshold=1) is shared
+    watchdog.uninstall(a)
+    assert not shared._stop.is_set()
+    watchdog.uninstall(b)
+    assert shared._stop.is_set()
+    assert watchdog.install(a, threshold=1) is not shared
+    watchdog.uninstall(a)
@@ -0,0 +1,112 @@
+'''Timing of the stages of rendering and editing.
+
+Timing is off by default; stage() then returns a shared no-op context
+manager, so instrumented code pays one function call and a flag check.
+Enable it with enable() or by setting the environment variable
+ARRVIEW_TIMING=1. Each timed stage is logged at DEBUG level on this
+module's logger, with the stage name and milliseconds in the record's
+stage and ms attributes, and kept in a rolling window for percentiles.
+
+Example:
+>>> with timing.stage('slice'):
+...     view = slc.viewarray(arr)
+>>> timing.percentiles('slice')
+{50: 0.8, 90: 1.3, 99: 2.1}
+'''
+from collections import OrderedDict, deque
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+
+log = logging.getLogger(__name__)
+
+# Number of recent samples kept per stage
+_window = 200
+
+_enabled = os.environ.get('ARRVIEW_TIMING', '') not in ('', '0')
+_samples = OrderedDict()
+_lock = threading.Lock()
+
+
+class _NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null_stage = _NullStage()
+
+
+class _Stage(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.time() - self._start)
+        return False
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def stage(name):
+    '''Context manager timing the enclosed block as stage name'''
+    if not _enabled:
+        return _null_stage
+    return _Stage(name)
+
+
+def record(name, seconds):
+    '''Add a duration of stage name, in seconds'''
+    ms = 1000.0 * seconds
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=_window)
+        samples.append(ms)
+    log.debug('%s took %0.2f ms', name, ms, extra={'stage': name, 'ms': ms})
+
+
+def stages():
+    with _lock:
+        return list(_samples)
+
+
+def percentiles(name, q=(50, 90, 99)):
+    '''Returns {percentile: milliseconds} over the recent samples of name'''
+    with _lock:
+        samples = list(_samples.get(name, ()))
+    if not samples:
+        return {}
+    return dict(zip(q, np.percentile(samples, q)))
+
+
+def summary(q=(50, 90)):
+    '''One line per-stage summary for display, e.g. "slice 0.8/1.3 ms"'''
+    parts = []
+    for name in stages():
+        p = percentiles(name, q)
+        if p:
+            parts.append('%s %s ms' % (name, '/'.join('%0.1f' % p[k] for k in q)))
+    return '  '.join(parts)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
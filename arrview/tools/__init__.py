@@ -2,4 +2,6 @@ from arrview.tools.base import MouseButtons, MouseState, ToolSet
 from arrview.tools.colormap import ColorMapTool
 from arrview.tools.cursor_info import CursorInfoTool
 from arrview.tools.pan_zoom import PanTool, ZoomTool
+from arrview.tools.probe import ProbeTool
+from arrview.tools.region import RegionTool
 from arrview.tools.roi import ROITool
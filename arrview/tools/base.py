@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from traits.api import Event, Float, HasTraits, Instance, Int, List, Str, Tuple, WeakRef
+from traits.api import Bool, Event, Float, HasTraits, Instance, Int, List, Str, Tuple, WeakRef
 
 import weakref
 
@@ -31,6 +31,10 @@ class MouseButtons(object):
     def none(self):
         return not (self._left or self._middle or self._right)
 
+    def state(self):
+        '''Returns the (left, middle, right) pressed states'''
+        return (bool(self._left), bool(self._middle), bool(self._right))
+
     def __repr__(self):
         return rep(self, ['left','middle','right'])
 
@@ -40,6 +44,9 @@ class MouseState(HasTraits):
     screenCoords = Tuple(Float, Float, default=(0,0))
     delta = Int
     buttons = Instance(MouseButtons, MouseButtons)
+    # Item coordinates of every pointer move merged into the last event,
+    # oldest first and ending with coords
+    path = List
 
     wheeled = Event
     pressed = Event
@@ -53,6 +60,17 @@ class MouseState(HasTraits):
         return rep(self, ['coords','screenCoords', 'delta', 'buttons'])
 
 
+_mouse_handlers = {
+    'entered': 'mouse_entered',
+    'left': 'mouse_left',
+    'moved': 'mouse_moved',
+    'pressed': 'mouse_pressed',
+    'wheeled': 'mouse_wheeled',
+    'released': 'mouse_released',
+    'doubleclicked': 'mouse_double_clicked',
+}
+
+
 class GraphicsTool(HasTraits):
     # Only use dynamic notifications in the _init method when setting
     # up listeners. This has to be done because the class isn't fully
@@ -62,25 +80,40 @@ class GraphicsTool(HasTraits):
     name = Str('DEFAULT_NAME')
     mouse = Instance(MouseState)
     factory = WeakRef('GraphicsToolFactory')
+    # Disabled tools are kept alive but receive no mouse events
+    enabled = Bool(True)
 
     def __init__(self, factory, graphics, mouse):
         super(GraphicsTool, self).__init__(mouse=mouse, factory=factory)
         self.graphics = weakref.proxy(graphics)
-        mouse.on_trait_event(self.mouse_entered, 'entered')
-        mouse.on_trait_event(self.mouse_left, 'left')
-        mouse.on_trait_event(self.mouse_moved, 'moved')
-        mouse.on_trait_event(self.mouse_pressed, 'pressed')
-        mouse.on_trait_event(self.mouse_wheeled, 'wheeled')
-        mouse.on_trait_event(self.mouse_released, 'released')
-        mouse.on_trait_event(self.mouse_double_clicked, 'doubleclicked')
+        for event in _mouse_handlers:
+            mouse.on_trait_event(self._mouse_event, event)
         self.init()
 
+    def _mouse_event(self, obj, name, new):
+        if self.enabled:
+            getattr(self, _mouse_handlers[name])()
+
+    def _enabled_changed(self, enabled):
+        if enabled:
+            self.activate()
+        else:
+            self.deactivate()
+
     def init(self):
         pass
 
     def destroy(self):
         pass
 
+    def activate(self):
+        '''Called when the tool is enabled again'''
+        pass
+
+    def deactivate(self):
+        '''Called when the tool is disabled, release transient state here'''
+        pass
+
     def mouse_pressed(self):
         pass
 
@@ -123,3 +156,15 @@ class ToolSet(HasTraits):
 
     def init_tools(self, graphics, mouse):
         return [t.init_tool(graphics, mouse) for t in self.factories]
+
+    def sync_tools(self, tools, graphics, mouse):
+        '''Enable the tools of the current factories and disable the others.
+        tools maps factories to the tools already created from them, tools of
+        new factories are created and added to it.'''
+        factories = set(self.factories)
+        for factory, tool in tools.items():
+            tool.enabled = factory in factories
+        for factory in self.factories:
+            if factory not in tools:
+                tools[factory] = factory.init_tool(graphics, mouse)
+        return tools
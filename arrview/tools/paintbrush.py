@@ -3,8 +3,6 @@ from PySide.QtGui import (QColor, QGraphicsItem, QGraphicsPixmapItem, QPixmap, Q
 
 import logging
 import math
-import skimage as ski
-import skimage.draw
 
 
 log = logging.getLogger(__name__)
@@ -29,13 +27,14 @@ class PaintBrushItem(QGraphicsItem):
         return 2 * self._radius + 1
 
     def set_radius(self, r):
+        import skimage.draw
         self.prepareGeometryChange()
         self._radius = r
         if r == 0:
             pts = [(0, 0)]
         else:
-            pts = zip(*ski.draw.circle_perimeter(r, r, r))
-            pts += zip(*ski.draw.circle(r, r, r))
+            pts = zip(*skimage.draw.circle_perimeter(r, r, r))
+            pts += zip(*skimage.draw.circle(r, r, r))
         self._points = [QPointF(x, y) for x, y in pts]
         self._update_cursor()
 
@@ -76,6 +75,7 @@ class PaintBrushItem(QGraphicsItem):
         return QRectF(0, 0, self.diameter, self.diameter)
 
     def fill_pixmap(self, pixmap, origin, position):
+        import skimage.draw
         origin = self.snap_pos(origin)
         pos = self.snap_pos(position)
         ox, oy = origin.x(), origin.y()
@@ -88,7 +88,7 @@ class PaintBrushItem(QGraphicsItem):
             ## essential results in a lot of duplicate drawing.
             p.translate(ox, oy)
             px, py = 0, 0
-            for x, y in zip(*ski.draw.line(0, 0, cx-ox, cy-oy)):
+            for x, y in zip(*skimage.draw.line(0, 0, cx-ox, cy-oy)):
                 p.translate(x-px, y-py)
                 px, py = x, y
                 self._paint_cursor(p)
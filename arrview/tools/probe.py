@@ -0,0 +1,57 @@
+from __future__ import absolute_import
+
+from PySide.QtCore import QTimer
+
+from traits.api import Callable, Instance, on_trait_change
+
+from arrview.slicer import Slicer
+from arrview.tools.base import GraphicsTool, GraphicsToolFactory
+
+# Columns are read at most this many times a second while hovering
+_probe_fps = 30
+
+
+class _ProbeTool(GraphicsTool):
+    name = 'Probe'
+    slicer = Instance(Slicer)
+    dim = Callable
+    callback = Callable
+
+    def init(self):
+        self.slicer = self.factory.slicer
+        self.dim = self.factory.dim
+        self.callback = self.factory.callback
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(1000.0 / _probe_fps))
+        self._timer.timeout.connect(self.update)
+
+    def destroy(self):
+        self._timer.stop()
+
+    def mouse_moved(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @on_trait_change('slicer:view')
+    def update(self):
+        dim = self.dim()
+        slc = list(self.slicer.slc)
+        xdim, ydim = self.slicer.slc.viewdims
+        slc[xdim], slc[ydim] = map(int, self.mouse.coords)
+        shape = self.slicer.shape
+        if dim is None or not all(0 <= p < n for p, n in zip(slc, shape)):
+            self.callback(None, None)
+            return
+        self.callback(self.slicer.column(slc, dim), slc[dim])
+
+
+class ProbeTool(GraphicsToolFactory):
+    '''Reports the values along dim() through the element under the cursor
+    by calling callback(values, index), index being the position of the
+    displayed slice along dim. Both are None outside the array or when
+    dim() returns None.'''
+    klass = _ProbeTool
+    slicer = Instance(Slicer)
+    dim = Callable
+    callback = Callable
@@ -0,0 +1,46 @@
+from __future__ import absolute_import
+
+from traits.api import Callable, Instance
+
+from arrview import timing
+from arrview.roi import ROIManager
+from arrview.segment import grow_region
+from arrview.slicer import Slicer
+from arrview.tools.base import GraphicsTool, GraphicsToolFactory
+
+
+class _RegionTool(GraphicsTool):
+    name = 'Region'
+    slicer = Instance(Slicer)
+    roi_manager = Instance(ROIManager)
+    index = Callable
+    tolerance = Callable
+
+    def init(self):
+        self.slicer = self.factory.slicer
+        self.roi_manager = self.factory.roi_manager
+        self.index = self.factory.index
+        self.tolerance = self.factory.tolerance
+
+    def mouse_pressed(self):
+        if not self.mouse.buttons.left:
+            return
+        seed = list(self.slicer.slc)
+        xdim, ydim = self.slicer.slc.viewdims
+        seed[xdim], seed[ydim] = map(int, self.mouse.coords)
+        if not all(0 <= p < n for p, n in zip(seed, self.slicer.shape)):
+            return
+        with timing.stage('roi_grow'):
+            region, mask = grow_region(self.slicer.arr, seed, self.tolerance(), self.index())
+            self.roi_manager.add_region(region, mask)
+
+
+class RegionTool(GraphicsToolFactory):
+    '''Left click adds the region grown from the clicked element to the
+    selected ROI. index() restricts the search, see arrview.segment.grow_region,
+    and tolerance() is the largest difference to the clicked value included.'''
+    klass = _RegionTool
+    slicer = Instance(Slicer)
+    roi_manager = Instance(ROIManager)
+    index = Callable
+    tolerance = Callable
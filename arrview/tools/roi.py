@@ -1,5 +1,6 @@
 import logging
 import math
+import weakref
 
 import numpy as np
 
@@ -11,8 +12,9 @@ from PySide.QtCore import QPoint, QPointF, Qt
 
 from traits.api import Bool, Enum, DelegatesTo, Dict, HasTraits, Instance, Int, List, WeakRef, on_trait_change
 
-from arrview import settings
+from arrview import settings, timing
 from arrview.colormapper import ArrayPixmap
+from arrview.render import mask_rgba, rgba_to_argb32
 from arrview.roi import ROI, ROIManager
 from arrview.slicer import Slicer
 from arrview.tools.base import GraphicsTool, GraphicsToolFactory, MouseState
@@ -59,14 +61,8 @@ def _ndarray_to_arraypixmap(array, color=(0, 255, 0, 128)):
     anywhere it is equal to 1.
     """
     assert array.ndim == 2, 'Only 2D arrays are supported'
-    assert len(color) == 4, 'Color should be a 4-tuple'
     h, w = array.shape
-    array = array.astype('uint32')
-    array =   (color[3] * array) << 24 \
-            | (color[0] * array) << 16 \
-            | (color[1] * array) << 8 \
-            | (color[2] * array)
-    pixdata = array.flatten()
+    pixdata = rgba_to_argb32(mask_rgba(array, color)).flatten()
     img = QImage(pixdata, w, h, QImage.Format_ARGB32)
     return ArrayPixmap(pixdata, QPixmap.fromImage(img))
 
@@ -109,11 +105,15 @@ class ROIDisplayItem(HasTraits):
         self._set_pixmap_from_roi(self.roi)
 
     def _set_pixmap_from_roi(self, roi):
+        with timing.stage('roi_overlay'):
+            self._render_roi(roi)
+
+    def _render_roi(self, roi):
         if roi.visible:
             color = _display_color(roi.color, self.selected)
         else:
             color = QColor(Qt.transparent)
-        self.pixmap = _ndarray_to_arraypixmap(roi.mask[self.slicer.slc.view_slice], color.toTuple())
+        self.pixmap = _ndarray_to_arraypixmap(roi.mask_view(self.slicer.slc.view_slice), color.toTuple())
         self.pixmapitem.setPixmap(self.pixmap)
         self.pixmapitem.setZValue(_foreground_roi_z if self.selected else _background_roi_z)
 
@@ -137,13 +137,22 @@ class ROIEdit(HasTraits):
     def _roi_size_changed(self):
         self.paintbrush.set_radius(self.roi_tool.roi_size)
 
-    def _paint(self):
+    def _paint(self, path):
+        '''Paint the stroke from the origin through each point in path'''
+        with timing.stage('roi_paint'):
+            self._paint_path(path)
+
+    def _paint_path(self, path):
         for rdi in self.roi_tool.roi_display_item_dict.itervalues():
             if rdi.selected and rdi.roi.visible:
-                self.paintbrush.fill_pixmap(rdi.pixmap,
-                                            QPoint(*self._origin),
-                                            QPoint(*self.roi_tool.mouse.coords))
+                origin = self._origin
+                for coords in path:
+                    self.paintbrush.fill_pixmap(rdi.pixmap,
+                                                QPoint(*origin),
+                                                QPoint(*coords))
+                    origin = coords
                 rdi.pixmapitem.setPixmap(rdi.pixmap)
+        self._origin = path[-1]
 
     @on_trait_change('roi_tool:roi_manager.selection[]')
     def _roi_manager_selection_changed(self):
@@ -169,24 +178,24 @@ class ROIEdit(HasTraits):
         if not (self.roi_tool.mode == 'erase' or self.roi_tool.roi_manager.selection):
             self.roi_tool.roi_manager.new_roi()
         self._origin = self.roi_tool.mouse.coords
-        self._paint()
+        self._paint([self._origin])
 
     @on_trait_change('roi_tool:mouse:moved')
     def mouse_moved(self):
-        coords = self.roi_tool.mouse.coords
-        self.paintbrush.setPos(QPoint(*coords))
+        mouse = self.roi_tool.mouse
+        self.paintbrush.setPos(QPoint(*mouse.coords))
         if self._origin:
-            self._paint()
-            self._origin = coords
+            self._paint(mouse.path or [mouse.coords])
             return True
 
     @on_trait_change('roi_tool:mouse:released')
     def mouse_released(self):
         self._origin = None
-        for rdi in self.roi_tool.roi_display_item_dict.itervalues():
-            if rdi.selected and rdi.roi.visible:
-                mask = _pixmap_to_ndarray(rdi.pixmap)
-                self.roi_tool.roi_manager.update_mask(rdi.roi, mask)
+        with timing.stage('roi_update'):
+            for rdi in self.roi_tool.roi_display_item_dict.itervalues():
+                if rdi.selected and rdi.roi.visible:
+                    mask = _pixmap_to_ndarray(rdi.pixmap)
+                    self.roi_tool.roi_manager.update_mask(rdi.roi, mask)
 
 
 class _ROITool(GraphicsTool):
@@ -198,18 +207,38 @@ class _ROITool(GraphicsTool):
 
     def init(self):
         self.roi_editor = None
-        if self.mode in {'draw', 'erase'}:
-            self.roi_editor = ROIEdit(roi_tool=self)
         self.roi_manager = self.factory.roi_manager
         self.roi_size = self.factory.factory.roi_size
+        self._update_editor()
 
     def destroy(self):
         for rdi in self.roi_display_item_dict.values():
             rdi.destroy()
+        self._destroy_editor()
+
+    def _destroy_editor(self):
         if self.roi_editor:
             self.roi_editor.destroy()
             self.roi_editor = None  # Remove reference to ROIEdit, ensures delete
 
+    @on_trait_change('factory:mode')
+    def _update_editor(self):
+        '''Only the paintbrush depends on the mode, the display items of
+        the ROIs are kept when it changes'''
+        self._destroy_editor()
+        if self.enabled and self.mode in {'draw', 'erase'}:
+            self.roi_editor = ROIEdit(roi_tool=self)
+
+    def activate(self):
+        for rdi in self.roi_display_item_dict.itervalues():
+            rdi.pixmapitem.show()
+        self._update_editor()
+
+    def deactivate(self):
+        for rdi in self.roi_display_item_dict.itervalues():
+            rdi.pixmapitem.hide()
+        self._destroy_editor()
+
     @on_trait_change('factory:factory.roi_size')
     def _factory_roi_size_changed(self):
         self.roi_size = self.factory.factory.roi_size
@@ -250,3 +279,18 @@ class ROITool(GraphicsToolFactory):
     roi_manager = Instance(ROIManager)
     factory = Instance(object)
     mode = Enum('view', 'draw', 'erase')
+
+    def __init__(self, **traits):
+        super(ROITool, self).__init__(**traits)
+        self._tools = weakref.WeakSet()
+
+    def init_tool(self, graphics, mouse):
+        tool = super(ROITool, self).init_tool(graphics, mouse)
+        self._tools.add(tool)
+        return tool
+
+    def overlays(self):
+        '''Returns (roi name, nbytes) of the overlay pixmaps of the tools'''
+        return [(rdi.roi.name, getattr(rdi.pixmap, 'nbytes', 0))
+                for tool in self._tools
+                for rdi in tool.roi_display_item_dict.itervalues()]
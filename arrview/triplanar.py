@@ -0,0 +1,160 @@
+import logging
+
+from PySide.QtCore import Qt
+from PySide.QtGui import QGraphicsLineItem
+
+from traits.api import (HasTraits, Instance, Int, Property, Str, cached_property,
+        on_trait_change)
+from traitsui.api import View, Item, HSplit, VGroup, StatusItem
+
+from arrview.colormapper import ColorMapper
+from arrview.session import Session
+from arrview.settings import default_roi_pen
+from arrview.slicer import OrthoSlicer, Slicer
+from arrview.tools import ColorMapTool, PanTool, ToolSet, ZoomTool
+from arrview.tools.base import GraphicsTool, GraphicsToolFactory
+from arrview.ui.slicereditor import PixmapEditor
+
+
+log = logging.getLogger(__name__)
+
+_crosshair_z = 50
+
+
+class _CrosshairTool(GraphicsTool):
+    name = 'Crosshair'
+
+    def init(self):
+        self.ortho = self.factory.ortho
+        self.plane = self.factory.plane
+        pen = default_roi_pen(dashed=False, color=Qt.yellow)
+        pen.setCosmetic(True)
+        self.hline = QGraphicsLineItem()
+        self.vline = QGraphicsLineItem()
+        for line in (self.hline, self.vline):
+            line.setPen(pen)
+            line.setZValue(_crosshair_z)
+            self.graphics.scene().addItem(line)
+        self.ortho.on_trait_change(self.update_lines, 'point')
+        self.update_lines()
+
+    def destroy(self):
+        self.ortho.on_trait_change(self.update_lines, 'point', remove=True)
+        for line in (self.hline, self.vline):
+            self.graphics.scene().removeItem(line)
+
+    def _move_point(self):
+        if self.mouse.buttons.left:
+            x, y = self.mouse.coords
+            self.ortho.set_point_from_plane(self.plane, x, y)
+
+    def mouse_pressed(self):
+        self._move_point()
+
+    def mouse_moved(self):
+        self._move_point()
+
+    def update_lines(self):
+        xdim, ydim = self.ortho.planes[self.plane].slc.viewdims
+        point, shape = self.ortho.point, self.ortho.shape
+        x, y = point[xdim] + 0.5, point[ydim] + 0.5
+        self.hline.setLine(0, y, shape[xdim], y)
+        self.vline.setLine(x, 0, x, shape[ydim])
+
+
+class CrosshairTool(GraphicsToolFactory):
+    klass = _CrosshairTool
+    ortho = Instance(OrthoSlicer)
+    plane = Int
+
+
+class TriPlanarViewer(HasTraits):
+    '''Shows the three orthogonal planes through a crosshair point.
+    Left click or drag in any plane to move the crosshair, only planes
+    whose slice changes are re-rendered.'''
+    ortho = Instance(OrthoSlicer)
+    cmap = Instance(ColorMapper)
+    slicer0 = Instance(Slicer)
+    slicer1 = Instance(Slicer)
+    slicer2 = Instance(Slicer)
+    pixmap0 = Property(depends_on=['cmap.+', 'cmap.norm.+', 'slicer0.view'])
+    pixmap1 = Property(depends_on=['cmap.+', 'cmap.norm.+', 'slicer1.view'])
+    pixmap2 = Property(depends_on=['cmap.+', 'cmap.norm.+', 'slicer2.view'])
+
+    pointInfo = Str
+    colormapInfo = Str
+
+    def __init__(self, arr, dims=(1, 0, 2), point=None, title=None):
+        '''Args:
+            arr   -- array with at least 3 dimensions
+            dims  -- (default: (1, 0, 2)) the x, y and z dimensions
+            point -- (default: center of arr) initial crosshair position
+            title -- (default: Tri-Planar Viewer) title of the window
+        '''
+        super(TriPlanarViewer, self).__init__()
+        self._title = 'Tri-Planar Viewer' if title is None else title
+        # A single session gives each plane its own entries in one render cache
+        self._session = Session(linked=False)
+        self.ortho = OrthoSlicer(arr, dims=dims, point=point)
+        self.slicer0, self.slicer1, self.slicer2 = self.ortho.planes
+        # All planes share one window, scaled to the whole array
+        self.cmap = ColorMapper(slicer=self.slicer0, autoscale=False)
+        self.cmap.scale_to(arr)
+        self._toolsets = [
+            ToolSet(factories=[
+                CrosshairTool(ortho=self.ortho, plane=i),
+                ColorMapTool(slicer=slicer, colorMapper=self.cmap,
+                             callback=self.update_colormapinfo),
+                PanTool(button='middle'),
+                ZoomTool()])
+            for i, slicer in enumerate(self.ortho.planes)]
+        self.update_pointinfo()
+
+    def update_colormapinfo(self, msg):
+        self.colormapInfo = msg
+
+    @on_trait_change('ortho:point')
+    def update_pointinfo(self):
+        point = self.ortho.point
+        self.pointInfo = '(%s) %0.2f' % (','.join('%03d' % p for p in point), self.ortho.value)
+
+    def _render(self, slicer):
+        return self._session.render(slicer, self.cmap)
+
+    @cached_property
+    def _get_pixmap0(self):
+        return self._render(self.slicer0)
+
+    @cached_property
+    def _get_pixmap1(self):
+        return self._render(self.slicer1)
+
+    @cached_property
+    def _get_pixmap2(self):
+        return self._render(self.slicer2)
+
+    def default_traits_view(self):
+        return View(
+            VGroup(
+                HSplit(*[Item('pixmap%d' % i,
+                              editor=PixmapEditor(toolSet=toolset),
+                              show_label=False)
+                         for i, toolset in enumerate(self._toolsets)]),
+                Item('cmap', style='custom', show_label=False)),
+            statusbar=[
+                StatusItem(name='pointInfo'),
+                StatusItem(name='colormapInfo')],
+            resizable=True,
+            title=self._title)
+
+
+def view(arr, dims=(1, 0, 2), point=None, title=None, block=True):
+    '''Open arr in a TriPlanarViewer, see arrview.main.view for block'''
+    viewer = TriPlanarViewer(arr, dims=dims, point=point, title=title)
+    if block:
+        viewer.configure_traits()
+    else:
+        from arrview.main import _start_event_loop
+        _start_event_loop()
+        viewer.edit_traits()
+    return viewer
@@ -0,0 +1,67 @@
+from PySide.QtCore import Qt, QPointF
+from PySide.QtGui import QWidget, QPainter, QPen, QPolygonF
+
+from traitsui.qt4.editor import Editor
+from traitsui.qt4.basic_editor_factory import BasicEditorFactory
+
+import numpy as np
+
+
+class CurveWidget(QWidget):
+    '''Plots a 1D array as a polyline, with an optional marker at one index'''
+    pad = 4
+
+    def __init__(self):
+        super(CurveWidget, self).__init__()
+        self.setMinimumHeight(80)
+        self._values = None
+        self._marker = None
+
+    def setCurve(self, values, marker=None):
+        self._values = None if values is None else np.asarray(values, dtype=float)
+        self._marker = marker
+        self.update()
+
+    def paintEvent(self, ev):
+        p = QPainter(self)
+        p.fillRect(self.rect(), Qt.black)
+        values = self._values
+        if values is None or len(values) == 0:
+            p.end()
+            return
+        finite = np.isfinite(values)
+        if not finite.any():
+            p.end()
+            return
+        lo, hi = values[finite].min(), values[finite].max()
+        pad = self.pad
+        w, h = self.width() - 2 * pad, self.height() - 2 * pad
+        xs = pad + np.arange(len(values)) * (w / float(max(1, len(values) - 1)))
+        ys = pad + h * (1 - (np.where(finite, values, lo) - lo) / float(hi - lo or 1))
+        if self._marker is not None:
+            p.setPen(QPen(Qt.yellow, 0, Qt.DashLine))
+            x = xs[self._marker]
+            p.drawLine(QPointF(x, pad), QPointF(x, pad + h))
+        p.setPen(QPen(Qt.green, 0))
+        p.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, ys)]))
+        p.setPen(Qt.gray)
+        p.drawText(pad, pad + 10, '%0.4g' % hi)
+        p.drawText(pad, pad + h, '%0.4g' % lo)
+        p.end()
+
+
+class _CurveEditor(Editor):
+    '''Shows a (values, marker) tuple, or None for an empty plot'''
+    def init(self, parent):
+        self.control = CurveWidget()
+        self.update_editor()
+
+    def update_editor(self):
+        if self.value is None:
+            self.control.setCurve(None)
+        else:
+            self.control.setCurve(*self.value)
+
+
+class CurveEditor(BasicEditorFactory):
+    klass = _CurveEditor
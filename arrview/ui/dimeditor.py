@@ -1,5 +1,5 @@
 from traits.api import (HasPrivateTraits, Property, Int, Instance,
-        List, Bool, Range, on_trait_change)
+        List, Bool, Range, Enum, on_trait_change)
 from traitsui.api import (View, Group, Item, RangeEditor, HGroup,
         Spring)
 from traitsui.qt4.editor import Editor
@@ -45,16 +45,38 @@ class FreeDim(HasPrivateTraits):
     fps = Range(low=1, high=30, value=30)
     sleep_ms = Property(depends_on=['fps'])
     autoInc = Bool(False)
+    follow = Bool(False)
+    projection = Enum('none', 'max', 'min', 'mean', 'std')
+    proj_low = Int(0)
+    proj_high = Int
 
     view = View(
             HGroup(
                 Item('autoInc',
                     label='Play'),
+                Item('follow',
+                    label='Newest',
+                    tooltip='Follow the newest frame as the array grows'),
                 Item('val',
                     editor=RangeEditor(
                         low=0,
                         high_name='val_high',
-                        mode='slider'))))
+                        mode='slider')),
+                Item('projection'),
+                Item('proj_low',
+                    label='from',
+                    enabled_when='projection != "none"',
+                    editor=RangeEditor(
+                        low=0,
+                        high_name='val_high',
+                        mode='spinner')),
+                Item('proj_high',
+                    label='to',
+                    enabled_when='projection != "none"',
+                    editor=RangeEditor(
+                        low=0,
+                        high_name='val_high',
+                        mode='spinner'))))
 
     def __init__(self, **traits):
         super(FreeDim, self).__init__(**traits)
@@ -118,12 +140,56 @@ class SlicerDims(HasPrivateTraits):
             self.freedim.dim = zdim
             self.freedim.val = self.slicer.slc[zdim]
             self.freedim.val_high = self.slicer.shape[zdim]-1
+            self.freedim.proj_low = 0
+            self.freedim.proj_high = self.freedim.val_high
+
+    @on_trait_change('slicer:slc')
+    def slc_changed(self):
+        '''Follow changes made to the slicer by others, e.g. a linked viewer'''
+        if self.freedim is None or not self._dimlist:
+            return
+        slc = self.slicer.slc
+        m = self._dimlist_to_map()
+        if (m['x'], m['y']) != slc.viewdims:
+            dims = [x if i in slc.viewdims else None for i,x in enumerate(slc)]
+            zdim = m.get('z')
+            if zdim is None or zdim in slc.viewdims:
+                zdim = slc.freedims[0] if slc.freedims else None
+            if zdim is not None:
+                dims[zdim] = 'z'
+            self._dimlist = dims
+        elif 'z' in m:
+            self.freedim.val = slc[m['z']]
 
     @on_trait_change('freedim.val')
     def freedim_changed(self):
         f = self.freedim
         self.slicer.set_freedim(f.dim, f.val)
 
+    @on_trait_change('slicer:data_changed')
+    def data_changed(self):
+        '''Extend the free dim range when the array grows'''
+        f = self.freedim
+        if f is None or 'z' not in self._dimlist_to_map():
+            return
+        val_high = self.slicer.shape[f.dim] - 1
+        if val_high == f.val_high:
+            return
+        extend_projection = f.proj_high == f.val_high
+        f.val_high = val_high
+        if extend_projection:
+            f.proj_high = val_high
+        if f.follow:
+            f.val = val_high
+
+    @on_trait_change('freedim.projection,freedim.proj_low,freedim.proj_high,freedim.dim')
+    def projection_changed(self):
+        f = self.freedim
+        if f.projection == 'none' or f.proj_low > f.proj_high:
+            self.slicer.clear_projection()
+        else:
+            self.slicer.set_projection(f.projection, f.dim, f.proj_low, f.proj_high + 1)
+
 
 ## Quick Test ##
 if __name__ == '__main__':
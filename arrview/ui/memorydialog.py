@@ -0,0 +1,62 @@
+from traits.api import Any, Button, Float, HasTraits, List, Str, Tuple
+from traitsui.api import View, Item, HGroup, VGroup, TabularEditor
+from traitsui.tabular_adapter import TabularAdapter
+
+from arrview import memory
+
+
+_MB = float(2**20)
+
+
+class _MemoryAdapter(TabularAdapter):
+    columns = [('Category', 0), ('Name', 1), ('MB', 2)]
+    format = '%s'
+
+    def get_format(self, object, trait, row, column):
+        return '%0.2f' if column == 2 else '%s'
+
+
+class MemoryDialog(HasTraits):
+    '''Lists the memory held by a viewer and edits the global cache budget'''
+    viewer = Any
+    rows = List(Tuple(Str, Str, Float))
+    total = Str
+    cached = Str
+    budget_mb = Float
+    refresh = Button('Refresh')
+
+    def __init__(self, viewer):
+        super(MemoryDialog, self).__init__(viewer=viewer)
+        self.budget_mb = memory.cache_budget()[0] / _MB
+        self.update()
+
+    def update(self):
+        items = memory.memory_report(self.viewer)
+        self.rows = [(item.category, item.name, item.nbytes / _MB) for item in items]
+        self.total = '%0.1f MB' % (memory.total_bytes(items) / _MB)
+        max_bytes, nbytes = memory.cache_budget()
+        self.cached = '%0.1f of %0.1f MB' % (nbytes / _MB, max_bytes / _MB)
+
+    def _refresh_fired(self):
+        self.update()
+
+    def _budget_mb_changed(self, budget_mb):
+        if budget_mb > 0:
+            memory.set_cache_budget(int(budget_mb * _MB))
+            self.update()
+
+    def default_traits_view(self):
+        return View(
+            VGroup(
+                Item('rows', editor=TabularEditor(adapter=_MemoryAdapter(), editable=False),
+                     show_label=False),
+                HGroup(
+                    Item('total', style='readonly'),
+                    Item('cached', label='All caches', style='readonly')),
+                HGroup(
+                    Item('budget_mb', label='Cache budget (MB)'),
+                    Item('refresh', show_label=False))),
+            title='Memory Usage',
+            resizable=True,
+            width=480,
+            height=360)
@@ -0,0 +1,184 @@
+from PySide.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide.QtGui import (QAbstractItemView, QColor, QHeaderView, QItemSelection,
+        QItemSelectionModel, QTableView)
+
+from traitsui.qt4.editor import Editor
+from traitsui.qt4.basic_editor_factory import BasicEditorFactory
+
+
+class ROITableModel(QAbstractTableModel):
+    '''Table model over ROIManager.roiviews.
+
+    The view only asks for the rows it shows, and ROIView statistics are
+    computed when first read, so the statistics of rows scrolled out of
+    sight are never computed. Rows are inserted and removed as roiviews
+    changes instead of the whole table being rebuilt, announced by
+    ROIManager.roiviews_changing before roiviews is changed.
+    '''
+    columns = ('#', '', '', 'Name', 'Mean', 'STD', 'Size')
+    INDEX, VISIBLE, COLOR, NAME, MEAN, STD, SIZE = range(7)
+
+    def __init__(self, manager):
+        super(ROITableModel, self).__init__()
+        self.manager = manager
+        self._pending = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.manager.roiviews)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.columns[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == self.VISIBLE:
+            flags |= Qt.ItemIsUserCheckable
+        elif index.column() == self.NAME:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rv = self.manager.roiviews[index.row()]
+        col = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if col == self.INDEX:
+                return index.row() + 1
+            elif col == self.NAME:
+                return rv.name
+            elif col == self.MEAN:
+                return '%0.2f' % rv.mean
+            elif col == self.STD:
+                return '%0.2f' % rv.std
+            elif col == self.SIZE:
+                return rv.size
+        elif role == Qt.CheckStateRole and col == self.VISIBLE:
+            return Qt.Checked if rv.visible else Qt.Unchecked
+        elif role == Qt.BackgroundRole and col == self.COLOR:
+            return QColor(rv.color)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        rv = self.manager.roiviews[index.row()]
+        if index.column() == self.VISIBLE and role == Qt.CheckStateRole:
+            rv.visible = value == Qt.Checked
+        elif index.column() == self.NAME and role == Qt.EditRole:
+            rv.name = value
+        else:
+            return False
+        return True
+
+    def begin_change(self, change):
+        '''Called with a ROIManager.roiviews_changing value before the change'''
+        kind = change[0]
+        if kind == 'remove':
+            _, start, count = change
+            self.beginRemoveRows(QModelIndex(), start, start + count - 1)
+        elif kind == 'insert':
+            _, start, count = change
+            self.beginInsertRows(QModelIndex(), start, start + count - 1)
+        else:
+            self.beginResetModel()
+        self._pending = kind
+
+    def end_change(self):
+        '''Called after roiviews changed, a change that was not announced
+        resets the model'''
+        kind, self._pending = self._pending, None
+        if kind == 'remove':
+            self.endRemoveRows()
+        elif kind == 'insert':
+            self.endInsertRows()
+        else:
+            if kind is None:
+                self.beginResetModel()
+            self.endResetModel()
+
+    def row_changed(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+
+class _ROITableEditor(Editor):
+    '''Edits the roiviews of an ROIManager, keeping its selection in sync'''
+    def init(self, parent):
+        self._syncing = False
+        self._model = ROITableModel(self.object)
+        self.control = QTableView()
+        self.control.setModel(self._model)
+        self.control.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.control.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.control.setShowGrid(False)
+        self.control.verticalHeader().hide()
+        # Fixed row heights and column widths never measure every row
+        self.control.verticalHeader().setResizeMode(QHeaderView.Fixed)
+        header = self.control.horizontalHeader()
+        header.setResizeMode(QHeaderView.Interactive)
+        header.setResizeMode(ROITableModel.NAME, QHeaderView.Stretch)
+        for col, width in ((ROITableModel.INDEX, 40), (ROITableModel.VISIBLE, 24),
+                           (ROITableModel.COLOR, 24)):
+            self.control.setColumnWidth(col, width)
+        self.control.selectionModel().selectionChanged.connect(self._table_selection_changed)
+        # Rows change on the GUI thread, the model is told before and after
+        self.object.on_trait_change(self._model.begin_change, 'roiviews_changing')
+        self.object.on_trait_change(self._items_changed, 'roiviews_items')
+        self.object.on_trait_change(self._row_changed, 'roiviews:changed', dispatch='ui')
+        self.object.on_trait_change(self._selection_changed, 'selection[]', dispatch='ui')
+
+    def dispose(self):
+        self.object.on_trait_change(self._model.begin_change, 'roiviews_changing', remove=True)
+        self.object.on_trait_change(self._items_changed, 'roiviews_items', remove=True)
+        self.object.on_trait_change(self._row_changed, 'roiviews:changed', remove=True)
+        self.object.on_trait_change(self._selection_changed, 'selection[]', remove=True)
+        super(_ROITableEditor, self).dispose()
+
+    def update_editor(self):
+        self._model.end_change()
+        self._selection_changed()
+
+    def _items_changed(self):
+        self._model.end_change()
+
+    def _row_changed(self, rv, name, new):
+        row = rv.index - 1
+        roiviews = self.object.roiviews
+        if 0 <= row < len(roiviews) and roiviews[row] is rv:
+            self._model.row_changed(row)
+
+    def _table_selection_changed(self, selected, deselected):
+        if self._syncing:
+            return
+        roiviews = self.object.roiviews
+        rows = sorted(set(index.row() for index in
+                          self.control.selectionModel().selectedRows()))
+        self._syncing = True
+        try:
+            self.object.selection = [roiviews[row] for row in rows]
+        finally:
+            self._syncing = False
+
+    def _selection_changed(self):
+        if self._syncing:
+            return
+        selection = QItemSelection()
+        last = self._model.columnCount() - 1
+        for rv in self.object.selection:
+            row = rv.index - 1
+            selection.select(self._model.index(row, 0), self._model.index(row, last))
+        self._syncing = True
+        try:
+            self.control.selectionModel().select(
+                selection, QItemSelectionModel.ClearAndSelect)
+            if self.object.selection:
+                self.control.scrollTo(self._model.index(self.object.selection[0].index - 1, 0))
+        finally:
+            self._syncing = False
+
+
+class ROITableEditor(BasicEditorFactory):
+    klass = _ROITableEditor
@@ -1,4 +1,4 @@
-from PySide.QtCore import Qt, Signal, QRectF
+from PySide.QtCore import Qt, Signal, QRectF, QTimer
 from PySide.QtGui import (QGraphicsView, QGraphicsPixmapItem,
         QGraphicsScene, QBrush)
 
@@ -8,6 +8,7 @@ from traitsui.key_bindings import KeyBindings
 from traitsui.qt4.editor import Editor
 from traitsui.qt4.basic_editor_factory import BasicEditorFactory
 
+from arrview import timing
 from arrview.tools import ToolSet, MouseState, MouseButtons
 
 import logging
@@ -15,6 +16,9 @@ import logging
 
 log = logging.getLogger(__name__)
 
+# Pointer moves are dispatched to the tools at most this many times a second
+_move_fps = 60
+
 
 class ArrayGraphicsView(QGraphicsView):
     '''ArrayGraphicsView is used for viewing a numpy array.
@@ -72,6 +76,10 @@ class ArrayGraphicsView(QGraphicsView):
         super(ArrayGraphicsView, self).mouseDoubleClickEvent(ev)
         self.mousedoubleclicked.emit(ev)
 
+    def paintEvent(self, ev):
+        with timing.stage('paint'):
+            super(ArrayGraphicsView, self).paintEvent(ev)
+
     def wheelEvent(self, ev):
         self.mousewheeled.emit(ev)
 
@@ -101,10 +109,21 @@ class ArrayGraphicsView(QGraphicsView):
 
 
 class _PixmapEditor(Editor):
+    '''Mouse moves are coalesced to at most one moved event per display
+    frame, the points merged into it are passed to tools in mouse.path.
+    A pending move is dispatched before any other mouse event so tools
+    see events in the order they happened.'''
     mouse = Instance(MouseState, MouseState)
     toolSet = Instance(ToolSet)
 
     def init(self, parent):
+        self._buttons = None
+        self._pending_move = None
+        self._move_path = []
+        self._move_timer = QTimer()
+        self._move_timer.setSingleShot(True)
+        self._move_timer.setInterval(int(1000.0 / _move_fps))
+        self._move_timer.timeout.connect(self._dispatch_move)
         self.control = ArrayGraphicsView()
         self.control.mouse_entered.connect(self._mouse_entered)
         self.control.mouse_left.connect(self._mouse_left)
@@ -117,31 +136,64 @@ class _PixmapEditor(Editor):
         self.control.setPixmap(self.value)
         self.control.fitView()
         self.control.destroyed.connect(self._control_destroyed)
-        self._tools = []
+        self._tools = {}
         self.toolSet = self.factory.toolSet
 
     def _control_destroyed(self):
-        self._tools = []
+        self._move_timer.stop()
+        self._pending_move = None
+        self._tools = {}
 
-    @on_trait_change('toolSet.factories')
-    def factories_changed(self):
-        for tool in self._tools:
+    @on_trait_change('toolSet')
+    def toolset_changed(self):
+        for tool in self._tools.itervalues():
             tool.destroy()
+        self._tools = {}
         self.mouse = MouseState()
-        self._tools = self.toolSet.init_tools(self.control, self.mouse)
+        self._buttons = None
+        self.factories_changed()
+
+    @on_trait_change('toolSet.factories')
+    def factories_changed(self):
+        # Tools outlive changes of the factories, they are only enabled or
+        # disabled, so switching modes does not rebuild their state
+        if self.toolSet is not None:
+            self.toolSet.sync_tools(self._tools, self.control, self.mouse)
 
     def update_editor(self):
         self.control.setPixmap(self.value)
 
+    def _event_state(self, ev):
+        '''Copy what the tools need out of ev, Qt reuses event objects'''
+        coords = self.control.mouseevent_to_item_coords(ev)
+        return coords, (ev.pos().x(), ev.pos().y()), int(ev.buttons())
+
+    def _set_mouse(self, coords, screenCoords, buttons):
+        self.mouse.coords = coords
+        self.mouse.screenCoords = screenCoords
+        if buttons != self._buttons:
+            self._buttons = buttons
+            self.mouse.buttons = MouseButtons(
+                left    = buttons & Qt.LeftButton,
+                middle  = buttons & Qt.MiddleButton,
+                right   = buttons & Qt.RightButton)
+
     def _config_mouse(self, ev):
+        self._dispatch_move()
         if hasattr(ev, 'pos'):
-            self.mouse.coords = self.control.mouseevent_to_item_coords(ev)
-            self.mouse.screenCoords = (ev.pos().x(), ev.pos().y())
-            buttons = MouseButtons(
-                left    = ev.buttons() & Qt.LeftButton,
-                middle  = ev.buttons() & Qt.MiddleButton,
-                right   = ev.buttons() & Qt.RightButton)
-            self.mouse.buttons = buttons
+            self._set_mouse(*self._event_state(ev))
+            self.mouse.path = [self.mouse.coords]
+
+    def _dispatch_move(self):
+        '''Fire the pending moved event, if any'''
+        self._move_timer.stop()
+        if self._pending_move is None:
+            return
+        self._set_mouse(*self._pending_move)
+        self.mouse.path = self._move_path
+        self._pending_move = None
+        self._move_path = []
+        self.mouse.moved = True
 
     def _key_pressed(self, ev):
         key_bindings = self.factory.key_bindings
@@ -159,8 +211,10 @@ class _PixmapEditor(Editor):
         self.mouse.entered = True
 
     def _mouse_moved(self, ev):
-        self._config_mouse(ev)
-        self.mouse.moved = True
+        self._pending_move = self._event_state(ev)
+        self._move_path.append(self._pending_move[0])
+        if not self._move_timer.isActive():
+            self._move_timer.start()
 
     def _mouse_pressed(self, ev):
         self._config_mouse(ev)
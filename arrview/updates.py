@@ -0,0 +1,64 @@
+import logging
+import threading
+
+from PySide.QtCore import QObject, QTimer, Signal
+
+from arrview.util import merge_bounds, region_bounds
+
+
+log = logging.getLogger(__name__)
+
+
+class UpdateCoalescer(QObject):
+    '''Collects array updates and applies them on the GUI thread at most
+    once per display frame.
+
+    push may be called from any thread. Bursts of updates arriving within
+    one frame are merged into a single call of apply(arr, region, appended),
+    where arr is the most recent replacement array (or None), region covers
+    the union of all pushed regions and appended is True only if every
+    pushed update was appended data. shape is a callable returning the
+    current shape of the array.
+    '''
+    _requested = Signal()
+
+    def __init__(self, apply, shape, fps=30):
+        super(UpdateCoalescer, self).__init__()
+        self._apply = apply
+        self._shape = shape
+        self._lock = threading.Lock()
+        self._arr = None
+        self._bounds = None
+        self._appended = True
+        self._pending = False
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(int(1000.0 / fps))
+        self._timer.timeout.connect(self.flush)
+        self._requested.connect(self._schedule)
+
+    def push(self, arr=None, region=None, appended=False):
+        bounds = region_bounds(region, self._shape())
+        with self._lock:
+            if arr is not None:
+                self._arr = arr
+            self._bounds = merge_bounds(self._bounds, bounds)
+            self._appended = self._appended and appended
+            self._pending = True
+        self._requested.emit()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        '''Apply the pending updates now'''
+        with self._lock:
+            if not self._pending:
+                return
+            arr, bounds, appended = self._arr, self._bounds, self._appended
+            self._arr, self._bounds, self._pending = None, None, False
+            self._appended = True
+        region = tuple(slice(start, stop) for start, stop in bounds)
+        log.debug('applying coalesced update, region: %r', region)
+        self._apply(arr=arr, region=region, appended=appended)
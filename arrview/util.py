@@ -1,5 +1,8 @@
 from collections import Mapping, Set, Sequence 
 
+import numpy as np
+
+
 def unique(iterable):
     '''Returns true or false if the items in the iterable are unique'''
     return len(iterable) == len(set(iterable))
@@ -30,3 +33,60 @@ def rep(obj, props):
 
 def clamp(val, min_val, max_val):
     return max(min(val, max_val), min_val)
+
+
+def region_bounds(region, shape):
+    '''Convert an index into (start, stop) bounds for each dimension of shape.
+    Args:
+    region -- None (the whole array) or a tuple of ints and slices as used
+              to index a numpy array. Missing trailing dimensions are
+              taken in full and strided slices are widened to their extent.
+    shape  -- shape of the array being indexed
+    Returns:
+    A tuple with a (start, stop) pair for each dimension'''
+    if region is None:
+        region = ()
+    elif not isinstance(region, (tuple, list)):
+        region = (region,)
+    assert len(region) <= len(shape), 'region has more dimensions than shape'
+    bounds = []
+    for i, n in enumerate(shape):
+        idx = region[i] if i < len(region) else slice(None)
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(n)
+            if step < 0:
+                start, stop = stop + 1, start + 1
+            bounds.append((start, max(start, stop)))
+        else:
+            idx = idx + n if idx < 0 else idx
+            bounds.append((idx, idx + 1))
+    return tuple(bounds)
+
+
+def merge_bounds(a, b):
+    '''Returns the smallest bounds containing both a and b'''
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return tuple((min(a0, b0), max(a1, b1)) for (a0, a1), (b0, b1) in zip(a, b))
+
+
+def bounds_to_slices(bounds):
+    return tuple(slice(start, stop) for start, stop in bounds)
+
+
+def grow_array(arr, shape, base=None):
+    '''Returns (base, view) where view is arr padded with zeros at the end
+    of each dimension to shape. view is a view into base, which is reused if
+    arr is a view into it with room for shape. Otherwise a new base is made
+    with room for twice the size of each growing dimension, so an array
+    grown a little at a time is copied a logarithmic number of times.'''
+    shape = tuple(shape)
+    assert all(n >= m for n, m in zip(shape, arr.shape)), 'arrays can only grow'
+    if base is None or arr.base is not base or \
+            any(n > b for n, b in zip(shape, base.shape)):
+        room = [n if n == m else max(n, 2 * m) for n, m in zip(shape, arr.shape)]
+        base = np.zeros(room, dtype=arr.dtype)
+        base[tuple(slice(0, m) for m in arr.shape)] = arr
+    return base, base[tuple(slice(0, n) for n in shape)]
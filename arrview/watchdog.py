@@ -0,0 +1,162 @@
+'''Detect stalls of the GUI thread and log what it was doing.
+
+The GUI thread beats a heartbeat from a Qt timer. A watchdog thread checks
+the heartbeat and, when it is older than the threshold, logs the GUI
+thread's Python stack and the viewer state at WARNING level, once per
+stall, followed by the stall's duration once the GUI thread recovers.
+
+Enable it by setting ARRVIEW_WATCHDOG to the threshold in seconds, e.g.
+ARRVIEW_WATCHDOG=0.5, or with install(viewer, threshold). All viewers of a
+process share one watchdog, which stops when the last of them is
+uninstalled.
+'''
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+
+log = logging.getLogger(__name__)
+
+# Stall threshold used when ARRVIEW_WATCHDOG is set to a non-number, e.g. 1
+_default_threshold = 1.0
+
+
+def threshold_from_environment():
+    '''Returns the threshold set by ARRVIEW_WATCHDOG, None if unset or 0'''
+    value = os.environ.get('ARRVIEW_WATCHDOG', '')
+    if value in ('', '0'):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return _default_threshold
+
+
+def thread_stack(thread_id):
+    '''Returns the formatted Python stack of the thread thread_id'''
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return ''
+    return ''.join(traceback.format_stack(frame))
+
+
+class StallDetector(object):
+    '''Reports a stall when beat has not been called for threshold seconds.
+    Args:
+    thread_id -- id of the watched thread, see threading.current_thread().ident
+    threshold -- seconds without a beat that count as a stall
+    state     -- (default: None) callable returning a dict describing what
+                 the application is doing, included in the report
+    '''
+    def __init__(self, thread_id, threshold, state=None):
+        self.thread_id = thread_id
+        self.threshold = threshold
+        self._state = state
+        self._last_beat = time.time()
+        self._stalled = None
+
+    def beat(self):
+        self._last_beat = time.time()
+
+    def check(self, now=None):
+        '''Log a report if a stall started or ended. Returns True while stalled'''
+        now = time.time() if now is None else now
+        age = now - self._last_beat
+        if age < self.threshold:
+            if self._stalled is not None:
+                log.warning('GUI thread recovered after a %0.2f s stall',
+                            self._last_beat - self._stalled)
+                self._stalled = None
+            return False
+        if self._stalled is None:
+            self._stalled = self._last_beat
+            self.report(age)
+        return True
+
+    def report(self, age):
+        try:
+            state = self._state() if self._state is not None else {}
+        except Exception:
+            # The state is read from another thread while the GUI is busy
+            log.debug('failed to read viewer state', exc_info=True)
+            state = {}
+        log.warning('GUI thread stalled for %0.2f s, state: %r\n%s',
+                    age, state, thread_stack(self.thread_id),
+                    extra={'stall_seconds': age, 'viewer_state': state})
+
+
+class Watchdog(object):
+    '''Watches the Qt event loop of the calling (GUI) thread'''
+    def __init__(self, threshold=_default_threshold, state=None):
+        self.detector = StallDetector(threading.current_thread().ident, threshold, state)
+        self._interval = threshold / 4.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._timer = None
+
+    def start(self):
+        from PySide.QtCore import QTimer
+        self._timer = QTimer()
+        self._timer.timeout.connect(self.detector.beat)
+        self._timer.start(int(1000 * self._interval))
+        self.detector.beat()
+        self._thread = threading.Thread(target=self._run, name='arrview-watchdog')
+        self._thread.daemon = True
+        self._thread.start()
+        log.debug('watchdog started, threshold: %0.2f s', self.detector.threshold)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.stop()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.detector.check()
+
+
+def viewer_state(viewer):
+    '''Returns a callable describing viewer for stall reports'''
+    def state():
+        return {'slice': tuple(viewer.slicer.slc),
+                'mode': viewer.mode,
+                'rois': len(viewer.roi_manager.rois)}
+    return state
+
+
+# Viewers watched by the shared watchdog of this process
+_watched = []
+_shared = None
+
+
+def _watched_state():
+    return {'viewers': [viewer_state(viewer)() for viewer in list(_watched)]}
+
+
+def install(viewer, threshold=None):
+    '''Watch viewer with the process' Watchdog, which is started for the
+    first viewer with threshold (default: ARRVIEW_WATCHDOG). Returns the
+    Watchdog, or None without starting one if neither is set. Call
+    uninstall when the viewer is closed.'''
+    global _shared
+    threshold = threshold_from_environment() if threshold is None else threshold
+    if threshold is None:
+        return None
+    if _shared is None:
+        _shared = Watchdog(threshold, state=_watched_state).start()
+    _watched.append(viewer)
+    return _shared
+
+
+def uninstall(viewer):
+    '''Stop watching viewer, the Watchdog stops with its last viewer'''
+    global _shared
+    if viewer in _watched:
+        _watched.remove(viewer)
+    if not _watched and _shared is not None:
+        _shared.stop()
+        _shared = None
@@ -0,0 +1,89 @@
+'''Shared helpers for the benchmark scripts: timing, JSON results and
+comparison against a stored baseline.
+
+Each result is a dict with a benchmark name, its params and timings in
+seconds. Results are matched to a baseline by name and params.
+'''
+import argparse
+import json
+import sys
+import time
+
+
+def timeit(func, repeat=5, min_time=0.05):
+    '''Time func, calling it number times per repeat where number is chosen
+    so that one repeat takes at least min_time seconds.
+    Returns a dict with the min and median seconds per call'''
+    t0 = time.time()
+    func()
+    once = time.time() - t0
+    number = max(1, int(min_time / max(once, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        t0 = time.time()
+        for _ in range(number):
+            func()
+        times.append((time.time() - t0) / number)
+    times.sort()
+    return {'min': times[0], 'median': times[len(times) // 2],
+            'repeat': repeat, 'number': number}
+
+
+def summarize(times):
+    '''Summarize a list of seconds measured elsewhere, like timeit'''
+    times = sorted(times)
+    return {'min': times[0], 'median': times[len(times) // 2], 'repeat': len(times)}
+
+
+def _key(record):
+    return (record['benchmark'], json.dumps(record.get('params', {}), sort_keys=True))
+
+
+def compare(results, baseline, tolerance=0.2):
+    '''Returns the results whose median is more than tolerance (a fraction)
+    slower than the same benchmark in baseline, as (result, ratio) pairs'''
+    base = {_key(r): r for r in baseline}
+    regressions = []
+    for record in results:
+        old = base.get(_key(record))
+        if old is None or not old['median']:
+            continue
+        ratio = record['median'] / old['median']
+        if ratio > 1 + tolerance:
+            regressions.append((record, ratio))
+    return regressions
+
+
+def parser(description):
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--output', default=None, help='write JSON results to this file')
+    p.add_argument('--baseline', default=None,
+                   help='JSON results to compare against, exits with 1 on regressions')
+    p.add_argument('--tolerance', type=float, default=0.2,
+                   help='allowed slowdown against the baseline as a fraction (default: 0.2)')
+    return p
+
+
+def report(results, args):
+    '''Print and save results, compare them with args.baseline if given.
+    Returns the exit status'''
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for record, ratio in regressions:
+        sys.stderr.write('regression: %s %s %.2fx slower\n'
+                         % (record['benchmark'], json.dumps(record.get('params', {}), sort_keys=True), ratio))
+    return 1 if regressions else 0
+
+
+def emit(record):
+    '''Print one result as a line of JSON as soon as it is measured'''
+    print(json.dumps(record, sort_keys=True))
+    sys.stdout.flush()
+    return record
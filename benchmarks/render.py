@@ -0,0 +1,102 @@
+'''Rendering benchmark: slicing, scaling, normalizing and colormapping.
+
+Covers Slicer.view across view dimension orders, Norm.set_scale,
+Norm.normalize, ndarray_to_pixdata and ndarray_to_arraypixmap for several
+dtypes, with and without NaNs, and slice sizes. Results are printed as
+JSON, one record per measurement.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/render.py [--sizes 256 1024 4096]
+        [--repeat N] [--output FILE] [--baseline FILE] [--tolerance FRACTION]
+'''
+import os
+import sys
+
+import numpy as np
+
+import harness
+
+
+_dtypes = [('uint8', False), ('int16', False), ('float32', False),
+           ('float64', False), ('float32', True), ('float64', True)]
+
+# Depth of the arrays sliced in the Slicer.view benchmark
+_depth = 4
+
+
+def _random(shape, dtype, nans, seed=0):
+    rng = np.random.RandomState(seed)
+    if np.dtype(dtype).kind in 'iu':
+        info = np.iinfo(dtype)
+        return rng.randint(info.min, info.max, size=shape).astype(dtype)
+    arr = rng.standard_normal(shape).astype(dtype)
+    if nans:
+        arr[rng.random_sample(shape) < 0.01] = np.nan
+    return arr
+
+
+def bench_slicer(sizes, repeat):
+    from arrview.slicer import Slicer
+    results = []
+    for size in sizes:
+        for shape, (xdim, ydim) in [((size, size, _depth), (1, 0)),
+                                    ((size, size, _depth), (0, 1)),
+                                    ((_depth, size, size), (2, 1)),
+                                    ((_depth, size, size), (1, 2))]:
+            slicer = Slicer(np.zeros(shape, dtype='float32'), xdim=xdim, ydim=ydim)
+            freedim = slicer.slc.freedims[0]
+            state = {'i': 0}
+
+            def view():
+                # Moving the free dim invalidates the cached view
+                state['i'] = (state['i'] + 1) % _depth
+                slicer.set_freedim(freedim, state['i'])
+                return slicer.view
+
+            record = {'benchmark': 'slicer_view',
+                      'params': {'size': size, 'shape': list(shape), 'viewdims': [xdim, ydim]}}
+            record.update(harness.timeit(view, repeat))
+            results.append(harness.emit(record))
+    return results
+
+
+def bench_colormap(sizes, repeat):
+    from matplotlib import cm
+    from arrview.colormapper import Norm, ndarray_to_arraypixmap, ndarray_to_pixdata
+    results = []
+    for size in sizes:
+        for dtype, nans in _dtypes:
+            arr = _random((size, size), dtype, nans)
+            norm = Norm()
+            norm.set_scale(arr)
+            params = {'size': size, 'dtype': dtype, 'nans': nans}
+            for name, func in [
+                    ('norm_set_scale', lambda: Norm().set_scale(arr)),
+                    ('norm_normalize', lambda: norm.normalize(arr)),
+                    ('ndarray_to_pixdata', lambda: ndarray_to_pixdata(arr, cm.gray, norm.normalize)),
+                    ('ndarray_to_arraypixmap', lambda: ndarray_to_arraypixmap(arr, cm.gray, norm.normalize))]:
+                record = {'benchmark': name, 'params': params}
+                record.update(harness.timeit(func, repeat))
+                results.append(harness.emit(record))
+    return results
+
+
+def run(sizes=(256, 1024, 4096), repeat=5):
+    from PySide.QtGui import QApplication
+    # QPixmap needs an application, offscreen needs no display
+    app = QApplication.instance() or QApplication([])
+    return bench_slicer(sizes, repeat) + bench_colormap(sizes, repeat)
+
+
+def main():
+    parser = harness.parser(__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 1024, 4096],
+                        help='slice widths and heights to benchmark')
+    args = parser.parse_args()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    results = run(sizes=args.sizes, repeat=args.repeat)
+    return harness.report(results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
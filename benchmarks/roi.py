@@ -0,0 +1,185 @@
+'''ROI benchmark: creating, editing, measuring and saving ROIs.
+
+Covers ROIManager.new_roi and add_rois with many ROIs, ROIView.update_stats,
+ROI.set_mask, PaintBrushItem.fill_pixmap strokes at several radii,
+_pixmap_to_ndarray and store_rois/load_rois. Each case runs in a fresh
+interpreter and reports its time and its peak memory, the growth of the
+process' maximum resident set size while the case runs. Results are
+printed as JSON, one record per measurement.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/roi.py [--shape 256 256 64]
+        [--repeat N] [--output FILE] [--baseline FILE] [--tolerance FRACTION]
+'''
+import atexit
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+import harness
+
+
+def _maxrss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else 1024 * rss
+
+
+def _volume(shape):
+    return np.random.RandomState(0).standard_normal(shape).astype('float32')
+
+
+def _mask(shape, fraction=0.1, seed=1):
+    return np.random.RandomState(seed).random_sample(shape) < fraction
+
+
+def _manager(shape):
+    from arrview.roi import ROIManager
+    from arrview.slicer import Slicer
+    return ROIManager(slicer=Slicer(_volume(shape)))
+
+
+def _app():
+    from PySide.QtGui import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def case_new_roi(shape, count):
+    manager = _manager(shape)
+    def run():
+        manager.rois = []
+        for _ in range(count):
+            manager.new_roi()
+    return run
+
+
+def case_add_rois(shape, count):
+    from arrview.roi import ROI
+    manager = _manager(shape)
+    masks = [_mask(shape, seed=i) for i in range(count)]
+    def run():
+        manager.rois = []
+        manager.add_rois([ROI(name='roi_%d' % i, mask=m) for i, m in enumerate(masks)])
+    return run
+
+
+def case_update_stats(shape):
+    from arrview.roi import ROI, ROIView
+    view = ROIView(roi=ROI(name='roi', mask=_mask(shape)), arr=_volume(shape))
+    return view.update_stats
+
+
+def case_set_mask(shape):
+    from arrview.roi import ROI
+    from arrview.slicer import Slicer
+    slicer = Slicer(_volume(shape))
+    roi = ROI(name='roi', mask=np.zeros(shape, dtype=bool))
+    mask = _mask(shape[:2])
+    return lambda: roi.set_mask(mask, slicer.slc)
+
+
+def case_fill_pixmap(shape, radius):
+    from PySide.QtCore import QPoint, Qt
+    from PySide.QtGui import QColor, QPixmap
+    from arrview.tools.paintbrush import PaintBrushItem
+    app = _app()
+    h, w = shape[:2]
+    brush = PaintBrushItem(radius=radius, color=QColor(Qt.green))
+    pixmap = QPixmap(w, h)
+    pixmap.fill(Qt.transparent)
+    # A diagonal stroke across the slice, in segments as mouse moves deliver it
+    points = [QPoint(int(x), int(x * h / float(w))) for x in np.linspace(0, w - 1, 50)]
+    def run():
+        for origin, pos in zip(points[:-1], points[1:]):
+            brush.fill_pixmap(pixmap, origin, pos)
+    run.app = app
+    return run
+
+
+def case_pixmap_to_ndarray(shape):
+    from arrview.tools.roi import _ndarray_to_arraypixmap, _pixmap_to_ndarray
+    app = _app()
+    pixmap = _ndarray_to_arraypixmap(_mask(shape[:2]))
+    run = lambda: _pixmap_to_ndarray(pixmap)
+    run.app = app
+    return run
+
+
+def _roi_file(shape, count):
+    from arrview.roi import ROI
+    rois = [ROI(name='roi_%d' % i, mask=_mask(shape, seed=i)) for i in range(count)]
+    fd, filename = tempfile.mkstemp(suffix='.h5')
+    os.close(fd)
+    atexit.register(os.remove, filename)
+    return rois, filename
+
+
+def case_store_rois(shape, count):
+    from arrview.roi_persistence import store_rois
+    rois, filename = _roi_file(shape, count)
+    return lambda: store_rois(rois, filename)
+
+
+def case_load_rois(shape, count):
+    from arrview.roi_persistence import load_rois, store_rois
+    rois, filename = _roi_file(shape, count)
+    store_rois(rois, filename)
+    return lambda: load_rois(filename)
+
+
+def _cases(shape):
+    cases = [('new_roi', {'count': 50}),
+             ('add_rois', {'count': 50}),
+             ('update_stats', {}),
+             ('set_mask', {}),
+             ('pixmap_to_ndarray', {}),
+             ('store_rois', {'count': 10}),
+             ('load_rois', {'count': 10})]
+    cases += [('fill_pixmap', {'radius': r}) for r in (1, 5, 15, 30)]
+    return cases
+
+
+def run_case(name, params, shape, repeat):
+    '''Measure one case in this process'''
+    func = globals()['case_' + name](shape, **params)
+    before = _maxrss_bytes()
+    record = {'benchmark': name, 'params': dict(params, shape=list(shape))}
+    record.update(harness.timeit(func, repeat))
+    record['peak_bytes'] = _maxrss_bytes() - before
+    return record
+
+
+def run(shape=(256, 256, 64), repeat=5):
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    results = []
+    for name, params in _cases(shape):
+        out = subprocess.check_output(
+            [sys.executable, __file__, '--case', name, '--params', json.dumps(params),
+             '--repeat', str(repeat), '--shape'] + [str(n) for n in shape], env=env)
+        results.append(harness.emit(json.loads(out.strip().splitlines()[-1])))
+    return results
+
+
+def main():
+    parser = harness.parser(__doc__.splitlines()[0])
+    parser.add_argument('--shape', type=int, nargs='+', default=[256, 256, 64],
+                        help='shape of the volume the ROIs are drawn on')
+    parser.add_argument('--case', default=None, help='run a single case in this process')
+    parser.add_argument('--params', default='{}', help='JSON parameters of --case')
+    args = parser.parse_args()
+    shape = tuple(args.shape)
+    if args.case:
+        print(json.dumps(run_case(args.case, json.loads(args.params), shape, args.repeat)))
+        return 0
+    results = run(shape=shape, repeat=args.repeat)
+    return harness.report(results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
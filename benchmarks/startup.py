@@ -0,0 +1,73 @@
+'''Startup benchmark: import time and time-to-first-frame.
+
+Each measurement runs in a fresh interpreter so module caches do not hide
+import costs. Results are printed as JSON, one record per measurement.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/startup.py [--repeat N] [--output FILE]
+        [--baseline FILE] [--tolerance FRACTION]
+'''
+import os
+import subprocess
+import sys
+import tempfile
+
+import harness
+
+
+_import_arrview = '''
+import time
+t0 = time.time()
+import arrview
+print(time.time() - t0)
+'''
+
+_first_frame = '''
+import time
+t0 = time.time()
+from PySide.QtGui import QApplication
+app = QApplication([])
+from arrview.cli import load_array
+from arrview.main import ArrayViewer
+from arrview.slicer import Slicer
+viewer = ArrayViewer(Slicer(load_array(%(path)r)))
+viewer.pixmap
+print(time.time() - t0)
+'''
+
+
+def _time_script(script, repeat):
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', script], env=env)
+        times.append(float(out.strip().splitlines()[-1]))
+    return harness.summarize(times)
+
+
+def run(repeat=5, shape=(256, 256, 32)):
+    import numpy as np
+    fd, path = tempfile.mkstemp(suffix='.npy')
+    os.close(fd)
+    try:
+        np.save(path, np.random.random(shape).astype('float32'))
+        results = []
+        for name, script in [('import_arrview', _import_arrview),
+                             ('first_frame_npy', _first_frame % {'path': path})]:
+            record = {'benchmark': name}
+            record.update(_time_script(script, repeat))
+            results.append(harness.emit(record))
+        return results
+    finally:
+        os.remove(path)
+
+
+def main():
+    args = harness.parser(__doc__.splitlines()[0]).parse_args()
+    results = run(repeat=args.repeat)
+    return harness.report(results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,7 +9,12 @@ setup(name='arrview',
       author_email='thacker.jon@gmail.com',
       version=__version__,
       url='https://github.com/jthacker/arrview',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks']),
+      entry_points={
+          'console_scripts': [
+              'arrview = arrview.cli:main'
+              ]
+          },
       install_requires=[
           'h5py',
           'matplotlib',